@@ -0,0 +1,257 @@
+import hashlib
+import os
+import threading
+import time
+import wave
+from array import array
+from collections import OrderedDict
+
+import tracing
+
+WAIT_INTERVAL = 0.1
+
+
+class AudioCacheError(Exception):
+    pass
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class AudioCache:
+    """Size-bounded LRU cache of rendered sentence audio on disk.
+
+    Keys are (book content hash, sentence index, rate, voice) tuples. Recency is
+    kept in the file mtimes, so the LRU order survives restarts.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp.wav"):
+                os.remove(path)
+            elif name.endswith(".wav"):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self.entries[name] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def filename(key):
+        book_hash, sentence_idx, rate, voice = key
+        voice_hash = hashlib.sha1(str(voice).encode("utf-8")).hexdigest()[:8]
+        return f"{book_hash}_{int(rate)}_{voice_hash}_{sentence_idx}.wav"
+
+    def contains(self, key):
+        with self.lock:
+            return self.filename(key) in self.entries
+
+    def get(self, key):
+        name = self.filename(key)
+        with self.lock:
+            if name not in self.entries:
+                return None
+            self.entries.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._forget(name)
+            return None
+        return path
+
+    def temp_path(self, key):
+        return os.path.join(self.directory, self.filename(key)[:-len(".wav")] + ".tmp.wav")
+
+    def put(self, key, temp_path):
+        name = self.filename(key)
+        path = os.path.join(self.directory, name)
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        with self.lock:
+            self.total_bytes += size - self.entries.pop(name, 0)
+            self.entries[name] = size
+            evicted = []
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_name, old_size = self.entries.popitem(last=False)
+                self.total_bytes -= old_size
+                evicted.append(old_name)
+        self._remove_files(evicted)
+        return path
+
+    def invalidate(self, book_hash, rate=None):
+        prefix = f"{book_hash}_" if rate is None else f"{book_hash}_{int(rate)}_"
+        with self.lock:
+            stale = [name for name in self.entries if name.startswith(prefix)]
+            for name in stale:
+                self.total_bytes -= self.entries.pop(name)
+        self._remove_files(stale)
+
+    def _forget(self, name):
+        with self.lock:
+            self.total_bytes -= self.entries.pop(name, 0)
+
+    def _remove_files(self, names):
+        # A file still open for playback cannot be removed on Windows; it is
+        # left on disk and picked up again by the next scan.
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class PreSynthesizer:
+    """Renders the sentences ahead of the read cursor into an AudioCache.
+
+    Audio is rendered at full volume so cached files are valid for any volume
+    setting; the player applies the volume on playback. engine is used from
+    the render thread only, so it must not be the engine that speaks.
+    """
+
+    def __init__(self, engine, cache, book_hash, sentences, lookahead=8):
+        self.engine = engine
+        self.cache = cache
+        self.book_hash = book_hash
+        self.sentences = sentences
+        self.lookahead = lookahead
+        self.rate = engine.getProperty('rate')
+        self.voice = engine.getProperty('voice')
+        self.cursor = 0
+        self.error = None
+        self.stopped = False
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def key(self, sentence_idx):
+        return (self.book_hash, sentence_idx, self.rate, self.voice)
+
+    def start(self, cursor):
+        self.cursor = cursor
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop rendering; returns once a render in progress has finished and the engine is free."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def set_rate(self, rate):
+        with self.condition:
+            self.rate = rate
+            self.condition.notify_all()
+
+    def wait_for(self, sentence_idx, stop_flag, timeout=None):
+        """Path of the rendered sentence, or None if stopped or timeout passed first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            self.cursor = sentence_idx
+            self.condition.notify_all()
+            while not stop_flag.is_set() and (deadline is None or time.monotonic() < deadline):
+                path = self.cache.get(self.key(sentence_idx))
+                if path:
+                    return path
+                if self.error:
+                    raise AudioCacheError(f"pre-synthesis failed: {self.error}")
+                self.condition.wait(WAIT_INTERVAL)
+        return None
+
+    def _next_missing(self):
+        for idx in range(self.cursor, min(self.cursor + self.lookahead, len(self.sentences))):
+            if not self.cache.contains(self.key(idx)):
+                return idx
+        return None
+
+    def _run(self):
+        while True:
+            with self.condition:
+                idx = self._next_missing()
+                while idx is None and not self.stopped:
+                    self.condition.wait(WAIT_INTERVAL)
+                    idx = self._next_missing()
+                if self.stopped:
+                    return
+                key = self.key(idx)
+            try:
+                self._render(idx, key)
+            except Exception as e:
+                with self.condition:
+                    self.error = e
+                    self.condition.notify_all()
+                return
+            with self.condition:
+                self.condition.notify_all()
+
+    def _render(self, sentence_idx, key):
+        temp_path = self.cache.temp_path(key)
+        self.engine.setProperty('rate', key[2])
+        self.engine.setProperty('volume', 1.0)
+        with tracing.span("tts.render_sentence", sentence=sentence_idx):
+            self.engine.save_to_file(self.sentences[sentence_idx], temp_path, str(sentence_idx))
+            self.engine.runAndWait()
+        try:
+            with wave.open(temp_path, "rb") as wav:
+                wav.getnframes()
+        except (wave.Error, EOFError, FileNotFoundError) as e:
+            raise AudioCacheError(f"engine did not produce a WAV file: {e}")
+        self.cache.put(key, temp_path)
+
+
+class WavPlayer:
+    def __init__(self, chunk_frames=1024):
+        self.chunk_frames = chunk_frames
+        self.volume = 1.0
+        self._audio = None
+
+    def _open_stream(self, wav):
+        if self._audio is None:
+            try:
+                import pyaudio
+                self._audio = pyaudio.PyAudio()
+            except (ImportError, OSError) as e:
+                raise AudioCacheError(f"audio playback unavailable: {e}")
+        try:
+            return self._audio.open(format=self._audio.get_format_from_width(wav.getsampwidth()),
+                                    channels=wav.getnchannels(), rate=wav.getframerate(), output=True)
+        except OSError as e:
+            raise AudioCacheError(f"audio playback unavailable: {e}")
+
+    def play(self, path, start_fraction, stop_flag, on_position=None):
+        """Play a WAV file from start_fraction of its length. Returns False if stopped."""
+        with wave.open(path, "rb") as wav:
+            total = max(wav.getnframes(), 1)
+            wav.setpos(min(int(total * start_fraction), total - 1))
+            stream = self._open_stream(wav)
+            try:
+                while not stop_flag.is_set():
+                    data = wav.readframes(self.chunk_frames)
+                    if not data:
+                        return True
+                    if self.volume < 1.0 and wav.getsampwidth() == 2:
+                        samples = array("h", data)
+                        for i, sample in enumerate(samples):
+                            samples[i] = int(sample * self.volume)
+                        data = samples.tobytes()
+                    stream.write(data)
+                    if on_position:
+                        on_position(wav.tell() / total)
+                return False
+            finally:
+                stream.stop_stream()
+                stream.close()
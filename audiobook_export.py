@@ -0,0 +1,267 @@
+"""Headless audiobook export: renders a PDF, TXT or EPUB book to WAV files.
+
+Run with: python audiobook_export.py book.epub -o out/ [--workers N] [--rate WPM] [--voice ID] [--backend NAME]
+
+Writes one file per EPUB chapter, PDF page or TXT chapter. Needs no
+display, only a TTS backend from tts_backends (pyttsx3 by default, or
+espeak-ng on Linux).
+Interrupting and re-running the same command carries on where it stopped.
+"""
+import argparse
+import functools
+import hashlib
+import multiprocessing
+import os
+import re
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from audio_cache import content_hash
+from document import Document
+from tts_backends import BACKENDS, EspeakEngine, pyttsx3_engine
+
+BATCH_SENTENCES = 32
+SENTENCE_GAP_MS = 250
+PDF_POLL_SECONDS = 0.05
+CHAPTER_PATTERN = re.compile(r'^[ \t]*(?:chapter|part|book)\b[^\n]*$', re.IGNORECASE | re.MULTILINE)
+
+
+class ExportError(Exception):
+    pass
+
+
+def split_chapters(text):
+    """Split plain text before each "Chapter ..." heading line; the whole text if there are none."""
+    starts = [0] + [match.start() for match in CHAPTER_PATTERN.finditer(text) if match.start() > 0]
+    parts = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+    return [part for part in parts if part.strip()]
+
+
+def load_parts(file_path):
+    """The text of each output file: EPUB chapters, PDF pages or TXT chapters."""
+    if file_path.lower().endswith(".epub"):
+        from epub_book import EpubBook
+        book = EpubBook(file_path, prefetch=0)
+        try:
+            return [book.chapter_text(idx) for idx in range(len(book))]
+        finally:
+            book.close()
+    if file_path.lower().endswith(".pdf"):
+        from pdf_loader import PdfLoader
+        loader = PdfLoader(file_path)
+        pages = []
+        try:
+            while not loader.done:
+                time.sleep(PDF_POLL_SECONDS)
+                pages.extend(loader.poll())
+        finally:
+            loader.cancel()
+        return pages
+    with open(file_path, "r", encoding="utf-8") as file:
+        return split_chapters(file.read())
+
+
+def split_sentences(text):
+    document = Document(text)
+    document.segment(text)
+    return [str(sentence) for sentence in document.sentences]
+
+
+# Worker processes: each owns one engine for its whole life.
+_engine = None
+
+
+def start_worker(engine_factory, rate, voice):
+    global _engine
+    _engine = engine_factory()
+    if rate is not None:
+        _engine.setProperty('rate', rate)
+    if voice is not None:
+        _engine.setProperty('voice', voice)
+    _engine.setProperty('volume', 1.0)
+
+
+def render_batch(batch):
+    """Render [(sentence, path)] with this worker's engine in one engine run."""
+    temp_paths = [path[:-len(".wav")] + ".tmp.wav" for _, path in batch]
+    for (sentence, _), temp_path in zip(batch, temp_paths):
+        _engine.save_to_file(sentence, temp_path)
+    _engine.runAndWait()
+    for (_, path), temp_path in zip(batch, temp_paths):
+        try:
+            with wave.open(temp_path, "rb") as wav:
+                wav.getnframes()
+        except (wave.Error, EOFError, FileNotFoundError) as e:
+            raise ExportError(f"engine did not produce a WAV file for {os.path.basename(path)}: {e}")
+        os.replace(temp_path, path)
+    return len(batch)
+
+
+def stitch(paths, out_path, gap_ms=SENTENCE_GAP_MS):
+    """Concatenate WAV files into out_path with gap_ms of silence between them."""
+    temp_path = out_path[:-len(".wav")] + ".tmp.wav"
+    with wave.open(temp_path, "wb") as out:
+        params = None
+        for path in paths:
+            with wave.open(path, "rb") as wav:
+                if params is None:
+                    params = wav.getparams()
+                    out.setparams(params)
+                    silence = b"\0" * (params.framerate * gap_ms // 1000 * params.sampwidth * params.nchannels)
+                elif wav.getparams()[:3] != params[:3]:
+                    raise ExportError(f"{os.path.basename(path)} has a different audio format")
+                else:
+                    out.writeframes(silence)
+                out.writeframes(wav.readframes(wav.getnframes()))
+        if params is None:
+            raise ExportError(f"nothing to write to {os.path.basename(out_path)}")
+    os.replace(temp_path, out_path)
+
+
+class AudiobookExport:
+    """Renders a book's parts to one WAV file each with a pool of TTS engine processes.
+
+    Every worker process creates its own engine with engine_factory and
+    renders batches of sentences through save_to_file. Sentence files go
+    into a work directory named after the book's content, rate and voice;
+    a part is stitched as soon as all its sentences exist, then its
+    sentence files are removed and a .done marker is left. A re-run skips
+    finished parts and sentences already on disk, so an interrupted export
+    resumes.
+
+    on_progress, if set, is called in this process with (sentences done,
+    sentences total, sentences rendered this run, seconds elapsed).
+    """
+
+    def __init__(self, parts, output_dir, name, workers=None, rate=None, voice=None,
+                 engine_factory=pyttsx3_engine, batch_sentences=BATCH_SENTENCES, on_progress=None):
+        self.parts = [split_sentences(part) for part in parts]
+        self.output_dir = output_dir
+        self.name = name
+        self.workers = workers or os.cpu_count() or 1
+        self.rate = rate
+        self.voice = voice
+        self.engine_factory = engine_factory
+        self.batch_sentences = batch_sentences
+        self.on_progress = on_progress
+        self.rendered = 0
+        book_hash = content_hash("\n".join("\n".join(part) for part in self.parts))
+        voice_hash = hashlib.sha1(str(voice).encode("utf-8")).hexdigest()[:8]
+        self.work_dir = os.path.join(output_dir, f".{name}-{book_hash}-{rate}-{voice_hash}")
+
+    def part_path(self, part_idx):
+        return os.path.join(self.output_dir, f"{self.name}_{part_idx + 1:03d}.wav")
+
+    def sentence_path(self, part_idx, sentence_idx):
+        return os.path.join(self.work_dir, f"{part_idx:04d}_{sentence_idx:06d}.wav")
+
+    def marker_path(self, part_idx):
+        return os.path.join(self.work_dir, f"{part_idx:04d}.done")
+
+    def is_done(self, part_idx):
+        return os.path.exists(self.marker_path(part_idx)) and os.path.exists(self.part_path(part_idx))
+
+    def run(self):
+        """Render every unfinished part; returns the paths of all part files."""
+        os.makedirs(self.work_dir, exist_ok=True)
+        total = sum(len(part) for part in self.parts)
+        done = sum(len(part) for idx, part in enumerate(self.parts) if self.is_done(idx))
+        remaining = {}
+        batches = []
+        for part_idx, sentences in enumerate(self.parts):
+            if self.is_done(part_idx) or not sentences:
+                continue
+            missing = [(sentence, self.sentence_path(part_idx, idx)) for idx, sentence in enumerate(sentences)
+                       if not os.path.exists(self.sentence_path(part_idx, idx))]
+            done += len(sentences) - len(missing)
+            remaining[part_idx] = 0
+            for start in range(0, len(missing), self.batch_sentences):
+                batches.append((part_idx, missing[start:start + self.batch_sentences]))
+                remaining[part_idx] += 1
+        for part_idx in [idx for idx, count in remaining.items() if count == 0]:
+            self.finish_part(part_idx)
+
+        started = time.perf_counter()
+        self.report(done, total, started)
+        if batches:
+            # spawn: engines and their audio drivers do not survive a fork.
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(batches)),
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=start_worker,
+                                     initargs=(self.engine_factory, self.rate, self.voice)) as executor:
+                futures = {executor.submit(render_batch, batch): part_idx for part_idx, batch in batches}
+                try:
+                    for future in as_completed(futures):
+                        count = future.result()
+                        self.rendered += count
+                        done += count
+                        part_idx = futures[future]
+                        remaining[part_idx] -= 1
+                        if not remaining[part_idx]:
+                            self.finish_part(part_idx)
+                        self.report(done, total, started)
+                except BrokenProcessPool as e:
+                    # The worker prints its own traceback, e.g. when no engine could be created.
+                    raise ExportError(f"a TTS worker process failed: {e}")
+                except BaseException:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+        return [self.part_path(idx) for idx, part in enumerate(self.parts) if part]
+
+    def finish_part(self, part_idx):
+        paths = [self.sentence_path(part_idx, idx) for idx in range(len(self.parts[part_idx]))]
+        stitch(paths, self.part_path(part_idx))
+        with open(self.marker_path(part_idx), "w"):
+            pass
+        for path in paths:
+            os.remove(path)
+
+    def report(self, done, total, started):
+        if self.on_progress:
+            self.on_progress(done, total, self.rendered, time.perf_counter() - started)
+
+
+def print_progress(done, total, rendered, elapsed):
+    speed = rendered / elapsed if elapsed > 0 else 0.0
+    eta = f"{(total - done) / speed:.0f} s" if speed else "-"
+    print(f"\r{done}/{total} sentences  {speed:.1f} sentences/s  ETA {eta}   ", end="", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a PDF, TXT or EPUB book to WAV files.")
+    parser.add_argument("book")
+    parser.add_argument("-o", "--output", default=".", help="output directory")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="TTS engine processes (default: CPU count)")
+    parser.add_argument("--rate", type=int, default=None, help="speech rate in words per minute")
+    parser.add_argument("--voice", default=None, help="engine voice id")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="pyttsx3", help="TTS backend")
+    args = parser.parse_args(argv)
+
+    name = os.path.splitext(os.path.basename(args.book))[0]
+    try:
+        parts = load_parts(args.book)
+        engine_factory = BACKENDS[args.backend]
+        if args.backend == "espeak":
+            # The process pool already runs one engine per core.
+            engine_factory = functools.partial(EspeakEngine, workers=1)
+        export = AudiobookExport(parts, args.output, name, workers=args.workers, rate=args.rate,
+                                 voice=args.voice, engine_factory=engine_factory, on_progress=print_progress)
+        started = time.perf_counter()
+        paths = export.run()
+    except KeyboardInterrupt:
+        print("\nInterrupted; run the same command again to resume.", file=sys.stderr)
+        return 130
+    except (OSError, ExportError) as e:
+        print(f"\nExport failed: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - started
+    print(f"\nWrote {len(paths)} files to {args.output}; rendered {export.rendered} sentences "
+          f"in {elapsed:.1f} s ({export.rendered / max(elapsed, 1e-9):.1f} sentences/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Peak RSS of a 10 MB PDF-shaped book: string lists vs. the array-backed Document.
+
+Each representation is built in a fresh interpreter so peaks do not mix.
+Run with: python benchmarks/bench_document_memory.py  (Linux/macOS)
+"""
+import os
+import re
+import resource
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+BOOK_BYTES = 10 * 1024 * 1024
+PAGE_CHARS = 3000
+
+
+def make_pages():
+    sentence = "The quick brown fox jumps over the lazy dog near the river bank. "
+    page = (sentence * (PAGE_CHARS // len(sentence) + 1))[:PAGE_CHARS].rstrip()
+    return [page] * (BOOK_BYTES // PAGE_CHARS)
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def build_lists(pages):
+    # The representation load_book used before Document: all three copies.
+    book_text = "\n".join(pages)
+    sentences = [s.strip() for s in re.compile(r'(?<=[.!?]) +').split(book_text) if s.strip()]
+    return pages, book_text, sentences
+
+
+def build_document(pages):
+    from document import Document
+    document = Document()
+    for page in pages:
+        document.add_page(page)
+    document.finish_pages()
+    return document
+
+
+def child(mode):
+    # Copy each page so the strings are distinct, as extracted pages would be.
+    pages = ["".join(page) for page in make_pages()]
+    baseline = peak_rss_mb()
+    book = build_lists(pages) if mode == "lists" else build_document(pages)
+    del pages
+    print(f"{baseline:.1f} {peak_rss_mb():.1f} {len(book[2]) if mode == 'lists' else len(book.sentences)}")
+
+
+def main():
+    print(f"{'representation':>15} {'peak RSS':>10} {'added by book':>14} {'sentences':>10}")
+    for mode in ("lists", "document"):
+        output = subprocess.run([sys.executable, __file__, mode], capture_output=True, text=True, check=True).stdout
+        baseline, peak, sentences = output.split()
+        added = float(peak) - float(baseline)
+        print(f"{mode:>15} {float(peak):>7.1f} MB {added:>11.1f} MB {sentences:>10}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        child(sys.argv[1])
+    else:
+        main()
@@ -0,0 +1,89 @@
+"""Time to first chapter on a synthetic 300-chapter EPUB: eager ebooklib load vs. EpubBook.
+
+Run with: python benchmarks/bench_epub_open.py
+"""
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bs4 import BeautifulSoup
+
+from epub_book import PARSER, EpubBook
+
+CHAPTERS = 300
+PARAGRAPHS = 60
+PARAGRAPH = ("<p>It was a <em>bright</em> cold day in April, and the clocks were striking thirteen. "
+             "Winston Smith, his chin nuzzled into his breast, slipped quickly through the glass doors "
+             "of <a href=\"#n1\">Victory Mansions</a>.</p>")
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+
+def write_epub(path):
+    manifest = "".join(f'<item id="c{i}" href="c{i}.xhtml" media-type="application/xhtml+xml"/>'
+                       for i in range(CHAPTERS))
+    spine = "".join(f'<itemref idref="c{i}"/>' for i in range(CHAPTERS))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as book:
+        book.writestr("mimetype", "application/epub+zip")
+        book.writestr("META-INF/container.xml", CONTAINER)
+        book.writestr("OEBPS/content.opf",
+                      '<package xmlns="http://www.idpf.org/2007/opf" xmlns:dc="http://purl.org/dc/elements/1.1/" '
+                      'version="3.0" unique-identifier="id"><metadata><dc:identifier id="id">bench</dc:identifier>'
+                      '<dc:title>Bench</dc:title><dc:language>en</dc:language></metadata>'
+                      f'<manifest>{manifest}</manifest><spine>{spine}</spine></package>')
+        for i in range(CHAPTERS):
+            book.writestr(f"OEBPS/c{i}.xhtml", '<html xmlns="http://www.w3.org/1999/xhtml"><head>'
+                          f"<title>{i}</title></head><body><h1>Chapter {i}</h1>{PARAGRAPH * PARAGRAPHS}</body></html>")
+
+
+def eager_first_chapter(path):
+    # EPUBViewer.load_epub before EpubBook: parse every spine document up front.
+    from ebooklib import epub
+    book = epub.read_epub(path)
+    pages = []
+    for idref, _ in book.spine:
+        doc = book.get_item_with_id(idref)
+        if doc:
+            body = BeautifulSoup(doc.get_content(), "html.parser").body
+            if body:
+                pages.append(str(body))
+    return pages[0]
+
+
+def lazy_first_chapter(path):
+    book = EpubBook(path)
+    try:
+        return book.chapter(0)
+    finally:
+        book.close()
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "bench.epub")
+        write_epub(path)
+        print(f"{CHAPTERS} chapters, {os.path.getsize(path) / 1024:.0f} KiB, parser: {PARSER}")
+        runs = [("EpubBook (lazy)", lazy_first_chapter)]
+        if importlib.util.find_spec("ebooklib"):
+            runs.insert(0, ("ebooklib + html.parser (eager)", eager_first_chapter))
+        else:
+            print("ebooklib not installed; skipping the eager baseline")
+        for name, first_chapter in runs:
+            start = time.perf_counter()
+            first_chapter(path)
+            print(f"{name:>32}: {(time.perf_counter() - start) * 1000:8.1f} ms to first chapter")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
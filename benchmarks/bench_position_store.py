@@ -0,0 +1,68 @@
+"""save_position throughput with 10k tracked books: legacy JSON rewrite vs. PositionStore.
+
+Run with: python benchmarks/bench_position_store.py
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from position_store import PositionStore
+
+BOOKS = 10000
+WRITES = 2000
+
+
+def legacy_save(save_file, book_path, sentence_idx, word_idx):
+    # save_position before the position store: parse and rewrite the whole file.
+    with open(save_file, "r") as f:
+        data = json.load(f)
+    data[book_path] = {"sentence": sentence_idx, "word": word_idx}
+    with open(save_file, "w") as f:
+        json.dump(data, f)
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        book_path = os.path.join(directory, "book.txt")
+        with open(book_path, "w", encoding="utf-8") as f:
+            f.write("Hello world. " * 1000)
+        library = {f"/library/book{i}.pdf": {"sentence": i, "word": 0} for i in range(BOOKS)}
+
+        save_file = os.path.join(directory, "last_read_position.json")
+        with open(save_file, "w") as f:
+            json.dump(library, f)
+        start = time.perf_counter()
+        for i in range(WRITES // 10):
+            legacy_save(save_file, book_path, i, 0)
+        legacy_rate = (WRITES // 10) / (time.perf_counter() - start)
+
+        store = PositionStore(os.path.join(directory, "positions.db"), flush_interval=3600, legacy_json=save_file)
+        start = time.perf_counter()
+        for i in range(WRITES):
+            store.save(book_path, i, 0)
+        save_rate = WRITES / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i in range(WRITES // 10):
+            store.save(book_path, i, 0)
+            store.flush()
+        flush_rate = (WRITES // 10) / (time.perf_counter() - start)
+        tracked = len(store.books())
+        store.close()
+
+        print(f"tracked books:                  {tracked}")
+        print(f"legacy JSON rewrite:            {legacy_rate:>10.0f} writes/s")
+        print(f"PositionStore.save (coalesced): {save_rate:>10.0f} writes/s")
+        print(f"PositionStore.save + flush:     {flush_rate:>10.0f} writes/s")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
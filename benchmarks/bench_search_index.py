@@ -0,0 +1,90 @@
+"""Phrase search latency over a synthetic library: SearchIndex vs. a linear scan.
+
+Run with: python benchmarks/bench_search_index.py [books] [sentences per book]
+Indexes the library into a temporary database, then times in-book and
+whole-library phrase queries and reports the median and p95.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from search_index import SearchIndex
+
+BOOKS = 1000
+SENTENCES = 500
+QUERIES = 200
+WORDS = ("the harbour boat ice wind keeper morning channel rope grey water old light house "
+         "walked waited turned slipped asked came thick narrow first long quiet cold").split()
+
+
+def make_book(rng, sentences):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))).capitalize() + "."
+            for _ in range(sentences)]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+
+def report(name, samples):
+    median, p95 = percentiles(samples)
+    print(f"{name:>28}: median {median:8.3f} ms  p95 {p95:8.3f} ms")
+
+
+def main():
+    books = int(sys.argv[1]) if len(sys.argv) > 1 else BOOKS
+    sentences = int(sys.argv[2]) if len(sys.argv) > 2 else SENTENCES
+    rng = random.Random(1)
+    library = {f"book{n:05d}.txt": make_book(rng, sentences) for n in range(books)}
+    phrases = [" ".join(rng.sample(WORDS, 2)) for _ in range(QUERIES)]
+    paths = [rng.choice(list(library)) for _ in range(QUERIES)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = SearchIndex(os.path.join(directory, "search.db"))
+        start = time.perf_counter()
+        for path, book in library.items():
+            index.index_book(path, "v1", book)
+        print(f"indexed {books} books x {sentences} sentences in {time.perf_counter() - start:.1f} s")
+
+        # Changing one sentence rewrites one row.
+        book = list(library[paths[0]])
+        book[sentences // 2] = "An entirely new sentence."
+        start = time.perf_counter()
+        written = index.index_book(paths[0], "v2", book)
+        print(f"re-indexed one edited book ({written} row) in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        in_book, whole_library, scan_book, scan_library = [], [], [], []
+        for phrase, path in zip(phrases, paths):
+            start = time.perf_counter()
+            index.find(phrase, path=path, limit=1)
+            in_book.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            index.find(phrase, limit=100)
+            whole_library.append(time.perf_counter() - start)
+
+            lowered = phrase.lower()
+            start = time.perf_counter()
+            next((idx for idx, sentence in enumerate(library[path]) if lowered in sentence.lower()), None)
+            scan_book.append(time.perf_counter() - start)
+        for phrase in phrases[:QUERIES // 10]:
+            lowered = phrase.lower()
+            start = time.perf_counter()
+            [(path, idx) for path, book in library.items()
+             for idx, sentence in enumerate(book) if lowered in sentence.lower()][:100]
+            scan_library.append(time.perf_counter() - start)
+        index.close()
+
+    report("in-book, index", in_book)
+    report("in-book, linear scan", scan_book)
+    report("library, index", whole_library)
+    report("library, linear scan", scan_library)
+
+
+if __name__ == "__main__":
+    main()
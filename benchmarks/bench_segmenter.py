@@ -0,0 +1,87 @@
+"""Segmentation throughput in MB/s: the old sentence regex vs. the streaming Segmenter.
+
+Run with: python benchmarks/bench_segmenter.py [path/to/book.txt]
+Pass a large plain-text book (e.g. a Project Gutenberg download) for
+realistic numbers; without one a synthetic 20 MB text is used. The variants
+take turns for ROUNDS rounds and each keeps its best time. Exits non-zero if
+the Segmenter (one chunk) is slower than the old regex split.
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from segmenter import Segmenter
+
+SYNTHETIC_MB = 20
+PARAGRAPH = (
+    "Mr. Thornton walked down to the harbour before dawn. The boats were still tied up... nobody "
+    "had gone out. \"Is it the weather?\" he asked the old keeper. It was not; the ice had come in "
+    "overnight, thick and grey, e.g. in the narrow channel past St. Agnes. He waited an hour!\n"
+    "By noon the wind turned and the first boat slipped its rope.\n\n"
+)
+CHUNK_CHARS = 3000
+ROUNDS = 3
+
+
+def load_text():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r", encoding="utf-8") as f:
+            return f.read()
+    return PARAGRAPH * (SYNTHETIC_MB * 1024 * 1024 // len(PARAGRAPH))
+
+
+def old_regex(text):
+    sentences = re.compile(r'(?<=[.!?]) +').split(text)
+    return [s.strip() for s in sentences if s.strip()]
+
+
+def old_regex_with_words(text):
+    # read_sentences then split every sentence into words again.
+    sentences = old_regex(text)
+    for sentence in sentences:
+        sentence.split()
+    return sentences
+
+
+def segmenter_whole(text):
+    segmenter = Segmenter()
+    starts, _ = segmenter.feed(text)
+    return starts + segmenter.close()[0]
+
+
+def segmenter_chunked(text):
+    segmenter = Segmenter()
+    starts = []
+    for start in range(0, len(text), CHUNK_CHARS):
+        starts.extend(segmenter.feed(text[start:start + CHUNK_CHARS])[0])
+    starts.extend(segmenter.close()[0])
+    return starts
+
+
+def main():
+    text = load_text()
+    megabytes = len(text.encode("utf-8")) / (1024 * 1024)
+    print(f"text: {megabytes:.1f} MB")
+    variants = (("old regex", old_regex), ("old regex + word split", old_regex_with_words),
+                ("Segmenter (one chunk)", segmenter_whole),
+                (f"Segmenter ({CHUNK_CHARS}-char chunks)", segmenter_chunked))
+    times = {}
+    counts = {}
+    for _ in range(ROUNDS):
+        for name, segment in variants:
+            start = time.perf_counter()
+            counts[name] = len(segment(text))
+            elapsed = time.perf_counter() - start
+            times[name] = min(times.get(name, elapsed), elapsed)
+    for name, _ in variants:
+        print(f"{name:>32}: {megabytes / times[name]:>7.1f} MB/s  {counts[name]} sentences")
+    if times["Segmenter (one chunk)"] > times["old regex"]:
+        print("FAIL: the Segmenter is slower than the old regex split")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
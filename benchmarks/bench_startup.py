@@ -0,0 +1,79 @@
+"""Cold-start cost of the reader: import time by module and time to first paint.
+
+Run with: python benchmarks/bench_startup.py
+Each measurement runs in a fresh interpreter inside a scratch directory, so
+the position, search and cache files it creates do not touch your own. The
+first-paint measurement needs a display and is skipped without one.
+test_startup.py holds the regression budgets for both numbers.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HEAVY_MODULES = ("pyttsx3", "speech_recognition", "pyaudio", "PyPDF2")
+TOP_IMPORTS = 15
+RUNS = 5
+
+FIRST_PAINT = """
+import sys, time
+start = time.perf_counter()
+import tkinter as tk
+root = tk.Tk()
+sys.path.insert(0, %r)
+import index
+app = index.SmartBookReaderApp(root)
+root.update()
+print(time.perf_counter() - start)
+app.on_close()
+"""
+
+
+def run_python(args, directory):
+    return subprocess.run([sys.executable] + args, cwd=directory, capture_output=True, text=True,
+                          env=dict(os.environ, PYTHONPATH=REPO))
+
+
+def import_times(directory):
+    """(self µs, cumulative µs, module) for every module imported by `import index`."""
+    result = run_python(["-X", "importtime", "-c", "import index"], directory)
+    if result.returncode:
+        raise RuntimeError(result.stderr)
+    times = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            own, cumulative, module = line[len("import time:"):].split("|")
+            times.append((int(own), int(cumulative), module.strip()))
+    return times
+
+
+def first_paint(directory):
+    """Seconds from the first import to a drawn window, or None without a display."""
+    result = run_python(["-c", FIRST_PAINT % REPO], directory)
+    if result.returncode:
+        return None
+    return float(result.stdout.split()[0])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        times = import_times(directory)
+        total = [cumulative for _, cumulative, module in times if module == "index"][0]
+        print(f"import index: {total / 1000:.1f} ms")
+        for own, cumulative, module in sorted(times, key=lambda t: -t[0])[:TOP_IMPORTS]:
+            print(f"  {own / 1000:8.1f} ms self  {cumulative / 1000:8.1f} ms cumulative  {module}")
+        loaded = [name for _, _, name in times if name in HEAVY_MODULES]
+        print(f"heavy modules imported at startup: {', '.join(loaded) or 'none'}")
+
+        paints = [first_paint(directory) for _ in range(RUNS)]
+        if None in paints:
+            print("time to first paint: skipped (no display)")
+        else:
+            paints.sort()
+            print(f"time to first paint: median {paints[RUNS // 2] * 1000:.0f} ms, "
+                  f"worst {paints[-1] * 1000:.0f} ms over {RUNS} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,559 @@
+"""End-to-end timings of the reader on synthetic TXT, PDF and EPUB books, checked against a baseline.
+
+Run with: python benchmarks/bench_suite.py [--sizes 1000 10000 100000 1000000]
+               [--formats txt pdf epub] [--widgets auto|tk|mock]
+               [--output bench_results.json] [--baseline benchmarks/baseline.json]
+               [--save-baseline] [--require-baseline] [--tolerance 0.5]
+
+Books of each size (in sentences) are generated in a scratch directory,
+which is also the working directory, so the position, search and cache
+files the app creates do not touch your own. SmartBookReaderApp runs with
+the fake TTS backend, no microphone and no library search indexer (see
+bench_search_index.py for that). The following are timed:
+- load_book, cold and from the text cache
+- split_into_sentences
+- highlight_sentence and highlight_word while reading on
+- save_position and load_position_for_book
+- seek_to_sentence across the book
+- next_page and jump_to_page on PDFs
+- EpubBook open and EPUBViewer.load_epub to the first chapter shown
+
+It runs headless. --widgets auto uses the display if there is one, else
+starts Xvfb if it is installed, else replaces the Tk widgets with mocks
+driven by a fake event loop. EPUBViewer runs on Qt's offscreen platform
+when there is no display. Formats whose libraries are missing (PyPDF2 for
+PDF, PyQt5 for the viewer) are reported as skipped.
+
+Results are written as JSON, in seconds. With a baseline file, the run
+exits with status 1 if any metric exceeds baseline * (1 + tolerance) plus
+SLACK_SECONDS. Baselines are machine specific: record one with
+--save-baseline on the machine that will run the comparison. Without a
+baseline the run only reports its timings, unless --require-baseline is
+given (as CI should), in which case it exits with status 2 before running.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timezone
+from unittest import mock
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO)
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+FORMATS = ("txt", "pdf", "epub")
+DEFAULT_OUTPUT = "bench_results.json"
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TOLERANCE = 0.5
+# Added to every threshold so sub-millisecond metrics do not trip on timer noise.
+SLACK_SECONDS = 0.002
+# One-shot operations are repeated on books up to this size and the best run kept.
+REPEAT_UP_TO = 100_000
+REPEATS = 3
+CALLS = 200
+LOAD_TIMEOUT = 600
+QT_TIMEOUT = 30
+
+SEED = 1
+SENTENCE_POOL = 4096
+SENTENCES_PER_PARAGRAPH = 6
+SENTENCES_PER_CHAPTER = 400
+LINES_PER_PAGE = 40
+PDF_LINE_CHARS = 95
+WORDS = ("the", "harbour", "keeper", "lamp", "boats", "were", "tied", "along", "wall", "when", "came", "down",
+         "with", "his", "and", "nobody", "had", "gone", "out", "morning", "grey", "water", "slowly", "over",
+         "stones", "light", "small", "village", "quiet", "road", "wind", "north", "letters", "found", "under",
+         "table", "old", "house", "river", "bridge", "winter", "evening", "station", "train", "late", "again")
+ENDINGS = (".", ".", ".", ".", "?", "!")
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def sentences(count):
+    """count sentences drawn, reproducibly, from a pool of SENTENCE_POOL random ones."""
+    rng = random.Random(SEED)
+    pool = []
+    for _ in range(SENTENCE_POOL):
+        words = rng.choices(WORDS, k=rng.randint(6, 18))
+        pool.append(words[0].capitalize() + " " + " ".join(words[1:]) + rng.choice(ENDINGS))
+    return rng.choices(pool, k=count)
+
+
+def paragraphs(count):
+    lines = sentences(count)
+    return [" ".join(lines[i:i + SENTENCES_PER_PARAGRAPH]) for i in range(0, count, SENTENCES_PER_PARAGRAPH)]
+
+
+def write_txt(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(paragraphs(count)))
+
+
+def pdf_lines(count):
+    line = ""
+    for sentence in sentences(count):
+        for word in sentence.split():
+            if line and len(line) + len(word) >= PDF_LINE_CHARS:
+                yield line
+                line = ""
+            line = f"{line} {word}" if line else word
+    if line:
+        yield line
+
+
+def write_pdf(path, count):
+    """A plain PDF with Helvetica text, LINES_PER_PAGE lines a page; needs no PDF library."""
+    lines = list(pdf_lines(count))
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and its content stream per page.
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode(),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    for i, page in enumerate(pages):
+        shown = "".join("(%s) Tj T*\n" % text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+                        for text in page)
+        stream = f"BT /F1 10 Tf 14 TL 40 800 Td\n{shown}ET".encode("latin-1")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        f.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def write_epub(path, count):
+    lines = paragraphs(count)
+    per_chapter = SENTENCES_PER_CHAPTER // SENTENCES_PER_PARAGRAPH
+    chapters = [lines[i:i + per_chapter] for i in range(0, len(lines), per_chapter)]
+    manifest = "".join(f'<item id="c{i}" href="c{i}.xhtml" media-type="application/xhtml+xml"/>'
+                       for i in range(len(chapters)))
+    spine = "".join(f'<itemref idref="c{i}"/>' for i in range(len(chapters)))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as book:
+        book.writestr("mimetype", "application/epub+zip")
+        book.writestr("META-INF/container.xml", CONTAINER)
+        book.writestr("OEBPS/content.opf",
+                      '<package xmlns="http://www.idpf.org/2007/opf" xmlns:dc="http://purl.org/dc/elements/1.1/" '
+                      'version="3.0" unique-identifier="id"><metadata><dc:identifier id="id">bench</dc:identifier>'
+                      '<dc:title>Bench</dc:title><dc:language>en</dc:language></metadata>'
+                      f'<manifest>{manifest}</manifest><spine>{spine}</spine></package>')
+        for i, chapter in enumerate(chapters):
+            body = "".join(f"<p>{paragraph}</p>" for paragraph in chapter)
+            book.writestr(f"OEBPS/c{i}.xhtml", '<html xmlns="http://www.w3.org/1999/xhtml"><head>'
+                          f"<title>{i}</title></head><body><h1>Chapter {i + 1}</h1>{body}</body></html>")
+
+
+WRITERS = {"txt": write_txt, "pdf": write_pdf, "epub": write_epub}
+
+
+class FakeRoot:
+    """Enough of tk.Tk for SmartBookReaderApp, with after() callbacks run by update()."""
+
+    def __init__(self):
+        self.timers = {}
+        self.next_id = 0
+
+    def after(self, ms, callback, *args):
+        self.next_id += 1
+        self.timers[self.next_id] = (time.perf_counter() + ms / 1000, callback, args)
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.timers.pop(after_id, None)
+
+    def update(self):
+        now = time.perf_counter()
+        for after_id, (due, callback, args) in sorted(self.timers.items(), key=lambda item: item[1][0]):
+            if due <= now and self.timers.pop(after_id, None):
+                callback(*args)
+
+    def update_idletasks(self):
+        pass
+
+    def title(self, *args):
+        pass
+
+    def geometry(self, *args):
+        pass
+
+    def protocol(self, *args):
+        pass
+
+    def destroy(self):
+        self.timers.clear()
+
+
+class FakeVar:
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+def mock_widgets(index):
+    """Patch index's Tk modules with mocks; widget calls cost a mock call each."""
+    tk = mock.MagicMock(name="tkinter")
+    tk.IntVar = tk.DoubleVar = FakeVar
+    return mock.patch.multiple(index, tk=tk, scrolledtext=mock.MagicMock(name="scrolledtext"),
+                               ttk=mock.MagicMock(name="ttk"))
+
+
+def start_xvfb():
+    """Start Xvfb on a free display and point DISPLAY at it; returns the process or None."""
+    if not shutil.which("Xvfb"):
+        return None
+    read_fd, write_fd = os.pipe()
+    process = subprocess.Popen(["Xvfb", "-displayfd", str(write_fd), "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               pass_fds=(write_fd,), stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        display = f.readline().strip()
+    if not display:
+        process.kill()
+        return None
+    os.environ["DISPLAY"] = ":" + display
+    return process
+
+
+def choose_widgets(requested):
+    """("tk" or "mock", Xvfb process or None) for --widgets."""
+    import tkinter
+    if requested == "mock":
+        return "mock", None
+
+    def display_works():
+        try:
+            tkinter.Tk().destroy()
+            return True
+        except tkinter.TclError:
+            return False
+
+    if display_works():
+        return "tk", None
+    xvfb = start_xvfb()
+    if xvfb and display_works():
+        return "tk", xvfb
+    if xvfb:
+        xvfb.kill()
+    if requested == "tk":
+        raise BenchmarkError("no display and no working Xvfb")
+    return "mock", None
+
+
+def spread(count, calls=CALLS):
+    """calls indices spread evenly over range(count)."""
+    return [i * count // calls for i in range(calls)] if count > calls else list(range(count))
+
+
+def best_of(function, size):
+    """Seconds for the fastest of REPEATS runs, or of one run on large books."""
+    runs = []
+    for _ in range(REPEATS if size <= REPEAT_UP_TO else 1):
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return min(runs)
+
+
+def per_call(function, arguments, settle):
+    """Median seconds of function(argument) over arguments, each followed by settle()."""
+    times = []
+    for argument in arguments:
+        start = time.perf_counter()
+        function(argument)
+        settle()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+class ReaderBench:
+    """Times SmartBookReaderApp on one book; widgets is "tk" or "mock"."""
+
+    def __init__(self, index, widgets):
+        self.index = index
+        self.widgets = widgets
+
+    def new_app(self):
+        if self.widgets == "tk":
+            root = self.index.tk.Tk()
+            root.withdraw()
+        else:
+            root = FakeRoot()
+        return self.index.SmartBookReaderApp(root)
+
+    def load(self, app, path):
+        app.load_book(path)
+        deadline = time.perf_counter() + LOAD_TIMEOUT
+        while not app.loaded.is_set():
+            if time.perf_counter() > deadline:
+                raise BenchmarkError(f"{path} did not finish loading")
+            app.root.update()
+            time.sleep(0.001)
+        app.root.update_idletasks()
+
+    def run(self, fmt, size, path):
+        metrics = {}
+        app = self.new_app()
+        try:
+            # The first load of each run is cold: the text cache is emptied before it.
+            def cold_load():
+                app.text_cache.invalidate(path)
+                self.load(app, path)
+
+            metrics["load_book"] = best_of(cold_load, size)
+            metrics["load_book_cached"] = best_of(lambda: self.load(app, path), size)
+            count = len(app.sentences)
+            if fmt == "txt" and count != size:
+                raise BenchmarkError(f"{path}: {count} sentences, expected {size}")
+            if fmt == "txt":
+                text = app.book_text
+                metrics["split_into_sentences"] = best_of(lambda: app.split_into_sentences(text), size)
+
+            settle = app.root.update_idletasks
+            # Reading on from the middle of the book, sentence by sentence and word by word.
+            # Sentences go through show_reading_sentence, which turns PDF pages as reading does.
+            middle = count // 2
+            reading = range(middle, min(middle + CALLS, count))
+            app.seek_to_sentence(middle)
+            metrics["highlight_sentence"] = per_call(app.show_reading_sentence, reading, settle)
+            app.highlight_sentence(app.sentences[middle])
+            words = [(middle, i) for i in range(len(app.document.word_offsets(middle)))]
+            metrics["highlight_word"] = per_call(app.highlight_word, words, settle)
+
+            metrics["save_position"] = per_call(lambda i: app.save_position(path, i, 0), spread(count), settle)
+            metrics["load_position_for_book"] = per_call(lambda i: app.load_position_for_book(path),
+                                                         range(CALLS), settle)
+            metrics["seek_to_sentence"] = per_call(app.seek_to_sentence, spread(count), settle)
+            if app.pages:
+                app.jump_to_page(0)
+                pages = len(app.pages)
+                metrics["next_page"] = per_call(lambda i: app.next_page(), range(min(CALLS, pages - 1)), settle)
+                metrics["jump_to_page"] = per_call(app.jump_to_page, spread(pages), settle)
+        finally:
+            app.on_close()
+        return metrics
+
+
+def bench_epub_book(path, size):
+    """The part of EPUBViewer.load_epub that needs no Qt: open the book and read the first chapter."""
+    from epub_book import EpubBook
+
+    def open_book():
+        book = EpubBook(path)
+        try:
+            book.item(book.spine[0])
+        finally:
+            book.close()
+
+    return {"open": best_of(open_book, size)}
+
+
+class ViewerBench:
+    """Times EPUBViewer.load_epub until the first chapter has loaded, and chapter turns."""
+
+    def __init__(self):
+        if not os.environ.get("DISPLAY"):
+            os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        # Chromium's sandbox will not start as root, as in most CI containers; the books are local files.
+        os.environ.setdefault("QTWEBENGINE_DISABLE_SANDBOX", "1")
+        import epub
+        from PyQt5.QtWidgets import QApplication
+        self.epub = epub
+        epub.register_scheme()
+        self.app = QApplication([sys.argv[0]])
+
+    def wait_for_timing(self, viewer, count):
+        deadline = time.perf_counter() + QT_TIMEOUT
+        while len(viewer.load_timings) < count:
+            if time.perf_counter() > deadline:
+                raise BenchmarkError("EPUB chapter did not load")
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def run(self, path, size):
+        with mock.patch.object(self.epub.QFileDialog, "getOpenFileName", return_value=("", "")):
+            viewer = self.epub.EPUBViewer()
+        try:
+            def load():
+                expected = len(viewer.load_timings) + 1
+                with mock.patch.object(self.epub.QFileDialog, "getOpenFileName", return_value=(path, "")):
+                    if viewer.book:
+                        viewer.book.close()
+                    viewer.current_index = 0
+                    viewer.load_epub()
+                self.wait_for_timing(viewer, expected)
+
+            metrics = {"load_epub": best_of(load, size)}
+            turns = []
+            for _ in range(min(10, viewer.page_count() - 1)):
+                expected = len(viewer.load_timings) + 1
+                start = time.perf_counter()
+                viewer.next_page()
+                self.wait_for_timing(viewer, expected)
+                turns.append(time.perf_counter() - start)
+            if turns:
+                metrics["next_chapter"] = statistics.median(turns)
+            return metrics
+        finally:
+            viewer.close()
+
+
+def raise_load_error(title, message):
+    # Stands in for the error dialog, so a book that fails to load fails the run.
+    raise BenchmarkError(message)
+
+
+def run_suite(sizes, formats, widgets, directory):
+    """(metrics, skipped): metrics maps "format.size.name" to seconds."""
+    import index
+    # Silent engine with timed word events, and no microphone or library indexer.
+    index.TTS_BACKEND = "fake"
+    patches = [mock.patch.object(index.SmartBookReaderApp, "speech_control", lambda self: None),
+               mock.patch.object(index.SmartBookReaderApp, "search_indexer", lambda self: None),
+               mock.patch.object(index.messagebox, "showerror", side_effect=raise_load_error)]
+    if widgets == "mock":
+        patches.append(mock_widgets(index))
+    metrics, skipped = {}, {}
+
+    def add(prefix, results):
+        for name, seconds in results.items():
+            metrics[f"{prefix}.{name}"] = seconds
+            print(f"{prefix + '.' + name:<40}{seconds * 1000:12.3f} ms", flush=True)
+
+    for patch in patches:
+        patch.start()
+    try:
+        reader = ReaderBench(index, widgets)
+        viewer = None
+        for fmt in formats:
+            if fmt == "pdf" and importlib.util.find_spec("PyPDF2") is None:
+                skipped["pdf"] = "PyPDF2 is not installed"
+                continue
+            for size in sizes:
+                path = os.path.join(directory, f"book-{size}.{fmt}")
+                start = time.perf_counter()
+                WRITERS[fmt](path, size)
+                print(f"{fmt} {size} sentences: {os.path.getsize(path) / 1e6:.1f} MB "
+                      f"generated in {time.perf_counter() - start:.1f} s", flush=True)
+                prefix = f"{fmt}.{size}"
+                if fmt != "epub":
+                    add(prefix, reader.run(fmt, size, path))
+                    continue
+                add(prefix, bench_epub_book(path, size))
+                if viewer is None and "epub_viewer" not in skipped:
+                    try:
+                        viewer = ViewerBench()
+                    except ImportError as e:
+                        skipped["epub_viewer"] = f"PyQt5 with QtWebEngine is not available ({e})"
+                if viewer is not None:
+                    add(prefix, viewer.run(path, size))
+    finally:
+        for patch in reversed(patches):
+            patch.stop()
+    return metrics, skipped
+
+
+def regressions(metrics, baseline, tolerance=TOLERANCE):
+    """(name, seconds, allowed) for each metric slower than its baseline allows."""
+    slow = []
+    for name, seconds in sorted(metrics.items()):
+        if name in baseline:
+            allowed = baseline[name] * (1 + tolerance) + SLACK_SECONDS
+            if seconds > allowed:
+                slow.append((name, seconds, allowed))
+    return slow
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="book sizes in sentences")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--widgets", choices=("auto", "tk", "mock"), default="auto")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="results JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the baseline")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="fail instead of only reporting timings when there is no baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed slowdown over the baseline, as a fraction")
+    args = parser.parse_args(argv)
+    output, baseline_path = os.path.abspath(args.output), os.path.abspath(args.baseline)
+    if args.require_baseline and not args.save_baseline and not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline_path}; record one with --save-baseline", file=sys.stderr)
+        return 2
+
+    widgets, xvfb = choose_widgets(args.widgets)
+    print(f"widgets: {widgets}{' (Xvfb ' + os.environ['DISPLAY'] + ')' if xvfb else ''}")
+    directory = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        metrics, skipped = run_suite(args.sizes, args.formats, widgets, directory)
+    except BenchmarkError as e:
+        print(f"Benchmark failed: {e}", file=sys.stderr)
+        return 2
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory, ignore_errors=True)
+        if xvfb:
+            xvfb.kill()
+    for name, reason in skipped.items():
+        print(f"skipped {name}: {reason}")
+
+    results = {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+               "python": platform.python_version(), "platform": platform.platform(),
+               "widgets": widgets, "metrics": metrics, "skipped": skipped}
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    if args.save_baseline:
+        shutil.copyfile(output, baseline_path)
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline_path}; record one with --save-baseline")
+        return 0
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline.get("widgets") != widgets:
+        print(f"Baseline was recorded with {baseline.get('widgets')} widgets, this run used {widgets}")
+    slow = regressions(metrics, baseline["metrics"], args.tolerance)
+    for name, seconds, allowed in slow:
+        print(f"REGRESSION {name}: {seconds * 1000:.3f} ms, allowed {allowed * 1000:.3f} ms", file=sys.stderr)
+    if slow:
+        return 1
+    print(f"{len([name for name in metrics if name in baseline['metrics']])} metrics within {args.tolerance:.0%} "
+          "of the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Rendering throughput of each TTS backend in tts_backends.
+
+Run with: python benchmarks/bench_tts_backends.py [sentences]
+Each backend renders the same sentences to WAV through save_to_file and
+runAndWait, the path PreSynthesizer and the audiobook export use. The
+report gives sentences/s and the real-time factor (seconds of audio per
+second of wall time). When the espeak-ng binary is on PATH, one process
+spawned per sentence is timed as a baseline for the warm worker pool.
+Backends that cannot start here (no driver, no library) are reported and
+skipped.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tts_backends import BACKENDS
+
+SENTENCES = 200
+SENTENCE = ("The boats were still tied up along the harbour wall when the keeper came down "
+            "with his lamp, and nobody had gone out.")
+
+
+def audio_seconds(paths):
+    total = 0.0
+    for path in paths:
+        with wave.open(path, "rb") as wav:
+            total += wav.getnframes() / wav.getframerate()
+    return total
+
+
+def render(engine, directory, count):
+    paths = [os.path.join(directory, f"{i}.wav") for i in range(count)]
+    for i, path in enumerate(paths):
+        engine.save_to_file(f"{SENTENCE} ({i})", path)
+    engine.runAndWait()
+    return paths
+
+
+def spawn_per_sentence(directory, count):
+    paths = [os.path.join(directory, f"spawn-{i}.wav") for i in range(count)]
+    for i, path in enumerate(paths):
+        subprocess.run(["espeak-ng", "-w", path, f"{SENTENCE} ({i})"], check=True)
+    return paths
+
+
+def report(name, count, elapsed, paths):
+    print(f"{name:>24}: {count / elapsed:8.1f} sentences/s  real-time factor {audio_seconds(paths) / elapsed:6.1f}x")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else SENTENCES
+    print(f"{count} sentences of {len(SENTENCE.split())} words")
+    directory = tempfile.mkdtemp()
+    try:
+        for name, factory in BACKENDS.items():
+            start = time.perf_counter()
+            try:
+                engine = factory()
+            except Exception as e:
+                print(f"{name:>24}: unavailable ({e})")
+                continue
+            startup = time.perf_counter() - start
+            try:
+                render(engine, directory, 2)  # warm up
+                start = time.perf_counter()
+                paths = render(engine, directory, count)
+                report(f"{name} ({startup * 1000:.0f} ms start)", count, time.perf_counter() - start, paths)
+            finally:
+                if hasattr(engine, "close"):
+                    engine.close()
+        if shutil.which("espeak-ng"):
+            start = time.perf_counter()
+            paths = spawn_per_sentence(directory, count)
+            report("espeak-ng spawn per call", count, time.perf_counter() - start, paths)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
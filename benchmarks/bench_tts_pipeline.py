@@ -0,0 +1,58 @@
+"""Wall-clock overhead per 1,000 words: per-word say/runAndWait vs. SpeechPipeline.
+
+Run with: python benchmarks/bench_tts_pipeline.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stub_engine import StubEngine
+from tts_pipeline import SpeechPipeline
+
+WORDS = 1000
+WORDS_PER_SENTENCE = 15
+
+
+def make_sentences(words):
+    sentences = []
+    for start in range(0, words, WORDS_PER_SENTENCE):
+        count = min(WORDS_PER_SENTENCE, words - start)
+        sentences.append(" ".join(f"word{start + i}" for i in range(count)) + ".")
+    return sentences
+
+
+def per_word_loop(engine, sentences):
+    # The loop read_sentences used before the pipeline: one runAndWait per word.
+    for sentence in sentences:
+        for word in sentence.split():
+            engine.say(word)
+            engine.runAndWait()
+
+
+def pipeline_loop(engine, sentences):
+    SpeechPipeline(engine, sentences).run(0, 0, threading.Event())
+
+
+def measure(loop, loop_startup):
+    engine = StubEngine(loop_startup=loop_startup)
+    sentences = make_sentences(WORDS)
+    start = time.perf_counter()
+    loop(engine, sentences)
+    elapsed = time.perf_counter() - start
+    assert engine.words_spoken == WORDS
+    return elapsed * 1000 * 1000 / WORDS
+
+
+def main():
+    print(f"{'loop startup':>14} {'per-word loop':>16} {'pipeline':>12} {'speedup':>9}")
+    for loop_startup in (0.0, 0.001, 0.005):
+        old = measure(per_word_loop, loop_startup)
+        new = measure(pipeline_loop, loop_startup)
+        print(f"{loop_startup * 1000:>11.1f} ms {old:>10.1f} ms/kw {new:>6.1f} ms/kw {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
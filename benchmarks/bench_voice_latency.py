@@ -0,0 +1,50 @@
+"""End-of-utterance to action latency for recorded voice commands.
+
+Run with: python benchmarks/bench_voice_latency.py [--google] command1.wav [command2.wav ...]
+Each WAV should hold one spoken command ("pause", "increase speed", ...).
+Actions are dispatched through a Tk event loop exactly as in the app, so the
+numbers include recognition plus the root.after hop.
+"""
+import os
+import sys
+import tkinter as tk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import speech_recognition as sr
+
+from voice_control import RECOGNIZERS, VoiceController
+
+
+def main():
+    args = sys.argv[1:]
+    backend = "offline"
+    if args and args[0] == "--google":
+        backend = "google"
+        args = args[1:]
+    root = tk.Tk()
+    root.withdraw()
+    recognizer = sr.Recognizer()
+    controller = None
+
+    def dispatch(command, utterance_end):
+        root.after(0, lambda: (print(f"  -> {command}"), controller.action_done(utterance_end)))
+
+    controller = VoiceController(recognizer, dispatch, RECOGNIZERS[backend](recognizer))
+    for path in args:
+        print(path)
+        try:
+            if controller.handle_file(path) is None:
+                print("  no command recognized")
+        except sr.UnknownValueError:
+            print("  no speech recognized")
+        root.update()
+    summary = controller.latency_summary()
+    if summary:
+        print(f"{backend}: {summary['count']} commands, median {summary['median_ms']:.0f} ms, "
+              f"p95 {summary['p95_ms']:.0f} ms, max {summary['max_ms']:.0f} ms")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import re
+import time
+
+WORD_PATTERN = re.compile(r'\S+')
+
+
+class StubEngine:
+    """Stand-in for a pyttsx3 engine that costs `loop_startup` seconds per loop spin-up.
+
+    Word events for an utterance are delivered on the next iterate()/runAndWait(),
+    so timings measure driver overhead only, not speech duration.
+    """
+
+    def __init__(self, loop_startup=0.002):
+        self.loop_startup = loop_startup
+        self.properties = {'rate': 150, 'volume': 1.0, 'voice': 'stub'}
+        self.callbacks = {}
+        self.pending = []
+        self.words_spoken = 0
+
+    def connect(self, topic, cb):
+        self.callbacks.setdefault(topic, []).append(cb)
+        return {'topic': topic, 'cb': cb}
+
+    def disconnect(self, token):
+        self.callbacks[token['topic']].remove(token['cb'])
+
+    def getProperty(self, name):
+        return self.properties[name]
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def say(self, text, name=None):
+        self.pending.append((text, name))
+
+    def stop(self):
+        self.pending.clear()
+
+    def runAndWait(self):
+        time.sleep(self.loop_startup)
+        self._drain()
+
+    def startLoop(self, useDriverLoop=True):
+        time.sleep(self.loop_startup)
+
+    def iterate(self):
+        self._drain()
+
+    def endLoop(self):
+        pass
+
+    def _notify(self, topic, **kwargs):
+        for cb in list(self.callbacks.get(topic, [])):
+            cb(**kwargs)
+
+    def _drain(self):
+        while self.pending:
+            text, name = self.pending.pop(0)
+            self._notify('started-utterance', name=name)
+            for match in WORD_PATTERN.finditer(text):
+                self.words_spoken += 1
+                self._notify('started-word', name=name, location=match.start(), length=len(match.group()))
+            self._notify('finished-utterance', name=name, completed=True)
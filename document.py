@@ -0,0 +1,155 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+
+import tracing
+from segmenter import WORD_PATTERN, Segmenter
+
+OFFSET_TYPE = "I"
+
+
+class Sentence(str):
+    """A sentence that remembers its [start, end) character range in the book text."""
+
+    def __new__(cls, text, start, end):
+        sentence = super().__new__(cls, text)
+        sentence.start = start
+        sentence.end = end
+        return sentence
+
+
+class Document:
+    """A book's text held once, with page and sentence boundaries as offset arrays.
+
+    While a PDF is still loading the text lives in its page strings and each
+    page is segmented as it is added; once finish_pages() joins them the page
+    strings are dropped. Sentence and page strings are only built when they
+    are indexed.
+    """
+
+    def __init__(self, text=None):
+        self.text = text
+        self.page_texts = []
+        self.page_offsets = array(OFFSET_TYPE)
+        self.sentence_starts = array(OFFSET_TYPE)
+        self.sentence_ends = array(OFFSET_TYPE)
+        self.segmenter = Segmenter(OFFSET_TYPE)
+        self.sentences = SentenceView(self)
+        self.pages = PageView(self)
+
+    def __len__(self):
+        if self.text is not None:
+            return len(self.text)
+        if not self.page_texts:
+            return 0
+        return self.page_offsets[-1] + len(self.page_texts[-1])
+
+    def add_page(self, page):
+        self.add_pages([page])
+
+    def add_pages(self, pages):
+        """Add pages that continue the book, segmenting them in one pass."""
+        if not pages:
+            return
+        offset = len(self) + 1 if self.page_texts else 0
+        for page in pages:
+            self.page_offsets.append(offset)
+            offset += len(page) + 1
+        text = "\n".join(pages)
+        self.feed("\n" + text if self.page_texts else text)
+        self.page_texts.extend(pages)
+
+    def finish_pages(self):
+        self.close()
+        self.text = "\n".join(self.page_texts)
+        self.page_texts = []
+
+    def slice(self, start, end):
+        if self.text is not None:
+            return self.text[start:end]
+        page = bisect_right(self.page_offsets, start) - 1
+        page_start = self.page_offsets[page]
+        if page + 1 == len(self.page_offsets) or end <= self.page_offsets[page + 1]:
+            return self.page_texts[page][start - page_start:end - page_start]
+        return "\n".join(self.page_texts[page:bisect_right(self.page_offsets, end)])[start - page_start:end - page_start]
+
+    def feed(self, text):
+        """Segment text that continues the book; the last sentence stays open."""
+        with tracing.span("document.segment", chars=len(text)):
+            self._add_sentences(*self.segmenter.feed(text))
+
+    def close(self):
+        self._add_sentences(*self.segmenter.close())
+
+    def segment(self, text):
+        self.feed(text)
+        self.close()
+
+    def _add_sentences(self, starts, ends):
+        self.sentence_starts.extend(starts)
+        self.sentence_ends.extend(ends)
+
+    def word_offsets(self, sentence_idx):
+        """Start offsets of a sentence's words, relative to the sentence start.
+
+        Only the sentence being read or highlighted needs them, so they are
+        found when asked for rather than stored for the whole book.
+        """
+        return [match.start() for match in WORD_PATTERN.finditer(self.sentences[sentence_idx])]
+
+    # Seeks: pages, sentences and words are all sorted offset arrays, so each
+    # lookup is a bisect over them.
+
+    def sentence_at(self, offset):
+        """The sentence containing a text offset, or the next one if it falls between sentences."""
+        idx = bisect_right(self.sentence_starts, offset) - 1
+        if idx < 0 or offset >= self.sentence_ends[idx]:
+            idx += 1
+        return min(idx, len(self.sentence_starts) - 1)
+
+    def sentence_at_fraction(self, fraction):
+        return self.sentence_at(int(min(max(fraction, 0.0), 1.0) * len(self)))
+
+    def page_of_sentence(self, sentence_idx):
+        return max(bisect_right(self.page_offsets, self.sentence_starts[sentence_idx]) - 1, 0)
+
+    def page_sentences(self, page):
+        """range of the sentences that start on a page."""
+        first = bisect_left(self.sentence_starts, self.page_offsets[page])
+        last = bisect_left(self.sentence_starts, self.page_offsets[page + 1]) if page + 1 < len(self.page_offsets) \
+            else len(self.sentence_starts)
+        return range(first, last)
+
+
+class SentenceView(Sequence):
+    def __init__(self, document):
+        self.document = document
+
+    def __len__(self):
+        return len(self.document.sentence_starts)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        start = self.document.sentence_starts[idx]
+        end = self.document.sentence_ends[idx]
+        return Sentence(self.document.slice(start, end), start, end)
+
+
+class PageView(Sequence):
+    def __init__(self, document):
+        self.document = document
+
+    def __len__(self):
+        return len(self.document.page_offsets)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        document = self.document
+        if document.page_texts:
+            return document.page_texts[idx]
+        offsets = document.page_offsets
+        idx = range(len(offsets))[idx]
+        end = offsets[idx + 1] - 1 if idx + 1 < len(offsets) else len(document.text)
+        return document.text[offsets[idx]:end]
@@ -1,27 +1,137 @@
+import json
 import sys
+import time
 import webbrowser
+import zipfile
+import zlib
+from collections import deque
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QFileDialog,
     QPushButton, QHBoxLayout, QVBoxLayout, QWidget
 )
-from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage
-from PyQt5.QtCore import QUrl
-from ebooklib import epub
-from bs4 import BeautifulSoup
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineProfile, QWebEngineScript
+from PyQt5.QtWebEngineCore import QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QTimer, QUrl
+from epub_book import EpubBook
+import tracing
+
+EMPTY_BOOK = "<body><p>No readable pages found.</p></body>"
+SCHEME = b"epub"
+HOST = "book"
+# Chapters kept loaded in hidden pages on each side of the current one
+RENDER_AHEAD = 1
+LOAD_TIMING_SAMPLES = 100
+
+READER_CSS = """
+body {
+    font-family: 'Georgia', serif;
+    line-height: 1.6;
+    padding: 40px;
+    font-size: 18px;
+    background-color: #fefefe;
+    color: #333;
+    max-width: 800px;
+    margin: auto;
+}
+img {
+    max-width: 100%;
+    height: auto;
+}
+a {
+    color: #0645AD;
+    text-decoration: underline;
+    cursor: pointer;
+}
+"""
+
+# Runs in every chapter once its DOM is ready; registered once on the profile.
+READER_SCRIPT = """
+(function() {
+    var style = document.createElement('style');
+    style.textContent = %s;
+    (document.head || document.documentElement).appendChild(style);
+    document.querySelectorAll('a').forEach(function(link) {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            window.location.href = link.href;
+        });
+    });
+})();
+"""
+
+
+def register_scheme():
+    """Must run before the QApplication is created."""
+    scheme = QWebEngineUrlScheme(SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+def book_url(path):
+    url = QUrl()
+    url.setScheme(SCHEME.decode())
+    url.setHost(HOST)
+    url.setPath("/" + path)
+    return url
+
+
+class EpubSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Answers epub://book/<path in zip> with the item's bytes from the open book."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.book = None
+
+    def requestStarted(self, job):
+        item_id = self.book.ids_by_path.get(job.requestUrl().path().lstrip("/")) if self.book else None
+        if item_id is None:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        try:
+            with tracing.span("epub.scheme_request", item=item_id):
+                data, media_type = self.book.item(item_id)
+        except KeyError:
+            # Listed in the manifest but missing from the archive
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        except (zipfile.BadZipFile, zlib.error, OSError) as e:
+            print(f"Could not read {item_id}: {e}")
+            job.fail(QWebEngineUrlRequestJob.RequestFailed)
+            return
+        # The job owns the buffer, so it lives exactly as long as the request.
+        buffer = QBuffer(job)
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.ReadOnly)
+        job.reply(media_type.encode(), buffer)
 
 
 class CustomWebPage(QWebEnginePage):
+    def __init__(self, viewer, profile, parent=None):
+        super().__init__(profile, parent)
+        self.viewer = viewer
+        self.chapter_index = None
+        self.loaded = False
+        self.loadStarted.connect(self.on_load_started)
+        self.loadFinished.connect(self.on_load_finished)
+
     def acceptNavigationRequest(self, url, _type, isMainFrame):
-        url_str = url.toString()
-        if url_str.startswith("http"):
-            webbrowser.open(url_str)  # Open external links in default browser
-            return False
-        elif "#" in url_str:
-            anchor = url_str.split("#")[-1]
-            self.parent().scroll_to_anchor(anchor)
+        if url.scheme() in ("http", "https"):
+            webbrowser.open(url.toString())  # Open external links in default browser
             return False
+        if url.scheme() == SCHEME.decode() and isMainFrame and _type == QWebEnginePage.NavigationTypeLinkClicked:
+            # Links between chapters move the viewer's position too.
+            self.viewer.follow_link(self, url)
         return True
 
+    def on_load_started(self):
+        self.loaded = False
+
+    def on_load_finished(self, ok):
+        # ok is False when a reused page's previous load is cut short.
+        self.loaded = ok
+        self.viewer.page_loaded(self)
+
 
 class EPUBViewer(QMainWindow):
     def __init__(self):
@@ -29,8 +139,18 @@ class EPUBViewer(QMainWindow):
         self.setWindowTitle("EPUB Viewer")
         self.setGeometry(100, 100, 1000, 700)
 
+        self.profile = QWebEngineProfile.defaultProfile()
+        self.scheme_handler = EpubSchemeHandler(self)
+        self.profile.installUrlSchemeHandler(SCHEME, self.scheme_handler)
+        self.install_reader_script()
+
         self.browser = QWebEngineView()
-        self.browser.setPage(CustomWebPage(self.browser))
+        # Hidden pages for the chapters around the current one, by spine index.
+        # At most 2 * RENDER_AHEAD + 1 pages exist; pages that fall out of
+        # range are reused for the next chapter to pre-load.
+        self.pages = {}
+        self.spare_pages = [CustomWebPage(self, self.profile, self)]
+        self.browser.setPage(self.spare_pages[0])
         self.next_button = QPushButton("Next")
         self.prev_button = QPushButton("Previous")
         self.next_button.clicked.connect(self.next_page)
@@ -49,76 +169,102 @@ class EPUBViewer(QMainWindow):
         self.setCentralWidget(container)
 
         self.current_index = 0
-        self.pages = []
+        self.book = None
+
+        # Navigation-to-load-finished times as (chapter, seconds, preloaded);
+        # on_load_timing, if set, is called with each one as it is recorded.
+        self.navigation_started = None
+        self.load_timings = deque(maxlen=LOAD_TIMING_SAMPLES)
+        self.on_load_timing = None
+        tracing.watch_event_loop(QTimer.singleShot, "qt.loop_lag")
 
         self.load_epub()
 
+    def install_reader_script(self):
+        script = QWebEngineScript()
+        script.setName("reader")
+        script.setInjectionPoint(QWebEngineScript.DocumentReady)
+        script.setWorldId(QWebEngineScript.MainWorld)
+        script.setRunsOnSubFrames(False)
+        script.setSourceCode(READER_SCRIPT % json.dumps(READER_CSS))
+        self.profile.scripts().insert(script)
+
     def load_epub(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Open EPUB File", "", "EPUB Files (*.epub)")
         if not file_path:
             return
 
-        book = epub.read_epub(file_path)
+        # Only the spine is read here; the scheme handler reads items on request.
+        with tracing.span("epub.open"):
+            self.book = EpubBook(file_path)
+        self.scheme_handler.book = self.book
+        self.spare_pages.extend(self.pages.values())
+        self.pages = {}
+        self.display_page()
 
-        # Load content from the spine (in reading order)
-        for item in book.spine:
-            idref = item[0]
-            doc = book.get_item_with_id(idref)
-            if doc:
-                soup = BeautifulSoup(doc.get_content(), 'html.parser')
-                body = soup.body
-                if body:
-                    self.pages.append(str(body))
+    def page_count(self):
+        return len(self.book) if self.book else 0
 
-        if not self.pages:
-            self.pages = ["<body><p>No readable pages found.</p></body>"]
+    def display_page(self):
+        if not self.page_count():
+            self.browser.setHtml(EMPTY_BOOK)
+            return
+        self.navigation_started = time.perf_counter()
+        page = self.pages.get(self.current_index) or self.load_chapter(self.current_index)
+        if self.browser.page() is not page:
+            self.browser.setPage(page)
+        if page.loaded:
+            self.record_load_time(preloaded=True)
+        self.render_ahead()
+        self.book.prefetch_around(self.current_index)
 
-        self.display_page()
+    def load_chapter(self, idx):
+        page = self.spare_pages.pop() if self.spare_pages else CustomWebPage(self, self.profile, self)
+        page.chapter_index = idx
+        page.loaded = False
+        self.pages[idx] = page
+        page.setUrl(book_url(self.book.chapter_path(idx)))
+        return page
 
-    def display_page(self):
-        content = f"""
-        <html>
-            <head>
-                <meta charset="utf-8">
-                <style>
-                    body {{
-                        font-family: 'Georgia', serif;
-                        line-height: 1.6;
-                        padding: 40px;
-                        font-size: 18px;
-                        background-color: #fefefe;
-                        color: #333;
-                        max-width: 800px;
-                        margin: auto;
-                    }}
-                    img {{
-                        max-width: 100%;
-                        height: auto;
-                    }}
-                    a {{
-                        color: #0645AD;
-                        text-decoration: underline;
-                        cursor: pointer;
-                    }}
-                </style>
-                <script>
-                    document.addEventListener('DOMContentLoaded', function() {{
-                        document.querySelectorAll('a').forEach(function(link) {{
-                            link.addEventListener('click', function(e) {{
-                                e.preventDefault();
-                                window.location.href = link.getAttribute('href');
-                            }});
-                        }});
-                    }});
-                </script>
-            </head>
-            {self.pages[self.current_index]}
-        </html>
-        """
-        self.browser.setHtml(content, QUrl(""))
+    def render_ahead(self):
+        wanted = range(max(self.current_index - RENDER_AHEAD, 0),
+                       min(self.current_index + RENDER_AHEAD + 1, self.page_count()))
+        for idx in [idx for idx in self.pages if idx not in wanted]:
+            self.spare_pages.append(self.pages.pop(idx))
+        for idx in wanted:
+            if idx not in self.pages:
+                self.load_chapter(idx)
+
+    def page_loaded(self, page):
+        if page is self.browser.page() and self.navigation_started is not None:
+            self.record_load_time(preloaded=False)
+
+    def record_load_time(self, preloaded):
+        timing = (self.current_index, time.perf_counter() - self.navigation_started, preloaded)
+        tracing.record("epub.chapter_load", self.navigation_started, timing[1], chapter=timing[0], preloaded=preloaded)
+        self.navigation_started = None
+        self.load_timings.append(timing)
+        if self.on_load_timing:
+            self.on_load_timing(*timing)
+
+    def follow_link(self, page, url):
+        idx = self.book.spine_index(url.path().lstrip("/")) if self.book else None
+        if idx is None or idx == page.chapter_index:
+            return
+        # The page now shows another chapter; any page pre-loaded for that chapter is spare.
+        self.pages.pop(page.chapter_index, None)
+        if idx in self.pages:
+            self.spare_pages.append(self.pages.pop(idx))
+        page.chapter_index = idx
+        self.pages[idx] = page
+        if page is self.browser.page():
+            self.current_index = idx
+            self.navigation_started = time.perf_counter()
+            self.render_ahead()
+            self.book.prefetch_around(idx)
 
     def next_page(self):
-        if self.current_index < len(self.pages) - 1:
+        if self.current_index < self.page_count() - 1:
             self.current_index += 1
             self.display_page()
 
@@ -127,16 +273,16 @@ class EPUBViewer(QMainWindow):
             self.current_index -= 1
             self.display_page()
 
-    def scroll_to_anchor(self, anchor):
-        js = f"""
-            var el = document.getElementById("{anchor}");
-            if (el) el.scrollIntoView({{ behavior: 'smooth' }});
-        """
-        self.browser.page().runJavaScript(js)
+    def closeEvent(self, event):
+        if self.book:
+            self.book.close()
+        super().closeEvent(event)
 
 
 # Run the app
 if __name__ == "__main__":
+    sys.argv[1:] = tracing.enable_from_args(sys.argv[1:])
+    register_scheme()
     app = QApplication(sys.argv)
     viewer = EPUBViewer()
     viewer.show()
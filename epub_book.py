@@ -0,0 +1,160 @@
+import importlib.util
+import posixpath
+import threading
+import zipfile
+import zlib
+from collections import OrderedDict
+from urllib.parse import unquote
+from xml.etree import ElementTree
+
+from bs4 import BeautifulSoup
+
+import tracing
+
+CONTAINER_PATH = "META-INF/container.xml"
+CONTAINER_NS = "{urn:oasis:names:tc:opendocument:xmlns:container}"
+OPF_NS = "{http://www.idpf.org/2007/opf}"
+EMPTY_BODY = "<body></body>"
+
+
+def fastest_parser():
+    """lxml parses chapters several times faster than the pure-Python html.parser."""
+    return "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+
+PARSER = fastest_parser()
+
+
+class EpubBook:
+    """An EPUB opened lazily: only the container and package files are read up front.
+
+    Item bytes (chapters, images, stylesheets, fonts) are read from the zip
+    when first asked for and kept in an LRU cache keyed by manifest id and
+    bounded by cache_bytes. After each chapter is opened, the chapters
+    within prefetch of it are read on a background thread, so turning the
+    page is usually a cache hit.
+    """
+
+    def __init__(self, file_path, cache_bytes=32 * 1024 * 1024, prefetch=1):
+        self.zip = zipfile.ZipFile(file_path)
+        self.zip_lock = threading.Lock()
+        self.cache_bytes = cache_bytes
+        self.prefetch = prefetch
+        self.items = {}
+        self.ids_by_path = {}
+        self.spine = []
+        self._read_package()
+
+        self.cache = OrderedDict()
+        self.cached_bytes = 0
+        self.loading = set()
+        self.wanted = []
+        self.closed = False
+        self.condition = threading.Condition()
+        self.worker = threading.Thread(target=self._prefetch, daemon=True)
+        self.worker.start()
+
+    def _read_package(self):
+        container = ElementTree.fromstring(self.read(CONTAINER_PATH))
+        opf_path = container.find(f".//{CONTAINER_NS}rootfile").get("full-path")
+        opf_dir = posixpath.dirname(opf_path)
+        package = ElementTree.fromstring(self.read(opf_path))
+        for item in package.iter(f"{OPF_NS}item"):
+            path = posixpath.normpath(posixpath.join(opf_dir, unquote(item.get("href"))))
+            self.items[item.get("id")] = (path, item.get("media-type"))
+            self.ids_by_path[path] = item.get("id")
+        # Reading order
+        self.spine = [ref.get("idref") for ref in package.iter(f"{OPF_NS}itemref")
+                      if ref.get("idref") in self.items]
+
+    def __len__(self):
+        return len(self.spine)
+
+    def read(self, path):
+        with self.zip_lock:
+            return self.zip.read(path)
+
+    def chapter_path(self, idx):
+        return self.items[self.spine[idx]][0]
+
+    def spine_index(self, path):
+        """Spine position of the chapter stored at path, or None."""
+        item_id = self.ids_by_path.get(path)
+        return self.spine.index(item_id) if item_id in self.spine else None
+
+    def item(self, item_id):
+        """(bytes, media type) of a manifest item."""
+        with self.condition:
+            # A prefetch of this item may already be under way.
+            while item_id in self.loading:
+                self.condition.wait()
+            data = self.cache.get(item_id)
+            if data is not None:
+                self.cache.move_to_end(item_id)
+            else:
+                self.loading.add(item_id)
+        if data is None:
+            data = self._load(item_id)
+        return data, self.items[item_id][1]
+
+    def chapter(self, idx):
+        """The <body> of spine item idx as an HTML string, for text extraction."""
+        data, _ = self.item(self.spine[idx])
+        self.prefetch_around(idx)
+        with tracing.span("epub.parse_chapter", chapter=idx):
+            body = BeautifulSoup(data, PARSER).body
+            return str(body) if body else EMPTY_BODY
+
+    def chapter_text(self, idx):
+        """Plain text of spine item idx, with each block of text on its own line."""
+        data, _ = self.item(self.spine[idx])
+        with tracing.span("epub.parse_chapter", chapter=idx):
+            body = BeautifulSoup(data, PARSER).body
+            return body.get_text("\n") if body else ""
+
+    def prefetch_around(self, idx):
+        with self.condition:
+            self.wanted = [self.spine[i] for offset in range(1, self.prefetch + 1)
+                           for i in (idx + offset, idx - offset) if 0 <= i < len(self.spine)]
+            self.condition.notify_all()
+
+    def _load(self, item_id):
+        data = None
+        try:
+            with tracing.span("epub.read_item", item=item_id):
+                data = self.read(self.items[item_id][0])
+            return data
+        finally:
+            with self.condition:
+                self.loading.discard(item_id)
+                if data is not None and len(data) <= self.cache_bytes:
+                    self.cache[item_id] = data
+                    self.cached_bytes += len(data)
+                    while self.cached_bytes > self.cache_bytes:
+                        _, evicted = self.cache.popitem(last=False)
+                        self.cached_bytes -= len(evicted)
+                self.condition.notify_all()
+
+    def _prefetch(self):
+        while True:
+            with self.condition:
+                while not self.wanted and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                item_id = self.wanted.pop(0)
+                if item_id in self.cache or item_id in self.loading:
+                    continue
+                self.loading.add(item_id)
+            try:
+                self._load(item_id)
+            except (KeyError, zipfile.BadZipFile, zlib.error, OSError) as e:
+                print(f"Could not prefetch {item_id}: {e}")
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.worker.join()
+        with self.zip_lock:
+            self.zip.close()
@@ -0,0 +1,115 @@
+"""Long-lived eSpeak NG synthesis worker, driven by EspeakEngine over a pipe.
+
+Run by tts_backends; not meant to be started by hand. The worker loads
+libespeak-ng once and then serves requests for as long as its stdin is
+open, so a sentence costs no process spawn or voice load.
+
+Requests are JSON lines {"text", "rate", "volume", "voice"} on stdin.
+Replies are frames on stdout, each a kind byte and a little-endian
+uint32 payload length:
+
+    R  sample rate (uint32), sent once at start-up
+    A  a chunk of 16-bit mono PCM, sent as soon as it is synthesized
+    W  JSON {"location", "length", "sample"} for a word starting at that sample
+    E  end of the current request
+    X  an error message; the worker exits after sending it at start-up
+"""
+import ctypes
+import ctypes.util
+import json
+import struct
+import sys
+
+HEADER = struct.Struct("<cI")
+
+# speak_lib.h
+AUDIO_OUTPUT_SYNCHRONOUS = 2
+POS_CHARACTER = 1
+CHARS_UTF8 = 1
+PARAMETER_RATE = 1
+PARAMETER_VOLUME = 2
+EVENT_LIST_TERMINATED = 0
+EVENT_WORD = 1
+
+
+class EspeakEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_int), ("unique_identifier", ctypes.c_uint), ("text_position", ctypes.c_int),
+                ("length", ctypes.c_int), ("audio_position", ctypes.c_int), ("sample", ctypes.c_int),
+                ("user_data", ctypes.c_void_p), ("id", ctypes.c_char * 8)]
+
+
+SYNTH_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int,
+                                  ctypes.POINTER(EspeakEvent))
+
+
+class EspeakSynth:
+    """libespeak-ng in synchronous mode: audio and word events arrive through one callback."""
+
+    def __init__(self):
+        name = ctypes.util.find_library("espeak-ng") or "libespeak-ng.so.1"
+        self.lib = ctypes.cdll.LoadLibrary(name)
+        self.sample_rate = self.lib.espeak_Initialize(AUDIO_OUTPUT_SYNCHRONOUS, 0, None, 0)
+        if self.sample_rate <= 0:
+            raise OSError("espeak_Initialize failed")
+        # Keep a reference: ctypes callbacks are freed with their Python object.
+        self.callback = SYNTH_CALLBACK(self._on_synth)
+        self.lib.espeak_SetSynthCallback(self.callback)
+        self.voice = None
+        self.on_audio = self.on_word = None
+
+    def synthesize(self, text, rate, volume, voice, on_audio, on_word):
+        if voice and voice != self.voice:
+            self.lib.espeak_SetVoiceByName(voice.encode("utf-8"))
+            self.voice = voice
+        self.lib.espeak_SetParameter(PARAMETER_RATE, int(rate), 0)
+        self.lib.espeak_SetParameter(PARAMETER_VOLUME, int(round(volume * 100)), 0)
+        self.on_audio, self.on_word = on_audio, on_word
+        data = text.encode("utf-8")
+        self.lib.espeak_Synth(data, len(data) + 1, 0, POS_CHARACTER, 0, CHARS_UTF8, None, None)
+
+    def _on_synth(self, wav, samples, events):
+        if samples > 0:
+            self.on_audio(ctypes.string_at(wav, samples * 2))
+        i = 0
+        while events[i].type != EVENT_LIST_TERMINATED:
+            event = events[i]
+            if event.type == EVENT_WORD:
+                # text_position counts characters from 1; audio_position is in ms.
+                self.on_word(event.text_position - 1, event.length,
+                             event.audio_position * self.sample_rate // 1000)
+            i += 1
+        return 0
+
+
+def write_frame(out, kind, payload=b""):
+    out.write(HEADER.pack(kind, len(payload)) + payload)
+
+
+def serve(synth_factory=EspeakSynth, stdin=None, stdout=None):
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    try:
+        synth = synth_factory()
+    except Exception as e:
+        write_frame(stdout, b"X", str(e).encode("utf-8"))
+        stdout.flush()
+        return
+    write_frame(stdout, b"R", struct.pack("<I", synth.sample_rate))
+    stdout.flush()
+
+    def on_audio(pcm):
+        write_frame(stdout, b"A", pcm)
+        stdout.flush()
+
+    def on_word(location, length, sample):
+        write_frame(stdout, b"W", json.dumps({"location": location, "length": length, "sample": sample}).encode())
+
+    for line in stdin:
+        request = json.loads(line)
+        synth.synthesize(request["text"], request["rate"], request["volume"], request["voice"], on_audio, on_word)
+        write_frame(stdout, b"E")
+        stdout.flush()
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,15 +1,52 @@
 import tkinter as tk
 from tkinter import filedialog, scrolledtext, ttk, messagebox
-import pyttsx3
-import threading
-import json
-from PyPDF2 import PdfReader
 import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
 import re
-import speech_recognition as sr
-import pyaudio
+from bisect import bisect_right
+# pyttsx3, speech_recognition, pyaudio and PyPDF2 are imported where they are
+# first used, off the startup path; see benchmarks/bench_startup.py.
+from tts_pipeline import SpeechPipeline, CachedSpeechPipeline
+from tts_actor import SpeechActor
+from tts_backends import PYTTSX3_RENDER_PLATFORMS, BackendError, create_engine, create_render_engine
+from ui_scheduler import UiScheduler
+from audio_cache import AudioCache, AudioCacheError, PreSynthesizer, WavPlayer, content_hash
+from position_store import PositionStore, file_fingerprint
+from text_cache import TextCache
+from document import Document
+from voice_control import VoiceController, RECOGNIZERS
+from search_index import SearchIndex
+import tracing
 
 SAVE_FILE = "last_read_position.json"
+POSITION_DB = "reading_positions.db"
+SEARCH_DB = "search_index.db"
+SEARCH_RESULTS = 200
+NEWLINES = re.compile(r'\n')
+LOAD_POLL_MS = 50
+WINDOW_CHARS = 200_000
+# Characters of TXT text segmented per event-loop turn while a book loads
+SEGMENT_CHARS = 256 * 1024
+AUDIO_CACHE_DIR = "audio_cache"
+AUDIO_CACHE_BYTES = 500 * 1024 * 1024
+TEXT_CACHE_DIR = "text_cache"
+TEXT_CACHE_BYTES = 200 * 1024 * 1024
+# "offline" spots the command keywords locally; "google" sends audio to the web API
+VOICE_RECOGNIZER = "offline"
+# "pyttsx3" uses the platform speech driver, "espeak" a pool of warm eSpeak NG
+# processes and "fake" a silent engine with timed word events. Elsewhere than
+# Windows and macOS pyttsx3 speaks a sentence at a time through the single
+# in-process eSpeak and cannot pre-render, so the pool is the default there.
+TTS_BACKEND = "pyttsx3" if sys.platform in PYTTSX3_RENDER_PLATFORMS else "espeak"
+# Voice control and library indexing start this long after the window is shown.
+BACKGROUND_START_MS = 500
+# Seconds to wait at exit for the speech thread to stop and report its position
+SHUTDOWN_TIMEOUT = 2.0
+
 
 class SmartBookReaderApp:
     def __init__(self, root):
@@ -20,9 +57,27 @@ class SmartBookReaderApp:
         # Text display widget
         self.text_display = scrolledtext.ScrolledText(self.root, wrap=tk.WORD, font=("Arial", 12))
         self.text_display.pack(fill=tk.BOTH, expand=True)
+        self.text_display.tag_config("highlight", background="grey")
+        self.text_display.tag_config("word", background="#f0c040", foreground="black")
+        self.text_display.tag_raise("word")
+
+        # Maps book text offsets to Text widget indices for the displayed text
+        self.display_offset = 0
+        self.display_length = 0
+        self.line_starts = [0]
+        self.highlight_range = None
+        self.word_range = None
+
+        # Large TXT books only keep a window of text in the widget; the
+        # scrollbar is remapped so it still spans the whole book.
+        self.windowed = False
+        self.text_display.configure(yscrollcommand=self.on_text_scrolled)
+        self.text_display.vbar.configure(command=self.on_scrollbar)
 
         # Page navigation buttons
-        self.pages = []
+        self.document = Document("")
+        self.pages = self.document.pages
+        self.page_count = 0
         self.current_page_index = 0
 
         self.nav_frame = tk.Frame(self.root)
@@ -34,6 +89,25 @@ class SmartBookReaderApp:
         self.next_page_button = tk.Button(self.nav_frame, text="Next Page", command=self.next_page)
         self.next_page_button.grid(row=0, column=1, padx=5)
 
+        self.reload_button = tk.Button(self.nav_frame, text="Reload Book", command=self.reload_book)
+        self.reload_button.grid(row=0, column=2, padx=5)
+
+        self.page_entry = tk.Entry(self.nav_frame, width=6)
+        self.page_entry.grid(row=0, column=3, padx=5)
+        self.page_entry.bind("<Return>", lambda event: self.go_to_page())
+        self.go_to_page_button = tk.Button(self.nav_frame, text="Go to Page", command=self.go_to_page)
+        self.go_to_page_button.grid(row=0, column=4, padx=5)
+
+        self.search_frame = tk.Frame(self.root)
+        self.search_frame.pack()
+        self.search_entry = tk.Entry(self.search_frame, width=40)
+        self.search_entry.grid(row=0, column=0, padx=5)
+        self.search_entry.bind("<Return>", lambda event: self.find_in_book())
+        self.find_button = tk.Button(self.search_frame, text="Find", command=self.find_in_book)
+        self.find_button.grid(row=0, column=1, padx=5)
+        self.search_library_button = tk.Button(self.search_frame, text="Search Library", command=self.search_library)
+        self.search_library_button.grid(row=0, column=2, padx=5)
+
         # Controls Frame
         self.controls_frame = tk.Frame(self.root)
         self.controls_frame.pack(pady=5)
@@ -77,60 +151,304 @@ class SmartBookReaderApp:
 
         self.progress = ttk.Progressbar(self.root, orient="horizontal", length=700, mode="determinate")
         self.progress.pack(pady=5)
-
-        self.engine = pyttsx3.init()
-        self.engine.setProperty('rate', self.speed_var.get())
-        self.engine.setProperty('volume', self.volume_var.get())
+        # Once loaded, the bar spans the book text in characters; click or drag it to seek.
+        self.progress.bind("<Button-1>", self.on_progress_drag)
+        self.progress.bind("<B1-Motion>", self.on_progress_drag)
+        self.progress.bind("<ButtonRelease-1>", self.on_progress_release)
+
+        # One thread owns the engine; the GUI only sends it commands. It is
+        # started, in the background, when a book is opened or a command is sent.
+        self.speech = SpeechActor(lambda: create_engine(TTS_BACKEND), self.create_pipeline, on_stopped=self.on_reading_stopped,
+                                  rate=self.speed_var.get(), volume=self.volume_var.get())
+
+        # Pre-rendered sentence audio, replayed instead of live synthesis
+        self.audio_cache = AudioCache(AUDIO_CACHE_DIR, AUDIO_CACHE_BYTES)
+        self.player = WavPlayer()
+        self.use_audio_cache = True
+        self.synthesizer = None
+        # Renders on the synthesizer's thread, apart from the engine that speaks
+        self.render_engine = None
+        self.cached_rate = self.speed_var.get()
+
+        # Positions are keyed by book content and flushed in batches; the old
+        # JSON file is imported the first time the database is created.
+        self.position_store = PositionStore(POSITION_DB, legacy_json=SAVE_FILE)
+
+        # Sentences of every tracked book, indexed on a background thread
+        # after each load; the whole library is brought up to date at startup.
+        self.search_index = SearchIndex(SEARCH_DB)
+        self.index_queue = queue.Queue()
+        threading.Thread(target=self.search_indexer, daemon=True).start()
 
         self.is_reading = False
-        self.reading_thread = None
-        self.stop_flag = threading.Event()
+        # The document the speech thread was last asked to read
+        self.reading_document = None
 
         self.book_text = ""
-        self.sentences = []
+        self.sentences = self.document.sentences
         self.current_sentence_index = 0
         self.current_word_index = 0
         self.book_path = None
+        self.book_hash = None
+        self.load_started = time.perf_counter()
+
+        # PDF text arrives page by page from a process pool and is segmented
+        # as it comes in; TXT text is segmented a slice at a time.
+        self.text_cache = TextCache(TEXT_CACHE_DIR, TEXT_CACHE_BYTES)
+        self.pdf_loader = None
+        self.segmenting = None
+        self.loaded = threading.Event()
+        self.loaded.set()
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.voice = None
+        self.voice_stop = threading.Event()
+
+        # Reading callbacks post their latest state here instead of calling
+        # root.after per word; Tk applies it once per frame.
+        self.ui = UiScheduler(self.root, {"sentence": self.show_reading_sentence,
+                                          "word": self.highlight_word,
+                                          "progress": self.update_progress})
+        self.ui.start()
+        tracing.watch_event_loop(self.root.after, "tk.loop_lag")
+        self.background_start = self.root.after(BACKGROUND_START_MS, self.start_background_work)
+
+    def start_background_work(self):
+        self.background_start = None
+        for path in self.position_store.books():
+            self.index_queue.put((path, None))
         threading.Thread(target=self.speech_control, daemon=True).start()
 
     def open_book(self):
         file_path = filedialog.askopenfilename(filetypes=[("PDF Files", "*.pdf"), ("Text Files", "*.txt")])
         if file_path:
-            self.book_path = file_path
             self.load_book(file_path)
 
     def load_book(self, file_path):
+        self.cancel_loading()
+        if self.is_reading:
+            # Callbacks still coming from the old book are dropped once the document changes.
+            self.speech.pause()
+            self.is_reading = False
+        self.save_position(self.book_path, self.current_sentence_index, self.current_word_index)
+        self.ui.clear()
+        self.book_path = file_path
+        self.load_started = time.perf_counter()
+        # Warm up the engine while the book loads.
+        self.speech.start()
+        with tracing.span("book.open", path=os.path.basename(file_path)):
+            self.open_document(file_path)
+
+    def open_document(self, file_path):
         try:
-            if file_path.endswith(".pdf"):
-                pdf_reader = PdfReader(file_path)
-                self.pages = [page.extract_text() or "[Empty page]" for page in pdf_reader.pages]
-                self.current_page_index = 0
-                self.display_current_page()
-                text = "\n".join(self.pages)
+            self.current_sentence_index, self.current_word_index = self.load_position_for_book(file_path)
+            self.book_text = ""
+            self.windowed = False
+            self.book_hash = None
+            self.current_page_index = 0
+            cached = self.text_cache.get(file_path)
+            if cached:
+                self.load_cached_book(cached)
+            elif file_path.endswith(".pdf"):
+                from pdf_loader import PdfLoader
+                self.set_document(Document())
+                self.loaded.clear()
+                self.pdf_loader = PdfLoader(file_path)
+                self.page_count = self.pdf_loader.page_count
+                self.show_text("", 0)
+                self.progress["maximum"] = max(self.page_count, 1)
+                self.progress['value'] = 0
+                self.root.after(LOAD_POLL_MS, self.poll_pdf_loader, self.pdf_loader)
             else:
                 with open(file_path, "r", encoding="utf-8") as file:
                     text = file.read()
-                self.text_display.delete(1.0, tk.END)
-                self.text_display.insert(tk.END, text)
+                self.page_count = 0
+                self.set_document(Document(text))
+                self.loaded.clear()
+                self.show_book_text(text)
+                self.progress["maximum"] = max(len(text), 1)
+                self.segmenting = self.document
+                self.segment_text(self.document, 0, file_path)
 
-            self.book_text = text
-            self.sentences = self.split_into_sentences(text)
-            self.progress["maximum"] = len(self.sentences)
-
-            self.current_sentence_index, self.current_word_index = self.load_position_for_book(file_path)
-            self.progress['value'] = self.current_sentence_index
-            self.remove_highlight()
+        except Exception as e:
+            self.cancel_loading()
+            messagebox.showerror("Error", f"Error loading book: {str(e)}")
 
+    def poll_pdf_loader(self, loader):
+        if loader is not self.pdf_loader:
+            return
+        try:
+            pages = loader.poll()
         except Exception as e:
+            self.cancel_loading()
             messagebox.showerror("Error", f"Error loading book: {str(e)}")
+            return
+        if pages:
+            self.add_pages(pages)
+        if loader.done:
+            self.pdf_loader = None
+            self.document.finish_pages()
+            self.finish_loading(self.document.text)
+            self.store_in_text_cache(loader.file_path)
+        else:
+            self.progress['value'] = loader.next_page
+            self.root.after(LOAD_POLL_MS, self.poll_pdf_loader, loader)
+
+    def segment_text(self, document, offset, file_path):
+        # Like PDF pages, TXT text is segmented a slice per event-loop turn,
+        # so a large book does not freeze the window while it is split.
+        if document is not self.segmenting:
+            return
+        end = min(offset + SEGMENT_CHARS, len(document.text))
+        document.feed(document.text[offset:end])
+        if end < len(document.text):
+            self.progress['value'] = end
+            self.root.after(0, self.segment_text, document, end, file_path)
+            return
+        document.close()
+        self.segmenting = None
+        if self.windowed:
+            # Centre the window on the saved position now that its sentence is known.
+            self.show_book_text(document.text)
+        self.finish_loading(document.text)
+        self.store_in_text_cache(file_path)
+
+    def add_pages(self, pages):
+        self.document.add_pages(pages)
+        if len(self.pages) == len(pages):
+            self.display_current_page()
+        else:
+            self.update_page_title()
+
+    def set_document(self, document):
+        self.document = document
+        self.sentences = document.sentences
+        self.pages = document.pages
+
+    def load_cached_book(self, document):
+        self.set_document(document)
+        text = document.text
+        if self.pages:
+            self.page_count = len(self.pages)
+            self.display_current_page()
+        else:
+            self.page_count = 0
+            self.show_book_text(text)
+        self.finish_loading(text)
 
-    def display_current_page(self):
+    def store_in_text_cache(self, file_path):
+        try:
+            self.text_cache.put(file_path, self.document)
+        except OSError as e:
+            print(f"Could not cache book text: {e}")
+
+    def reload_book(self):
+        if not self.book_path:
+            messagebox.showinfo("Info", "Please open a book first.")
+            return
+        self.text_cache.invalidate(self.book_path)
+        self.load_book(self.book_path)
+
+    def finish_loading(self, text):
+        tracing.record("book.load", self.load_started, time.perf_counter() - self.load_started,
+                       sentences=len(self.sentences))
+        self.book_text = text
+        self.book_hash = content_hash(text)
+        self.progress["maximum"] = max(len(self.document), 1)
+        self.progress['value'] = self.sentence_progress(self.current_sentence_index)
+        self.remove_highlight()
+        self.loaded.set()
+        if self.book_path:
+            self.index_queue.put((self.book_path, self.document))
+
+    def cancel_loading(self):
+        if self.pdf_loader:
+            self.pdf_loader.cancel()
+            self.pdf_loader = None
+        self.segmenting = None
+        self.loaded.set()
+
+    def show_text(self, text, offset):
         self.text_display.delete(1.0, tk.END)
+        self.text_display.insert(tk.END, text)
+        self.display_offset = offset
+        self.display_length = len(text)
+        self.line_starts = [0] + [match.end() for match in NEWLINES.finditer(text)]
+        self.highlight_range = None
+        self.word_range = None
+
+    def show_book_text(self, text):
+        self.book_text = text
+        self.windowed = len(text) > 2 * WINDOW_CHARS
+        if not self.windowed:
+            self.show_text(text, 0)
+            return
+        center = 0
+        if self.current_sentence_index < len(self.sentences):
+            center = self.sentences[self.current_sentence_index].start
+        self.show_window(center)
+        self.text_display.see(self.text_index(center - self.display_offset))
+
+    def show_window(self, center):
+        # Window edges snap to line starts so Tk line numbers stay aligned.
+        text = self.book_text
+        start = max(min(center - WINDOW_CHARS // 2, len(text) - WINDOW_CHARS), 0)
+        if start > 0:
+            newline = text.rfind("\n", max(start - WINDOW_CHARS // 4, 0), start)
+            if newline != -1:
+                start = newline + 1
+        end = min(start + WINDOW_CHARS, len(text))
+        if end < len(text):
+            newline = text.find("\n", end, end + WINDOW_CHARS // 4)
+            if newline != -1:
+                end = newline + 1
+        if (start, end - start) != (self.display_offset, self.display_length):
+            self.show_text(text[start:end], start)
+
+    def slide_window_to_view(self):
+        top = self.display_offset + self.text_offset(self.text_display.index("@0,0"))
+        self.show_window(top)
+        self.text_display.yview(self.text_index(top - self.display_offset))
+
+    def on_text_scrolled(self, first, last):
+        first, last = float(first), float(last)
+        if self.windowed:
+            window_end = self.display_offset + self.display_length
+            if (last >= 1.0 and window_end < len(self.book_text)) or (first <= 0.0 and self.display_offset > 0):
+                self.slide_window_to_view()
+                return
+            total = len(self.book_text)
+            first = (self.display_offset + first * self.display_length) / total
+            last = (self.display_offset + last * self.display_length) / total
+        self.text_display.vbar.set(first, last)
+
+    def on_scrollbar(self, *args):
+        if self.windowed and args[0] == "moveto":
+            target = int(float(args[1]) * len(self.book_text))
+            if not 0 <= target - self.display_offset < self.display_length:
+                self.show_window(target)
+            self.text_display.yview(self.text_index(target - self.display_offset))
+            return
+        self.text_display.yview(*args)
+
+    def text_offset(self, index):
+        line, column = map(int, index.split("."))
+        return self.line_starts[line - 1] + column
+
+    def text_index(self, offset):
+        # "line.col" indices resolve through Tk's line B-tree instead of a
+        # character walk from "1.0", so the cost does not grow with the offset.
+        line = bisect_right(self.line_starts, offset) - 1
+        return f"{line + 1}.{offset - self.line_starts[line]}"
+
+    def display_current_page(self):
         if 0 <= self.current_page_index < len(self.pages):
-            self.text_display.insert(tk.END, self.pages[self.current_page_index])
-            self.root.title(f"Smart Audio Book Reader - Page {self.current_page_index + 1} of {len(self.pages)}")
+            self.show_text(self.pages[self.current_page_index], self.document.page_offsets[self.current_page_index])
+            self.update_page_title()
+
+    def update_page_title(self):
+        loading = f" (loaded {len(self.pages)})" if self.pdf_loader else ""
+        self.root.title(f"Smart Audio Book Reader - Page {self.current_page_index + 1} of {self.page_count}{loading}")
 
     def next_page(self):
         if self.current_page_index < len(self.pages) - 1:
@@ -143,52 +461,39 @@ class SmartBookReaderApp:
             self.display_current_page()
 
     def split_into_sentences(self, text):
-        sentence_endings = re.compile(r'(?<=[.!?]) +')
-        sentences = sentence_endings.split(text)
-        return [s.strip() for s in sentences if s.strip()]
+        document = Document(text)
+        document.segment(text)
+        return document.sentences
 
     def speech_control(self):
-        recognizer = sr.Recognizer()
-        microphone = sr.Microphone()
-        while True:
-            try:
-                with microphone as source:
-                    recognizer.adjust_for_ambient_noise(source)
-                    print("Listening for commands...")
-                    audio = recognizer.listen(source, timeout=5, phrase_time_limit=5)
-                    command = recognizer.recognize_google(audio).lower()
-                    print(f"Recognized command: {command}")
-
-                    if "restart" in command:
-                        self.read_from_start()
-                    elif "start" in command:
-                        self.start_reading()
-                    elif "pause" in command or "stop" in command:
-                        self.stop_reading()
-                    elif "resume" in command:
-                        self.start_reading()
-                    elif "increase speed" in command:
-                        new_rate = self.engine.getProperty('rate') + 20
-                        self.engine.setProperty('rate', new_rate)
-                        self.speed_var.set(new_rate)
-                    elif "decrease speed" in command:
-                        new_rate = max(50, self.engine.getProperty('rate') - 20)
-                        self.engine.setProperty('rate', new_rate)
-                        self.speed_var.set(new_rate)
-
-            except sr.WaitTimeoutError:
-                continue
-            except sr.UnknownValueError:
-                continue
-            except sr.RequestError as e:
-                print(f"Speech recognition error: {e}")
-                continue
-            except Exception as e:
-                print(f"Unexpected error: {e}")
-                continue
+        try:
+            import speech_recognition as sr
+            recognizer = sr.Recognizer()
+            self.voice = VoiceController(recognizer, self.dispatch_voice_command,
+                                         RECOGNIZERS[VOICE_RECOGNIZER](recognizer))
+            self.voice.run(sr.Microphone(), self.voice_stop)
+        except Exception as e:
+            print(f"Voice control unavailable: {e}")
+
+    def dispatch_voice_command(self, command, utterance_end):
+        # Called on the listener thread; Tk and the reader state are only touched from the main loop.
+        self.root.after(0, self.run_voice_command, command, utterance_end)
+
+    def run_voice_command(self, command, utterance_end):
+        if command == "restart":
+            self.read_from_start()
+        elif command in ("start", "resume"):
+            self.start_reading()
+        elif command == "stop":
+            self.stop_reading()
+        elif command in ("increase_speed", "decrease_speed"):
+            step = 20 if command == "increase_speed" else -20
+            self.speed_var.set(max(50, self.speed_var.get() + step))
+            self.update_speed()
+        self.voice.action_done(utterance_end)
 
     def start_reading(self):
-        if not self.sentences:
+        if not self.sentences and self.loaded.is_set():
             messagebox.showinfo("Info", "Please open a book first.")
             return
         if self.is_reading:
@@ -196,12 +501,11 @@ class SmartBookReaderApp:
             return
 
         self.is_reading = True
-        self.stop_flag.clear()
-        self.reading_thread = threading.Thread(target=self.read_sentences, daemon=True)
-        self.reading_thread.start()
+        self.reading_document = self.document
+        self.speech.say(self.current_sentence_index, self.current_word_index)
 
     def read_from_start(self):
-        if not self.sentences:
+        if not self.sentences and self.loaded.is_set():
             messagebox.showinfo("Info", "Please open a book first.")
             return
         if self.is_reading:
@@ -213,68 +517,198 @@ class SmartBookReaderApp:
         self.progress['value'] = 0
         self.start_reading()
 
-    def read_sentences(self):
-        self.engine.setProperty('rate', self.speed_var.get())
-        self.engine.setProperty('volume', self.volume_var.get())
+    def from_other_book(self):
+        """Whether speech callbacks come from a read of a book that has since been replaced."""
+        return self.reading_document is not None and self.reading_document is not self.document
 
-        batch_size = 1
-        sentence_idx = self.current_sentence_index
-        word_idx = self.current_word_index
+    def on_reading_stopped(self, finished, sentence_idx, word_idx, error):
+        # Runs on the speech thread once reading ends.
+        self.synthesizer = None
+        if self.from_other_book():
+            return
+        if isinstance(error, AudioCacheError) and self.use_audio_cache:
+            print(f"Audio cache unavailable, speaking live: {error}")
+            self.use_audio_cache = False
+            self.speech.set_volume(self.volume_var.get())
+            self.speech.say(self.current_sentence_index, self.current_word_index)
+            return
+        if error:
+            print(f"Reading stopped: {error}")
+            # The word callbacks have the last position that was actually spoken.
+            sentence_idx, word_idx = self.current_sentence_index, self.current_word_index
+        self.current_sentence_index = sentence_idx
+        self.current_word_index = word_idx
+        self.save_position(self.book_path, sentence_idx, word_idx)
+        self.position_store.flush()
+        # After a pause stop_reading has already cleared is_reading, and a new
+        # start may be queued behind it.
+        if finished or error:
+            self.is_reading = False
+        if finished:
+            self.ui.post("sentence", None)
+            self.ui.post("word", None)
+            self.ui.post("progress", 0)
+
+    def create_pipeline(self, engine):
+        # Runs on the speech thread. The last synthesizer has stopped by now;
+        # stopping it again waits for any render it still had running.
+        if self.synthesizer:
+            self.synthesizer.stop()
+        if self.use_audio_cache and self.book_hash and self.render_engine is None:
+            try:
+                self.render_engine = create_render_engine(TTS_BACKEND)
+            except BackendError as e:
+                print(f"Audio cache unavailable, speaking live: {e}")
+                self.use_audio_cache = False
+        if self.use_audio_cache and self.book_hash:
+            self.render_engine.setProperty('rate', self.speech.rate)
+            self.render_engine.setProperty('voice', engine.getProperty('voice'))
+            self.synthesizer = PreSynthesizer(self.render_engine, self.audio_cache, self.book_hash, self.sentences)
+            return CachedSpeechPipeline(self.synthesizer, self.player, self.sentences,
+                                        on_sentence=self.on_sentence_started, on_word=self.on_word_started,
+                                        loaded=self.loaded)
+        return SpeechPipeline(engine, self.sentences,
+                              on_sentence=self.on_sentence_started, on_word=self.on_word_started,
+                              loaded=self.loaded)
+
+    def on_sentence_started(self, sentence_idx, word_idx):
+        if self.from_other_book():
+            return
+        self.current_sentence_index = sentence_idx
+        self.current_word_index = word_idx
+        self.ui.post("sentence", sentence_idx)
+        self.ui.post("progress", self.sentence_progress(sentence_idx))
 
-        while sentence_idx < len(self.sentences) and not self.stop_flag.is_set():
-            sentence = self.sentences[sentence_idx]
-            self.root.after(0, self.highlight_sentence, sentence)
-            words = sentence.split()
+    def on_word_started(self, sentence_idx, word_idx):
+        if self.from_other_book():
+            return
+        self.current_sentence_index = sentence_idx
+        self.current_word_index = word_idx
+        self.ui.post("word", (sentence_idx, word_idx))
+        self.save_position(self.book_path, sentence_idx, word_idx)
 
-            for i in range(word_idx, len(words), batch_size):
-                if self.stop_flag.is_set():
-                    self.current_sentence_index = sentence_idx
-                    self.current_word_index = i
-                    self.save_position(self.book_path, self.current_sentence_index, self.current_word_index)
-                    return
+    def show_reading_sentence(self, sentence_idx):
+        if sentence_idx is None or sentence_idx >= len(self.sentences):
+            self.remove_highlight()
+            return
+        # The displayed page follows the read cursor.
+        if self.pages:
+            page = self.document.page_of_sentence(sentence_idx)
+            if page != self.current_page_index:
+                self.current_page_index = page
+                self.display_current_page()
+        self.highlight_sentence(self.sentences[sentence_idx])
 
-                chunk = " ".join(words[i:i + batch_size])
-                self.engine.say(chunk)
-                self.engine.runAndWait()
+    def sentence_progress(self, sentence_idx):
+        if sentence_idx >= len(self.sentences):
+            return 0
+        return self.document.sentence_starts[sentence_idx]
 
-                self.current_sentence_index = sentence_idx
-                self.current_word_index = i + batch_size
-                self.save_position(self.book_path, self.current_sentence_index, self.current_word_index)
-                self.root.after(0, self.update_progress, sentence_idx + 1)
+    def seek_to_sentence(self, sentence_idx):
+        if not self.sentences:
+            return
+        self.current_sentence_index = sentence_idx
+        self.current_word_index = 0
+        if self.is_reading:
+            self.speech.seek(sentence_idx)
+        else:
+            self.save_position(self.book_path, sentence_idx, 0)
+        self.show_reading_sentence(sentence_idx)
+        self.update_progress(self.sentence_progress(sentence_idx))
+
+    def jump_to_page(self, page):
+        if 0 <= page < len(self.pages):
+            sentences = self.document.page_sentences(page)
+            # A page with no sentence of its own starts in the one that runs onto it.
+            self.seek_to_sentence(sentences.start if sentences else max(sentences.start - 1, 0))
+
+    def jump_to_percent(self, percent):
+        if self.sentences:
+            self.seek_to_sentence(self.document.sentence_at_fraction(percent / 100))
+
+    def go_to_page(self):
+        try:
+            page = int(self.page_entry.get()) - 1
+        except ValueError:
+            return
+        self.jump_to_page(page)
 
-            sentence_idx += 1
-            word_idx = 0
+    def progress_fraction(self, event):
+        return min(max(event.x / max(self.progress.winfo_width(), 1), 0.0), 1.0)
 
-        self.current_sentence_index = 0
-        self.current_word_index = 0
-        self.save_position(self.book_path, 0, 0)
-        self.root.after(0, self.remove_highlight)
-        self.root.after(0, self.update_progress, 0)
-        self.is_reading = False
+    def on_progress_drag(self, event):
+        if self.pdf_loader or not self.sentences:
+            return
+        # Preview only: move the bar and the page; the reader seeks on release.
+        fraction = self.progress_fraction(event)
+        self.progress['value'] = fraction * self.progress["maximum"]
+        if self.pages:
+            page = self.document.page_of_sentence(self.document.sentence_at_fraction(fraction))
+            if page != self.current_page_index:
+                self.current_page_index = page
+                self.display_current_page()
+
+    def on_progress_release(self, event):
+        if self.pdf_loader or not self.sentences:
+            return
+        self.jump_to_percent(self.progress_fraction(event) * 100)
 
+    @tracing.traced("ui.highlight_sentence")
     def highlight_sentence(self, sentence):
-        self.text_display.tag_remove("highlight", "1.0", tk.END)
-        idx = self.text_display.search(sentence, "1.0", tk.END)
-        if idx:
-            end_idx = f"{idx}+{len(sentence)}c"
-            self.text_display.tag_add("highlight", idx, end_idx)
-            self.text_display.tag_config("highlight", background="grey")
-            self.text_display.see(idx)
+        self.remove_highlight()
+        if self.windowed and not (self.display_offset <= sentence.start
+                                  and sentence.end <= self.display_offset + self.display_length):
+            self.show_window(sentence.start)
+        # Clip to the displayed text; on a PDF page this may be only part of the sentence.
+        start = max(sentence.start - self.display_offset, 0)
+        end = min(sentence.end - self.display_offset, self.display_length)
+        if start >= end:
+            return
+        self.highlight_range = (self.text_index(start), self.text_index(end))
+        self.text_display.tag_add("highlight", *self.highlight_range)
+        self.text_display.see(self.highlight_range[0])
+
+    @tracing.traced("ui.highlight_word")
+    def highlight_word(self, position):
+        self.remove_word_highlight()
+        if position is None:
+            return
+        sentence_idx, word_idx = position
+        if sentence_idx >= len(self.sentences):
+            return
+        offsets = self.document.word_offsets(sentence_idx)
+        if word_idx >= len(offsets):
+            return
+        sentence = self.sentences[sentence_idx]
+        start = sentence.start + offsets[word_idx] - self.display_offset
+        end = start + len(sentence[offsets[word_idx]:].split(None, 1)[0])
+        if start < 0 or end > self.display_length:
+            return
+        self.word_range = (self.text_index(start), self.text_index(end))
+        self.text_display.tag_add("word", *self.word_range)
+
+    def remove_word_highlight(self):
+        if self.word_range:
+            self.text_display.tag_remove("word", *self.word_range)
+            self.word_range = None
 
     def remove_highlight(self):
-        self.text_display.tag_remove("highlight", "1.0", tk.END)
+        self.remove_word_highlight()
+        if self.highlight_range:
+            self.text_display.tag_remove("highlight", *self.highlight_range)
+            self.highlight_range = None
 
     def update_progress(self, value):
-        self.progress['value'] = value
+        # While a PDF is still loading the bar shows extraction progress.
+        if not self.pdf_loader:
+            self.progress['value'] = value
 
     def stop_reading(self):
         if not self.is_reading:
             messagebox.showinfo("Info", "Not currently reading.")
             return
-        self.stop_flag.set()
-        self.engine.stop()
-        if self.reading_thread and self.reading_thread.is_alive():
-            self.reading_thread.join(timeout=2)
+        # Returns at once; the speech thread saves the position when it has stopped.
+        self.speech.pause()
         self.is_reading = False
 
     def increase_font_size(self):
@@ -293,42 +727,104 @@ class SmartBookReaderApp:
         self.text_display.config(bg=bg, fg=fg)
 
     def update_speed(self, event=None):
-        self.engine.setProperty('rate', self.speed_var.get())
+        rate = self.speed_var.get()
+        self.speech.set_rate(rate)
+        if self.book_hash and rate != self.cached_rate:
+            # On the speech thread, so a file is never removed between the
+            # pipeline finding it in the cache and opening it to play.
+            self.speech.call(self.audio_cache.invalidate, self.book_hash, self.cached_rate)
+        self.cached_rate = rate
 
     def update_volume(self, event=None):
-        self.engine.setProperty('volume', self.volume_var.get())
+        self.speech.set_volume(self.volume_var.get())
+        self.player.volume = self.volume_var.get()
 
     def save_position(self, book_path, sentence_idx, word_idx):
         if not book_path:
             return
-        data = {}
-        if os.path.exists(SAVE_FILE):
-            with open(SAVE_FILE, "r") as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
-                    data = {}
-        data[book_path] = {"sentence": sentence_idx, "word": word_idx}
-        with open(SAVE_FILE, "w") as f:
-            json.dump(data, f)
+        self.position_store.save(book_path, sentence_idx, word_idx)
 
     def load_position_for_book(self, book_path):
-        if not os.path.exists(SAVE_FILE):
-            return 0, 0
-        with open(SAVE_FILE, "r") as f:
+        return self.position_store.load(book_path)
+
+    def search_indexer(self):
+        while True:
+            path, document = self.index_queue.get()
             try:
-                data = json.load(f)
-                pos = data.get(book_path, {"sentence": 0, "word": 0})
-                return pos.get("sentence", 0), pos.get("word", 0)
-            except json.JSONDecodeError:
-                return 0, 0
+                if not os.path.exists(path):
+                    continue
+                fingerprint = file_fingerprint(path)
+                if self.search_index.is_current(path, fingerprint):
+                    continue
+                if document is None:
+                    # Library books are indexed from the text cache; uncached
+                    # PDFs wait until they are next opened.
+                    document = self.text_cache.get(path)
+                    if document is None and path.endswith(".txt"):
+                        with open(path, "r", encoding="utf-8") as file:
+                            document = Document(file.read())
+                        document.segment(document.text)
+                if document is not None:
+                    with tracing.span("search.index_book", sentences=len(document.sentences)):
+                        self.search_index.index_book(path, fingerprint, document.sentences)
+            except (OSError, UnicodeDecodeError, sqlite3.Error) as e:
+                print(f"Could not index {path} for search: {e}")
+
+    def find_in_book(self):
+        phrase = self.search_entry.get().strip()
+        if not phrase or not self.book_path:
+            return
+        # Next match after the current sentence, wrapping to the start of the book.
+        matches = self.search_index.find(phrase, path=self.book_path, start=self.current_sentence_index + 1, limit=1) \
+            or self.search_index.find(phrase, path=self.book_path, limit=1)
+        if matches:
+            self.seek_to_sentence(matches[0][1])
+        elif not self.search_index.is_current(self.book_path, file_fingerprint(self.book_path)):
+            messagebox.showinfo("Search", "This book is still being indexed; try again in a moment.")
+        else:
+            messagebox.showinfo("Search", f"\"{phrase}\" was not found.")
+
+    def search_library(self):
+        phrase = self.search_entry.get().strip()
+        if not phrase:
+            return
+        results = self.search_index.find(phrase, limit=SEARCH_RESULTS)
+        if not results:
+            messagebox.showinfo("Search", f"\"{phrase}\" was not found in the library.")
+            return
+        window = tk.Toplevel(self.root)
+        window.title(f"Search: {phrase}")
+        listbox = tk.Listbox(window, width=100, height=20)
+        listbox.pack(fill=tk.BOTH, expand=True)
+        for path, sentence_idx, sentence in results:
+            listbox.insert(tk.END, f"{os.path.basename(path)} #{sentence_idx + 1}: {sentence[:120]}")
+        listbox.bind("<Double-Button-1>", lambda event: self.open_search_result(*results[listbox.curselection()[0]][:2]))
+
+    def open_search_result(self, path, sentence_idx):
+        if path == self.book_path and self.sentences:
+            self.seek_to_sentence(sentence_idx)
+            return
+        if self.is_reading:
+            self.stop_reading()
+        self.save_position(path, sentence_idx, 0)
+        self.load_book(path)
 
     def on_close(self):
+        self.cancel_loading()
+        self.voice_stop.set()
+        if self.background_start:
+            self.root.after_cancel(self.background_start)
+        # Reading stops first, so the position it reports is the one saved.
+        self.speech.shutdown(timeout=SHUTDOWN_TIMEOUT)
         self.save_position(self.book_path, self.current_sentence_index, self.current_word_index)
+        self.position_store.close()
+        self.search_index.close()
+        self.ui.stop()
         self.root.destroy()
 
 
 if __name__ == "__main__":
+    tracing.enable_from_args(sys.argv[1:])
     root = tk.Tk()
     app = SmartBookReaderApp(root)
     root.mainloop()
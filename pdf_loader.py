@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader
+
+import tracing
+
+EMPTY_PAGE = "[Empty page]"
+# Each worker gets about this many ranges, so a slow range does not hold up the rest.
+RANGES_PER_WORKER = 4
+# Upper bound on a range, so long books still appear a few dozen pages at a time.
+MAX_CHUNK_PAGES = 64
+
+# The worker's reader, opened once by open_reader; parsing the file costs
+# far more than extracting a range of its pages.
+_reader = None
+
+
+def open_reader(file_path):
+    global _reader
+    _reader = PdfReader(file_path)
+
+
+def extract_pages(start, stop):
+    """(start, page texts, (pid, start time, seconds)); the timing is traced by the parent."""
+    started = time.perf_counter()
+    texts = [_reader.pages[i].extract_text() or EMPTY_PAGE for i in range(start, stop)]
+    return start, texts, (os.getpid(), started, time.perf_counter() - started)
+
+
+class PdfLoader:
+    """Extracts PDF text in a process pool, split into page ranges.
+
+    The first page is submitted on its own so it can be shown right away;
+    poll() hands back pages strictly in order as their ranges finish. Unless
+    chunk_pages is given, the rest are split into ranges sized from the page
+    and worker counts.
+    """
+
+    def __init__(self, file_path, chunk_pages=None, workers=None):
+        self.file_path = file_path
+        self.page_count = len(PdfReader(file_path).pages)
+        workers = workers or max(min(os.cpu_count() or 1, self.page_count - 1), 1)
+        self.chunk_pages = chunk_pages or min(max(-(-(self.page_count - 1) // (workers * RANGES_PER_WORKER)), 1),
+                                              MAX_CHUNK_PAGES)
+        self.next_page = 0
+        self.ready = {}
+        self.futures = []
+        self.cancelled = False
+        ranges = [(0, min(1, self.page_count))]
+        for start in range(1, self.page_count, self.chunk_pages):
+            ranges.append((start, min(start + self.chunk_pages, self.page_count)))
+        # spawn: forking a process that is running Tk and audio threads is unsafe.
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=open_reader, initargs=(file_path,))
+        self.futures = [self.executor.submit(extract_pages, start, stop)
+                        for start, stop in ranges if stop > start]
+
+    @property
+    def done(self):
+        return self.next_page >= self.page_count
+
+    def poll(self):
+        """Return the pages that became available in order since the last call."""
+        for future in [f for f in self.futures if f.done()]:
+            self.futures.remove(future)
+            start, texts, (pid, started, seconds) = future.result()
+            tracing.record("pdf.extract_pages", started, seconds, pid=pid, pages=len(texts))
+            for offset, text in enumerate(texts):
+                self.ready[start + offset] = text
+        pages = []
+        while self.next_page in self.ready:
+            pages.append(self.ready.pop(self.next_page))
+            self.next_page += 1
+        if self.done:
+            self.executor.shutdown(wait=False)
+        return pages
+
+    def cancel(self):
+        self.cancelled = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
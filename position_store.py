@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import tracing
+
+FINGERPRINT_SAMPLE = 64 * 1024
+
+
+def file_fingerprint(path):
+    """Identify a book by its content rather than its location.
+
+    Hashes the size plus the first and last 64 KiB, so fingerprinting stays
+    cheap for large files while moved or renamed copies keep the same key.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode("ascii"))
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_SAMPLE))
+        if size > FINGERPRINT_SAMPLE:
+            f.seek(max(size - FINGERPRINT_SAMPLE, FINGERPRINT_SAMPLE))
+            digest.update(f.read(FINGERPRINT_SAMPLE))
+    return digest.hexdigest()
+
+
+class PositionStore:
+    """Reading positions in an SQLite WAL database, written in coalesced batches.
+
+    save() only updates an in-memory dict; a background timer flushes pending
+    positions in one transaction, and flush()/close() force it on stop and exit.
+    """
+
+    def __init__(self, db_path, flush_interval=2.0, legacy_json=None):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.fingerprints = {}
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS positions ("
+            "fingerprint TEXT PRIMARY KEY, path TEXT, sentence INTEGER, word INTEGER, updated REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS positions_path ON positions (path)")
+        self.connection.commit()
+        if legacy_json:
+            self._import_legacy(legacy_json)
+
+        self.closed = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self.flusher.start()
+
+    def _import_legacy(self, json_path):
+        if not os.path.exists(json_path):
+            return
+        with self.lock:
+            if self.connection.execute("SELECT 1 FROM positions LIMIT 1").fetchone():
+                return
+        try:
+            with open(json_path, "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        for path, pos in data.items():
+            self.save(path, pos.get("sentence", 0), pos.get("word", 0))
+        self.flush()
+
+    def key(self, book_path):
+        try:
+            stat = os.stat(book_path)
+        except OSError:
+            return "path:" + book_path
+        cached = self.fingerprints.get(book_path)
+        if cached and cached[0] == (stat.st_size, stat.st_mtime):
+            return cached[1]
+        fingerprint = file_fingerprint(book_path)
+        self.fingerprints[book_path] = ((stat.st_size, stat.st_mtime), fingerprint)
+        return fingerprint
+
+    def save(self, book_path, sentence_idx, word_idx):
+        with tracing.span("positions.save"):
+            key = self.key(book_path)
+            with self.lock:
+                # Late saves, e.g. from the speech thread at exit, are dropped once closed.
+                if self.connection is None:
+                    return
+                self.pending[key] = (book_path, sentence_idx, word_idx, time.time())
+
+    def load(self, book_path):
+        key = self.key(book_path)
+        with self.lock:
+            if key in self.pending:
+                _, sentence_idx, word_idx, _ = self.pending[key]
+                return sentence_idx, word_idx
+            row = self.connection.execute(
+                "SELECT sentence, word FROM positions WHERE fingerprint = ?", (key,)).fetchone()
+            if row is None:
+                # The file changed since its position was saved; fall back to its path.
+                row = self.connection.execute(
+                    "SELECT sentence, word FROM positions WHERE path = ? ORDER BY updated DESC LIMIT 1",
+                    (book_path,)).fetchone()
+        return tuple(row) if row else (0, 0)
+
+    def books(self):
+        self.flush()
+        with self.lock:
+            return [row[0] for row in self.connection.execute("SELECT path FROM positions ORDER BY updated DESC")]
+
+    def flush(self):
+        with self.lock:
+            if self.connection is None or not self.pending:
+                return
+            rows = [(key,) + entry for key, entry in self.pending.items()]
+            self.pending = {}
+            with tracing.span("positions.flush", rows=len(rows)), self.connection:
+                self.connection.executemany(
+                    "INSERT INTO positions (fingerprint, path, sentence, word, updated) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(fingerprint) DO UPDATE SET path = excluded.path, sentence = excluded.sentence, "
+                    "word = excluded.word, updated = excluded.updated", rows)
+
+    def _flush_periodically(self):
+        while not self.closed.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self.closed.set()
+        self.flush()
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
@@ -0,0 +1,119 @@
+import pathlib
+import sqlite3
+import threading
+import time
+
+# Sentence rowids are (book id << SENTENCE_BITS) | sentence index, so one
+# book's sentences form a rowid range that FTS5 can seek to directly.
+SENTENCE_BITS = 24
+MAX_SENTENCES = 1 << SENTENCE_BITS
+INSERT_BATCH = 10000
+
+
+def phrase_query(phrase):
+    """An FTS5 phrase query for the words of phrase, matched in order."""
+    return '"' + phrase.replace('"', '""') + '"'
+
+
+class SearchIndex:
+    """Inverted index of book sentences in an SQLite FTS5 table.
+
+    Each book is stored under its path together with the content fingerprint
+    it was indexed from. Re-indexing a changed book only rewrites the
+    sentences whose text differs, plus any added or removed at the end.
+
+    Writes go through one connection and lookups through a second,
+    read-only one. Under WAL a reader sees the last committed state without
+    waiting, so searches are not held up while a book is being indexed.
+    """
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS books ("
+            "id INTEGER PRIMARY KEY, path TEXT UNIQUE, fingerprint TEXT, sentences INTEGER, updated REAL)")
+        self.connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS sentence_text USING fts5(text)")
+        self.connection.commit()
+        self.read_lock = threading.Lock()
+        self.reader = sqlite3.connect(pathlib.Path(db_path).absolute().as_uri() + "?mode=ro", uri=True,
+                                      check_same_thread=False)
+
+    def is_current(self, path, fingerprint):
+        with self.read_lock:
+            row = self.reader.execute("SELECT fingerprint FROM books WHERE path = ?", (path,)).fetchone()
+        return row is not None and row[0] == fingerprint
+
+    def index_book(self, path, fingerprint, sentences):
+        """Index or update a book; returns the number of sentence rows written."""
+        sentences = sentences[:MAX_SENTENCES]
+        with self.lock, self.connection:
+            row = self.connection.execute("SELECT id, fingerprint FROM books WHERE path = ?", (path,)).fetchone()
+            if row and row[1] == fingerprint:
+                return 0
+            if row:
+                book_id = row[0]
+            else:
+                book_id = self.connection.execute("INSERT INTO books (path) VALUES (?)", (path,)).lastrowid
+            base = book_id << SENTENCE_BITS
+            old = dict(self.connection.execute(
+                "SELECT rowid - ?, text FROM sentence_text WHERE rowid BETWEEN ? AND ?",
+                (base, base, base + MAX_SENTENCES - 1)))
+            changed = [(base + idx, str(sentence)) for idx, sentence in enumerate(sentences)
+                       if old.get(idx) != sentence]
+            stale = [(base + idx,) for idx in old if idx >= len(sentences) or old[idx] != sentences[idx]]
+            self.connection.executemany("DELETE FROM sentence_text WHERE rowid = ?", stale)
+            for start in range(0, len(changed), INSERT_BATCH):
+                self.connection.executemany("INSERT INTO sentence_text (rowid, text) VALUES (?, ?)",
+                                            changed[start:start + INSERT_BATCH])
+            self.connection.execute("UPDATE books SET fingerprint = ?, sentences = ?, updated = ? WHERE id = ?",
+                                    (fingerprint, len(sentences), time.time(), book_id))
+        return len(changed)
+
+    def remove_book(self, path):
+        with self.lock, self.connection:
+            row = self.connection.execute("SELECT id FROM books WHERE path = ?", (path,)).fetchone()
+            if row:
+                base = row[0] << SENTENCE_BITS
+                self.connection.execute("DELETE FROM sentence_text WHERE rowid BETWEEN ? AND ?",
+                                        (base, base + MAX_SENTENCES - 1))
+                self.connection.execute("DELETE FROM books WHERE id = ?", (row[0],))
+
+    def find(self, phrase, path=None, start=0, limit=100):
+        """(path, sentence index, sentence) for sentences containing phrase, in reading order.
+
+        Searches one book from sentence start on when path is given,
+        otherwise the whole library.
+        """
+        query = phrase_query(phrase)
+        with self.read_lock:
+            if path is not None:
+                row = self.reader.execute("SELECT id FROM books WHERE path = ?", (path,)).fetchone()
+                if row is None:
+                    return []
+                base = row[0] << SENTENCE_BITS
+                rows = self.reader.execute(
+                    "SELECT rowid, text FROM sentence_text WHERE sentence_text MATCH ? "
+                    "AND rowid BETWEEN ? AND ? ORDER BY rowid LIMIT ?",
+                    (query, base + start, base + MAX_SENTENCES - 1, limit)).fetchall()
+                paths = {row[0]: path}
+            else:
+                rows = self.reader.execute(
+                    "SELECT rowid, text FROM sentence_text WHERE sentence_text MATCH ? ORDER BY rowid LIMIT ?",
+                    (query, limit)).fetchall()
+                paths = dict(self.reader.execute("SELECT id, path FROM books"))
+        mask = MAX_SENTENCES - 1
+        return [(paths[rowid >> SENTENCE_BITS], rowid & mask, text) for rowid, text in rows
+                if (rowid >> SENTENCE_BITS) in paths]
+
+    def books(self):
+        with self.read_lock:
+            return [row[0] for row in self.reader.execute("SELECT path FROM books ORDER BY path")]
+
+    def close(self):
+        with self.read_lock:
+            self.reader.close()
+        with self.lock:
+            self.connection.close()
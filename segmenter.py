@@ -0,0 +1,154 @@
+import re
+from array import array
+from bisect import bisect_left
+from itertools import chain, repeat
+
+WORD_PATTERN = re.compile(r'\S+')
+OPENING_PUNCTUATION = "\"'([{“‘«"
+# Abbreviations that are followed by a name or number rather than ending a sentence
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "rev", "gen", "col", "capt", "lt", "sgt",
+    "gov", "sen", "rep", "hon", "fr", "vs", "vol", "ch", "fig", "pp", "approx",
+}
+
+
+def _not_after_word(stems):
+    """Negative lookbehinds rejecting a full stop just matched after any of stems as a whole word.
+
+    Lookbehinds must be fixed width, so there is one per stem length. A word
+    starts after whitespace, opening punctuation or at the start of the text.
+    """
+    word_start = f"(?<![^\\s{re.escape(OPENING_PUNCTUATION)}])"
+    by_length = {}
+    for stem in stems:
+        by_length.setdefault(len(stem), []).append(stem)
+    return "".join(f"(?<!{word_start}(?i:{'|'.join(sorted(group))})\\.)" for _, group in sorted(by_length.items()))
+
+
+# A full stop does not end a sentence after an abbreviation, an initial ("J.")
+# or a dotted abbreviation ("e.g.", "U.S."); an ellipsis always can.
+NOT_AFTER_ABBREVIATION = _not_after_word(ABBREVIATIONS) + _not_after_word(["[^\\W\\d_]"]) + r'(?<!\.[^\W\d_]\.)'
+CLOSING_PUNCTUATION = "\"')]}”’»"
+BLANK_LINE = r'\n[^\S\n]*\n'
+
+
+def _character_class(characters):
+    """Body of a regex character class matching characters, as code point ranges."""
+    ranges = []
+    for code in sorted(map(ord, characters)):
+        if ranges and ranges[-1][1] == code - 1:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    return "".join(f"\\U{first:08x}-\\U{last:08x}" for first, last in ranges)
+
+
+# The Basic Multilingual Plane only; scanning all of Unicode would slow imports.
+NON_ASCII_LOWERCASE = _character_class(c for c in map(chr, range(0x80, 0x10000)) if c.islower())
+
+
+def _sentence_end(terminal):
+    """Pattern for terminal punctuation ending a sentence; see BOUNDARIES."""
+    not_after_abbreviation = NOT_AFTER_ABBREVIATION if terminal == "." else ""
+    return re.compile(rf'{re.escape(terminal)}(?=[{re.escape(CLOSING_PUNCTUATION)}]*(?!\s*{BLANK_LINE})(\s+)'
+                      rf'[^\sa-z{NON_ASCII_LOWERCASE}]){not_after_abbreviation}')
+
+
+# Every way a sentence can end, each with group 1 spanning from the end of one
+# sentence to the start of the next: terminal punctuation (plus any closing
+# quotes/brackets) when the next word does not start in lower case, or a blank
+# line. Each pattern starts with one literal character, which the regex engine
+# skips to far faster than a character class, so one pass per pattern and a
+# merge beat a single combined pattern.
+BOUNDARIES = [_sentence_end(terminal) for terminal in ".!?…"] + [re.compile(rf'({BLANK_LINE}\s*)(?=\S)')]
+# A blank line after trailing spaces, which the sentence before it must not include.
+SPACES_BEFORE_BLANK_LINE = re.compile(r'\n(?<=[^\S\n]\n)[^\S\n]*\n')
+NON_SPACE = re.compile(r'\S')
+
+
+class Segmenter:
+    """Single-pass, incremental sentence segmenter.
+
+    feed() takes text in arbitrary chunks (e.g. PDF pages as they arrive) and
+    returns (starts, ends), arrays of the [start, end) offsets of every
+    sentence known to be complete, counted from the start of the first chunk.
+    A sentence ends after a word ending in . ! ? or an ellipsis, unless the
+    word is an abbreviation or initial, or the next word starts in lower case.
+    A blank line always ends a sentence; single newlines do not, since
+    extracted PDF text wraps lines mid-sentence.
+
+    The rules live in the BOUNDARIES patterns and offsets are collected and
+    handed back in bulk. Word offsets are left to whoever needs a sentence's
+    words.
+    """
+
+    def __init__(self, offset_type="I"):
+        self.offset_type = offset_type
+        self.buffer = ""
+        self.base = 0
+        self.sentence_start = 0
+        self.scan_pos = 0
+
+    def feed(self, text):
+        self.buffer += text
+        return self._scan(final=False)
+
+    def close(self):
+        return self._scan(final=True)
+
+    def _scan(self, final):
+        buffer = self.buffer
+        base = self.base
+        start = self.sentence_start
+        if start < len(buffer) and buffer[start].isspace():
+            # Only at the start of the text; later sentences start after a boundary.
+            match = NON_SPACE.search(buffer, start)
+            start = match.start() if match else len(buffer)
+        # Sentence ends and starts, interleaved: e0, s1, e1, s2, ... Each
+        # boundary match's group spans one end and the next start, so the whole
+        # scan runs without a Python step per sentence.
+        scan_from = max(self.scan_pos, start)
+        found = []
+        for pattern in BOUNDARIES:
+            found.extend(chain.from_iterable(map(re.Match.span, pattern.finditer(buffer, scan_from), repeat(1))))
+        found.sort()
+        for match in SPACES_BEFORE_BLANK_LINE.finditer(buffer, scan_from):
+            idx = bisect_left(found, match.start())
+            if idx % 2 == 0 and idx < len(found) and found[idx] == match.start():
+                end = found[idx]
+                while buffer[end - 1].isspace():
+                    end -= 1
+                found[idx] = end
+        if base:
+            found = [offset + base for offset in found]
+        bounds = array(self.offset_type, [base + start])
+        bounds.extend(found)
+        start = bounds[-1] - base
+        if final:
+            tail = buffer[start:].rstrip()
+            if tail:
+                bounds.append(base + start + len(tail))
+                bounds.append(base + len(buffer))
+            start = pos = len(buffer)
+        else:
+            pos = self._resume_point(buffer, start)
+        # Drop text that no pending sentence can still refer to.
+        self.buffer = buffer[start:]
+        self.base = base + start
+        self.sentence_start = 0
+        self.scan_pos = pos - start
+        return bounds[0:-1:2], bounds[1::2]
+
+    @staticmethod
+    def _resume_point(buffer, pos):
+        # Rescan the trailing partial word, the whitespace before it and the
+        # word before that, whose punctuation may still become a boundary
+        # once more text arrives.
+        end = len(buffer)
+        while end > pos and not buffer[end - 1].isspace():
+            end -= 1
+        while end > pos and buffer[end - 1].isspace():
+            end -= 1
+        while end > pos and not buffer[end - 1].isspace():
+            end -= 1
+        return end
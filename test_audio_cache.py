@@ -0,0 +1,177 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import wave
+from unittest import mock
+
+from audio_cache import AudioCache, PreSynthesizer
+from tts_pipeline import CachedSpeechPipeline
+
+
+def write_wav(path, frames=100):
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(8000)
+        wav.writeframes(b"\0\0" * frames)
+
+
+class FileEngine:
+    def __init__(self):
+        self.properties = {'rate': 150, 'volume': 1.0, 'voice': 'test'}
+        self.rendered = []
+        self.pending = []
+
+    def getProperty(self, name):
+        return self.properties[name]
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def save_to_file(self, text, filename, name=None):
+        self.pending.append((text, filename))
+
+    def runAndWait(self):
+        for text, filename in self.pending:
+            self.rendered.append((text, self.properties['rate']))
+            write_wav(filename)
+        self.pending = []
+
+
+class BlockingEngine(FileEngine):
+    """Renders once released, and like pyttsx3 refuses to run its loop twice at once."""
+
+    def __init__(self):
+        super().__init__()
+        self.rendering = threading.Event()
+        self.release = threading.Event()
+        self.busy = False
+
+    def runAndWait(self):
+        if self.busy:
+            raise RuntimeError("run loop already started")
+        self.busy = True
+        try:
+            self.rendering.set()
+            self.release.wait(5)
+            super().runAndWait()
+        finally:
+            self.busy = False
+
+
+class FakePlayer:
+    def __init__(self):
+        self.played = []
+
+    def play(self, path, start_fraction, stop_flag, on_position=None):
+        self.played.append((os.path.basename(path), start_fraction))
+        if on_position:
+            on_position(1.0)
+        return True
+
+
+class TestAudioCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def add(self, cache, key):
+        temp_path = cache.temp_path(key)
+        write_wav(temp_path)
+        return cache.put(key, temp_path)
+
+    def test_evicts_least_recently_used(self):
+        cache = AudioCache(self.directory, max_bytes=1)
+        first = ("book", 0, 150, "v")
+        self.add(cache, first)
+        cache.max_bytes = 2 * cache.total_bytes
+        self.add(cache, ("book", 1, 150, "v"))
+        cache.get(first)
+        self.add(cache, ("book", 2, 150, "v"))
+        self.assertIsNotNone(cache.get(first))
+        self.assertIsNone(cache.get(("book", 1, 150, "v")))
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_invalidate_only_old_rate(self):
+        cache = AudioCache(self.directory, max_bytes=10 ** 6)
+        self.add(cache, ("book", 0, 150, "v"))
+        self.add(cache, ("book", 0, 170, "v"))
+        self.add(cache, ("other", 0, 150, "v"))
+        cache.invalidate("book", 150)
+        self.assertIsNone(cache.get(("book", 0, 150, "v")))
+        self.assertIsNotNone(cache.get(("book", 0, 170, "v")))
+        self.assertIsNotNone(cache.get(("other", 0, 150, "v")))
+
+    def test_invalidate_skips_files_that_cannot_be_removed(self):
+        cache = AudioCache(self.directory, max_bytes=10 ** 6)
+        playing = self.add(cache, ("book", 0, 150, "v"))
+        self.add(cache, ("book", 1, 150, "v"))
+        remove = os.remove
+
+        def locked_remove(path):
+            # Windows refuses to delete a file that is open for playback.
+            if path == playing:
+                raise PermissionError(13, "file in use", path)
+            remove(path)
+
+        with mock.patch("audio_cache.os.remove", locked_remove):
+            cache.invalidate("book", 150)
+        self.assertIsNone(cache.get(("book", 1, 150, "v")))
+        self.assertIsNone(cache.get(("book", 0, 150, "v")))
+        self.assertEqual(cache.total_bytes, 0)
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(playing)])
+
+    def test_entries_survive_restart(self):
+        cache = AudioCache(self.directory, max_bytes=10 ** 6)
+        self.add(cache, ("book", 3, 150, "v"))
+        write_wav(os.path.join(self.directory, "partial.tmp.wav"))
+        reopened = AudioCache(self.directory, max_bytes=10 ** 6)
+        self.assertIsNotNone(reopened.get(("book", 3, 150, "v")))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "partial.tmp.wav")))
+
+    def test_cached_pipeline_renders_once_and_replays(self):
+        cache = AudioCache(self.directory, max_bytes=10 ** 6)
+        engine = FileEngine()
+        sentences = ["Hello world.", "This is a test book."]
+        for _ in range(2):
+            synthesizer = PreSynthesizer(engine, cache, "book", sentences)
+            player = FakePlayer()
+            pipeline = CachedSpeechPipeline(synthesizer, player, sentences)
+            self.assertTrue(pipeline.run(0, 0, threading.Event()))
+            self.assertEqual(len(player.played), 2)
+        self.assertEqual(len(engine.rendered), 2)
+
+    def test_cached_pipeline_seeks_to_saved_word(self):
+        cache = AudioCache(self.directory, max_bytes=10 ** 6)
+        sentences = ["Hello world.", "This is a test book."]
+        player = FakePlayer()
+        pipeline = CachedSpeechPipeline(PreSynthesizer(FileEngine(), cache, "book", sentences), player, sentences)
+        pipeline.run(1, 2, threading.Event())
+        self.assertEqual(player.played[0][1], 8 / len(sentences[1]))
+
+    def test_pause_and_resume_during_a_render(self):
+        cache = AudioCache(self.directory, max_bytes=10 ** 6)
+        engine = BlockingEngine()
+        sentences = ["Hello world.", "This is a test book."]
+        stop_flag = threading.Event()
+        pipeline = CachedSpeechPipeline(PreSynthesizer(engine, cache, "book", sentences), FakePlayer(), sentences)
+        reader = threading.Thread(target=pipeline.run, args=(0, 0, stop_flag))
+        reader.start()
+        self.assertTrue(engine.rendering.wait(5))
+        stop_flag.set()
+        threading.Timer(0.1, engine.release.set).start()
+        reader.join(5)
+        # Resuming starts a new synthesizer on the same engine only once the old render is done.
+        player = FakePlayer()
+        pipeline = CachedSpeechPipeline(PreSynthesizer(engine, cache, "book", sentences), player, sentences)
+        self.assertTrue(pipeline.run(0, 0, threading.Event()))
+        self.assertEqual(len(player.played), 2)
+        self.assertEqual([text for text, _ in engine.rendered], sentences)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+import wave
+
+from audiobook_export import AudiobookExport, split_chapters
+
+FRAMES_PER_WORD = 100
+FRAMERATE = 8000
+
+
+class WavEngine:
+    """Writes FRAMES_PER_WORD frames of 16-bit mono audio per word; created in each worker process."""
+
+    def __init__(self):
+        self.properties = {}
+        self.pending = []
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def save_to_file(self, text, path, name=None):
+        self.pending.append((text, path))
+
+    def runAndWait(self):
+        for text, path in self.pending:
+            with wave.open(path, "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(FRAMERATE)
+                wav.writeframes(b"\1\0" * FRAMES_PER_WORD * len(text.split()))
+        self.pending.clear()
+
+
+def frames(path):
+    with wave.open(path, "rb") as wav:
+        return wav.getnframes()
+
+
+class TestAudiobookExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.parts = ["One two three. Four five.", "Six seven. Eight. Nine ten eleven twelve."]
+        self.progress = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def export(self):
+        return AudiobookExport(self.parts, self.directory, "book", workers=2, engine_factory=WavEngine,
+                               batch_sentences=1, on_progress=lambda *args: self.progress.append(args))
+
+    def test_parts_are_stitched_in_sentence_order(self):
+        export = self.export()
+        paths = export.run()
+        self.assertEqual([os.path.basename(path) for path in paths], ["book_001.wav", "book_002.wav"])
+        gap = FRAMERATE * 250 // 1000
+        self.assertEqual(frames(paths[0]), 5 * FRAMES_PER_WORD + gap)
+        self.assertEqual(frames(paths[1]), 7 * FRAMES_PER_WORD + 2 * gap)
+        self.assertEqual(export.rendered, 5)
+        self.assertEqual(self.progress[-1][:3], (5, 5, 5))
+
+    def test_rerun_only_renders_unfinished_parts(self):
+        paths = self.export().run()
+        self.assertEqual(self.export().run(), paths)
+        os.remove(paths[1])
+        export = self.export()
+        export.run()
+        self.assertEqual(export.rendered, 3)
+        self.assertEqual(frames(paths[1]), 7 * FRAMES_PER_WORD + 2 * FRAMERATE * 250 // 1000)
+
+    def test_split_chapters_before_headings(self):
+        text = "Title page.\n\nChapter 1\nIt began.\n\nCHAPTER 2\nIt ended.\n"
+        self.assertEqual(split_chapters(text), ["Title page.\n\n", "Chapter 1\nIt began.\n\n", "CHAPTER 2\nIt ended.\n"])
+        self.assertEqual(split_chapters("No headings here."), ["No headings here."])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(REPO, "benchmarks"))
+
+from bench_suite import SLACK_SECONDS, regressions, write_epub, write_txt
+from document import Document
+
+SUITE = os.path.join(REPO, "benchmarks", "bench_suite.py")
+
+
+class TestBenchSuite(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def run_suite(self, *args):
+        return subprocess.run([sys.executable, SUITE, "--sizes", "10000", "--formats", "txt", "--widgets", "mock",
+                               "--output", self.path("results.json"), "--baseline", self.path("baseline.json")]
+                              + list(args), cwd=self.directory.name, capture_output=True, text=True)
+
+    def test_txt_book_has_the_requested_sentences(self):
+        write_txt(self.path("book.txt"), 1234)
+        with open(self.path("book.txt"), encoding="utf-8") as f:
+            text = f.read()
+        document = Document(text)
+        document.segment(text)
+        self.assertEqual(len(document.sentences), 1234)
+
+    def test_epub_book_is_split_into_chapters(self):
+        from epub_book import EpubBook
+        write_epub(self.path("book.epub"), 1000)
+        book = EpubBook(self.path("book.epub"))
+        try:
+            self.assertEqual(len(book), 3)
+        finally:
+            book.close()
+
+    def test_regressions_allow_tolerance_and_slack(self):
+        baseline = {"a": 1.0, "b": 0.0001, "c": 1.0}
+        metrics = {"a": 1.4, "b": 0.0001 + SLACK_SECONDS / 2, "c": 1.6, "new": 9.0}
+        self.assertEqual([name for name, _, _ in regressions(metrics, baseline, tolerance=0.5)], ["c"])
+
+    def test_run_against_baseline(self):
+        result = self.run_suite("--save-baseline")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        with open(self.path("baseline.json")) as f:
+            baseline = json.load(f)
+        self.assertEqual(baseline["widgets"], "mock")
+        self.assertIn("txt.10000.load_book", baseline["metrics"])
+
+        # Any metric measured at more than the slack over a zero baseline is a regression.
+        baseline["metrics"] = {name: 0.0 for name in baseline["metrics"]}
+        with open(self.path("baseline.json"), "w") as f:
+            json.dump(baseline, f)
+        result = self.run_suite()
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("REGRESSION txt.10000.load_book", result.stderr)
+
+    def test_missing_baseline(self):
+        result = self.run_suite("--require-baseline")
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("No baseline", result.stderr)
+        self.assertFalse(os.path.exists(self.path("results.json")))
+        result = self.run_suite()
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("No baseline", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import time
+import unittest
+from array import array
+
+from document import OFFSET_TYPE, Document
+
+
+class TestDocument(unittest.TestCase):
+    def test_sentences_keep_offsets(self):
+        text = "  Hello world.  This is\na test.   Let's read! "
+        document = Document(text)
+        document.segment(text)
+        self.assertEqual(list(document.sentences), ["Hello world.", "This is\na test.", "Let's read!"])
+        for sentence in document.sentences:
+            self.assertEqual(text[sentence.start:sentence.end], sentence)
+        self.assertEqual(document.word_offsets(1), [0, 5, 8, 10])
+
+    def test_pages_while_loading_and_after_join(self):
+        pages = ["First page. Second sent", "ence here. Third.", "Fourth? yes"]
+        document = Document()
+        for page in pages:
+            document.add_page(page)
+        self.assertEqual(document.sentences[1], "Second sent\nence here.")
+        self.assertEqual(len(document.sentences), 3)
+        document.finish_pages()
+
+        joined = "\n".join(pages)
+        expected = Document(joined)
+        expected.segment(joined)
+        self.assertEqual(list(document.sentences), list(expected.sentences))
+        self.assertEqual(list(document.pages), pages)
+        self.assertEqual(document.page_texts, [])
+
+    def test_pages_added_in_batches(self):
+        pages = ["First page. Second sent", "ence here. Third.", "", "Fourth? yes", "Fifth."]
+        one_by_one = Document()
+        for page in pages:
+            one_by_one.add_page(page)
+        batched = Document()
+        batched.add_pages(pages[:2])
+        batched.add_pages(pages[2:])
+        self.assertEqual(list(batched.sentences), list(one_by_one.sentences))
+        self.assertEqual(batched.page_offsets, one_by_one.page_offsets)
+        self.assertEqual(len(batched), len(one_by_one))
+
+    def test_seek_by_page_and_fraction(self):
+        document = Document()
+        for page in ["One. Two.", "Three spans", "pages. Four."]:
+            document.add_page(page)
+        document.finish_pages()
+        self.assertEqual(list(document.sentences), ["One.", "Two.", "Three spans\npages.", "Four."])
+        self.assertEqual([document.page_sentences(page) for page in range(3)], [range(0, 2), range(2, 3), range(3, 4)])
+        self.assertEqual([document.page_of_sentence(idx) for idx in range(4)], [0, 0, 1, 2])
+        self.assertEqual(document.sentence_at(4), 1)  # the space after "One."
+        self.assertEqual(document.sentence_at_fraction(0.0), 0)
+        self.assertEqual(document.sentence_at_fraction(1.0), 3)
+        self.assertEqual(document.word_offsets(2), [0, 6, 12])
+
+    def test_seeks_on_a_million_sentences_stay_under_a_millisecond(self):
+        count = 1_000_000
+        # "Word is. " repeated, ten sentences per page, offsets filled in directly.
+        document = Document("Word is. " * count)
+        document.sentence_starts = array(OFFSET_TYPE, range(0, 9 * count, 9))
+        document.sentence_ends = array(OFFSET_TYPE, range(8, 9 * count, 9))
+        document.page_offsets = array(OFFSET_TYPE, range(0, 9 * count, 90))
+        start = time.perf_counter()
+        for i in range(1000):
+            fraction = i / 1000
+            document.sentence_at_fraction(fraction)
+            document.page_sentences(int(fraction * len(document.page_offsets)))
+            document.page_of_sentence(int(fraction * count))
+        per_seek = (time.perf_counter() - start) / 3000
+        self.assertLess(per_seek, 0.001)
+        self.assertEqual(document.sentence_at_fraction(0.5), count // 2)
+        self.assertEqual(document.page_sentences(12345), range(123450, 123460))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import zipfile
+import zlib
+
+from epub_book import EpubBook
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+MISSING_ITEM = '<item id="ghost" href="images/ghost.png" media-type="image/png"/>'
+
+
+def write_epub(path, chapter_count, extra_manifest=""):
+    manifest = "".join(f'<item id="c{i}" href="text/chapter%20{i}.xhtml" media-type="application/xhtml+xml"/>'
+                       for i in range(chapter_count)) + '<item id="css" href="style.css" media-type="text/css"/>' \
+        + extra_manifest
+    spine = "".join(f'<itemref idref="c{i}"/>' for i in range(chapter_count))
+    with zipfile.ZipFile(path, "w") as book:
+        book.writestr("mimetype", "application/epub+zip")
+        book.writestr("META-INF/container.xml", CONTAINER)
+        book.writestr("OEBPS/content.opf", f'<package xmlns="http://www.idpf.org/2007/opf" version="3.0">'
+                                           f'<manifest>{manifest}</manifest><spine>{spine}</spine></package>')
+        book.writestr("OEBPS/style.css", "p { margin: 0 }")
+        for i in range(chapter_count):
+            book.writestr(f"OEBPS/text/chapter {i}.xhtml",
+                          f"<html><head><title>{i}</title></head><body><p>Chapter {i}</p></body></html>")
+
+
+class TestEpubBook(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "book.epub")
+        write_epub(self.path, 6)
+        self.book = EpubBook(self.path, cache_bytes=300)
+
+    def tearDown(self):
+        self.book.close()
+        shutil.rmtree(self.directory)
+
+    def test_chapters_in_spine_order(self):
+        self.assertEqual(len(self.book), 6)
+        self.assertEqual(self.book.chapter(0), "<body><p>Chapter 0</p></body>")
+        self.assertEqual(self.book.chapter(4), "<body><p>Chapter 4</p></body>")
+        self.assertEqual(self.book.chapter_text(4), "Chapter 4")
+
+    def test_neighbours_are_prefetched(self):
+        self.book.chapter(2)
+        deadline = time.monotonic() + 5
+        while not {"c1", "c3"} <= set(self.book.cache) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue({"c1", "c2", "c3"} <= set(self.book.cache))
+
+    def test_prefetch_carries_on_after_a_corrupt_item(self):
+        book = EpubBook(self.path, prefetch=2)
+        read = book.read
+        corrupt = book.chapter_path(3)
+
+        def read_or_fail(path):
+            if path == corrupt:
+                raise zlib.error("invalid stored block lengths")
+            return read(path)
+
+        book.read = read_or_fail
+        try:
+            book.chapter(2)
+            deadline = time.monotonic() + 5
+            while not {"c1", "c4"} <= set(book.cache) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertTrue({"c1", "c4"} <= set(book.cache))
+            self.assertNotIn("c3", book.cache)
+            self.assertTrue(book.worker.is_alive())
+        finally:
+            book.close()
+
+    def test_cache_is_bounded_in_bytes(self):
+        for i in range(6):
+            self.book.chapter(i)
+        self.assertLessEqual(self.book.cached_bytes, 300)
+        self.assertLess(len(self.book.cache), 6)
+
+    def test_resources_by_id_and_path(self):
+        self.assertEqual(self.book.item("css"), (b"p { margin: 0 }", "text/css"))
+        self.assertEqual(self.book.chapter_path(3), "OEBPS/text/chapter 3.xhtml")
+        self.assertEqual(self.book.spine_index("OEBPS/text/chapter 3.xhtml"), 3)
+        self.assertIsNone(self.book.spine_index("OEBPS/style.css"))
+
+    def test_manifest_item_missing_from_archive(self):
+        path = os.path.join(self.directory, "broken.epub")
+        write_epub(path, 2, MISSING_ITEM)
+        book = EpubBook(path)
+        try:
+            for _ in range(2):  # a failed read does not leave the item marked as loading
+                with self.assertRaises(KeyError):
+                    book.item("ghost")
+            self.assertEqual(book.item("css")[1], "text/css")
+        finally:
+            book.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
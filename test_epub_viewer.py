@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from epub_book import EpubBook
+from test_epub_book import MISSING_ITEM, write_epub
+
+try:
+    from PyQt5.QtWebEngineCore import QWebEngineUrlRequestJob
+    from epub import EpubSchemeHandler
+except ImportError:
+    EpubSchemeHandler = None
+
+
+class FakeUrl:
+    def __init__(self, path):
+        self._path = path
+
+    def path(self):
+        return self._path
+
+
+class FakeJob:
+    def __init__(self, path):
+        self.url = FakeUrl("/" + path)
+        self.failed = None
+
+    def requestUrl(self):
+        return self.url
+
+    def fail(self, error):
+        self.failed = error
+
+
+class CorruptBook:
+    ids_by_path = {"OEBPS/c0.xhtml": "c0"}
+
+    def item(self, item_id):
+        raise zipfile.BadZipFile("Bad CRC-32 for file 'OEBPS/c0.xhtml'")
+
+
+@unittest.skipIf(EpubSchemeHandler is None, "PyQt5 with QtWebEngine is not installed")
+class TestEpubSchemeHandler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.handler = EpubSchemeHandler()
+
+    def tearDown(self):
+        if isinstance(self.handler.book, EpubBook):
+            self.handler.book.close()
+        shutil.rmtree(self.directory)
+
+    def test_manifest_item_missing_from_archive_is_not_found(self):
+        path = os.path.join(self.directory, "broken.epub")
+        write_epub(path, 1, MISSING_ITEM)
+        self.handler.book = EpubBook(path)
+        job = FakeJob("OEBPS/images/ghost.png")
+        self.handler.requestStarted(job)
+        self.assertEqual(job.failed, QWebEngineUrlRequestJob.UrlNotFound)
+
+    def test_unreadable_item_fails_the_request(self):
+        self.handler.book = CorruptBook()
+        job = FakeJob("OEBPS/c0.xhtml")
+        self.handler.requestStarted(job)
+        self.assertEqual(job.failed, QWebEngineUrlRequestJob.RequestFailed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from bench_suite import LINES_PER_PAGE, write_pdf
+
+
+@unittest.skipIf(importlib.util.find_spec("PyPDF2") is None, "PyPDF2 is not installed")
+class TestPdfLoader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "book.pdf")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def load(self, loader):
+        pages = []
+        deadline = time.monotonic() + 60
+        while not loader.done and time.monotonic() < deadline:
+            pages += loader.poll()
+            time.sleep(0.01)
+        return pages
+
+    def test_pages_arrive_in_order_across_workers(self):
+        from PyPDF2 import PdfReader
+        from pdf_loader import PdfLoader
+        write_pdf(self.path, 30 * LINES_PER_PAGE)
+        loader = PdfLoader(self.path, workers=2)
+        # Page 0 alone, then four ranges per worker over the rest.
+        self.assertEqual(loader.chunk_pages, -(-(loader.page_count - 1) // 8))
+        self.assertEqual(self.load(loader), [page.extract_text() for page in PdfReader(self.path).pages])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from position_store import PositionStore
+
+
+class TestPositionStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, "positions.db")
+        self.book_path = os.path.join(self.directory, "book.txt")
+        with open(self.book_path, "w", encoding="utf-8") as f:
+            f.write("Hello world. This is a test book. Let's read!")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_positions_survive_reopen(self):
+        store = PositionStore(self.db_path)
+        store.save(self.book_path, 2, 3)
+        store.save(self.book_path, 2, 4)
+        store.close()
+        store = PositionStore(self.db_path)
+        self.assertEqual(store.load(self.book_path), (2, 4))
+        store.close()
+
+    def test_save_and_flush_after_close_are_ignored(self):
+        store = PositionStore(self.db_path)
+        store.save(self.book_path, 1, 1)
+        store.close()
+        store.save(self.book_path, 5, 0)
+        store.flush()
+        store.close()
+        store = PositionStore(self.db_path)
+        self.assertEqual(store.load(self.book_path), (1, 1))
+        store.close()
+
+    def test_moved_book_keeps_position(self):
+        store = PositionStore(self.db_path)
+        store.save(self.book_path, 1, 2)
+        store.flush()
+        moved_path = os.path.join(self.directory, "renamed.txt")
+        os.rename(self.book_path, moved_path)
+        self.assertEqual(store.load(moved_path), (1, 2))
+        store.close()
+
+    def test_imports_legacy_json(self):
+        legacy_path = os.path.join(self.directory, "last_read_position.json")
+        with open(legacy_path, "w") as f:
+            json.dump({self.book_path: {"sentence": 5, "word": 1}, "C:/missing.pdf": {"sentence": 7, "word": 0}}, f)
+        store = PositionStore(self.db_path, legacy_json=legacy_path)
+        self.assertEqual(store.load(self.book_path), (5, 1))
+        self.assertEqual(store.load("C:/missing.pdf"), (7, 0))
+        self.assertEqual(len(store.books()), 2)
+        store.close()
+
+    def test_unknown_book_starts_at_beginning(self):
+        store = PositionStore(self.db_path)
+        self.assertEqual(store.load(self.book_path), (0, 0))
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
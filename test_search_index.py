@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from search_index import SearchIndex
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.index = SearchIndex(os.path.join(self.directory, "search.db"))
+        self.index.index_book("a.txt", "fa", ["The cat sat.", "A dog barked.", "The cat ran away."])
+        self.index.index_book("b.txt", "fb", ["No cats here.", "Only the cat sat down."])
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.directory)
+
+    def test_phrase_in_book_and_library(self):
+        self.assertEqual(self.index.find("cat sat", path="a.txt"), [("a.txt", 0, "The cat sat.")])
+        self.assertEqual([(path, idx) for path, idx, _ in self.index.find("the CAT")],
+                         [("a.txt", 0), ("a.txt", 2), ("b.txt", 1)])
+        self.assertEqual(self.index.find("cat", path="a.txt", start=1, limit=1), [("a.txt", 2, "The cat ran away.")])
+        self.assertEqual(self.index.find("sat cat"), [])
+        self.assertEqual(self.index.find('say "hi"'), [])
+        self.assertEqual(self.index.find("cat", path="missing.txt"), [])
+
+    def test_incremental_update(self):
+        self.assertTrue(self.index.is_current("a.txt", "fa"))
+        self.assertEqual(self.index.index_book("a.txt", "fa", ["ignored"]), 0)
+        written = self.index.index_book("a.txt", "fa2", ["The cat sat.", "A bird sang."])
+        self.assertEqual(written, 1)
+        self.assertEqual(self.index.find("cat", path="a.txt"), [("a.txt", 0, "The cat sat.")])
+        self.assertEqual(self.index.find("bird"), [("a.txt", 1, "A bird sang.")])
+
+    def test_find_does_not_wait_for_an_open_write(self):
+        results = []
+        with self.index.lock, self.index.connection:
+            # A book being indexed: the write transaction is open and uncommitted.
+            self.index.connection.execute("INSERT INTO books (path) VALUES ('c.txt')")
+            self.index.connection.execute("INSERT INTO sentence_text (rowid, text) VALUES (?, 'The cat hid.')",
+                                          (3 << 24,))
+            search = threading.Thread(target=lambda: results.append(self.index.find("cat")))
+            search.start()
+            search.join(5)
+        self.assertFalse(search.is_alive())
+        self.assertEqual([(path, idx) for path, idx, _ in results[0]], [("a.txt", 0), ("a.txt", 2), ("b.txt", 1)])
+
+    def test_remove_book(self):
+        self.index.remove_book("b.txt")
+        self.assertEqual(self.index.books(), ["a.txt"])
+        self.assertEqual([path for path, _, _ in self.index.find("cat")], ["a.txt", "a.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
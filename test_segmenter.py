@@ -0,0 +1,50 @@
+import unittest
+
+from segmenter import Segmenter
+
+
+def segment(*chunks):
+    text = "".join(chunks)
+    segmenter = Segmenter()
+    spans = []
+    for chunk in chunks:
+        spans.extend(zip(*segmenter.feed(chunk)))
+    spans.extend(zip(*segmenter.close()))
+    return [text[start:end] for start, end in spans], spans
+
+
+class TestSegmenter(unittest.TestCase):
+    def test_basic_sentences(self):
+        sentences, _ = segment("Hello world. This is a test book. Let's read!")
+        self.assertEqual(sentences, ["Hello world.", "This is a test book.", "Let's read!"])
+
+    def test_abbreviations_and_initials(self):
+        sentences, _ = segment("Mr. Smith met Dr. J. R. Watson, e.g. at noon. They talked.")
+        self.assertEqual(sentences, ["Mr. Smith met Dr. J. R. Watson, e.g. at noon.", "They talked."])
+
+    def test_ellipses_and_quotes(self):
+        sentences, _ = segment('He paused... and went on. "Really?" she asked. Wait… Then go!')
+        self.assertEqual(sentences, ["He paused... and went on.", '"Really?" she asked.', "Wait…", "Then go!"])
+
+    def test_newlines(self):
+        sentences, _ = segment("A line that wraps\nmid sentence. Next one\n\nChapter Two\nIt begins.")
+        self.assertEqual(sentences, ["A line that wraps\nmid sentence.", "Next one", "Chapter Two\nIt begins."])
+
+    def test_offsets(self):
+        _, spans = segment("  Hello   world. Bye.")
+        self.assertEqual(spans, [(2, 16), (17, 21)])
+
+    def test_next_word_case(self):
+        sentences, _ = segment("It is 5 p.m. now. Ça va? «Oui.» élan. Ωmega. 1. Two.\n\n  \nEnd.")
+        self.assertEqual(sentences, ["It is 5 p.m. now.", "Ça va?", "«Oui.» élan.", "Ωmega.", "1.", "Two.", "End."])
+
+    def test_chunks_match_single_pass(self):
+        text = "First page. Second sent\nence here. Third.\nFourth? yes. Mr. Lee... waited. End."
+        whole = segment(text)
+        for size in (1, 3, 7, 20):
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            self.assertEqual(segment(*chunks), whole)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,10 +2,17 @@ import unittest
 import os
 import time
 import tkinter as tk
+import index
 from index import SmartBookReaderApp  # your main app class
 from unittest.mock import patch
+from position_store import file_fingerprint
 
 SAVE_FILE = "last_read_position.json"
+POSITION_DB = "reading_positions.db"
+SEARCH_DB = "search_index.db"
+
+# Silent engine with timed word events, so the tests need no audio device.
+index.TTS_BACKEND = "fake"
 
 class TestSmartBookReader(unittest.TestCase):
 
@@ -29,11 +36,26 @@ class TestSmartBookReader(unittest.TestCase):
             os.remove(SAVE_FILE)
 
     def tearDown(self):
+        if self.app.background_start:
+            self.root.after_cancel(self.app.background_start)
+        self.app.speech.shutdown(timeout=2)
+        self.app.ui.stop()
+        self.app.position_store.close()
+        self.app.search_index.close()
+        for suffix in ("", "-wal", "-shm"):
+            for db in (POSITION_DB, SEARCH_DB):
+                if os.path.exists(db + suffix):
+                    os.remove(db + suffix)
         if os.path.exists(self.test_book_path):
             os.remove(self.test_book_path)
         if os.path.exists(SAVE_FILE):
             os.remove(SAVE_FILE)
 
+    def load_and_wait(self, path):
+        self.app.load_book(path)
+        while not self.app.loaded.is_set():
+            self.root.update()
+
     def test_load_book_and_split_sentences(self):
         self.app.load_book(self.test_book_path)
         self.assertEqual(len(self.app.sentences), 3)
@@ -58,8 +80,10 @@ class TestSmartBookReader(unittest.TestCase):
         self.app.volume_var.set(0.5)
         self.app.update_volume()
 
-        self.assertEqual(self.app.engine.getProperty('rate'), 180)
-        self.assertAlmostEqual(self.app.engine.getProperty('volume'), 0.5, places=1)
+        # The engine lives on the speech thread; wait for it to apply both commands.
+        self.assertTrue(self.app.speech.sync())
+        self.assertEqual(self.app.speech.engine.getProperty('rate'), 180)
+        self.assertAlmostEqual(self.app.speech.engine.getProperty('volume'), 0.5, places=1)
 
     def test_font_size_controls(self):
         initial_size = self.app.font_size
@@ -82,5 +106,100 @@ class TestSmartBookReader(unittest.TestCase):
         self.app.remove_highlight()
         self.assertEqual(self.app.text_display.tag_ranges("highlight"), ())
 
+    def test_highlight_repeated_sentence_uses_its_own_range(self):
+        with open(self.test_book_path, "w", encoding="utf-8") as f:
+            f.write("Again.  Once more.\nAgain.")
+        self.app.load_book(self.test_book_path)
+        self.app.highlight_sentence(self.app.sentences[2])
+        ranges = [str(index) for index in self.app.text_display.tag_ranges("highlight")]
+        self.assertEqual(ranges, ["2.0", "2.6"])
+
+    def test_word_updates_are_coalesced_into_one_frame(self):
+        self.app.load_book(self.test_book_path)
+        self.app.on_sentence_started(1, 0)
+        for word in range(4):
+            self.app.on_word_started(1, word)
+        self.app.ui.flush()
+        self.assertEqual(self.app.ui.coalesced, 3)
+        ranges = self.app.text_display.tag_ranges("word")
+        self.assertEqual(self.app.text_display.get(*ranges), "book.")
+        self.assertEqual(self.app.progress['value'], 13)  # "This" starts at offset 13
+
+    def test_loading_another_book_drops_updates_from_the_old_one(self):
+        self.app.load_book(self.test_book_path)
+        self.app.start_reading()
+        other_path = "test_other_book.txt"
+        with open(other_path, "w", encoding="utf-8") as f:
+            f.write("Only one sentence here.")
+        try:
+            self.app.load_book(other_path)
+            self.assertFalse(self.app.is_reading)
+            # A word event from the old book's read arrives after the switch.
+            self.app.on_word_started(2, 1)
+            self.app.ui.flush()
+            self.assertEqual(self.app.current_sentence_index, 0)
+            self.assertEqual(self.app.load_position_for_book(other_path), (0, 0))
+        finally:
+            os.remove(other_path)
+
+    def test_jump_to_percent_moves_the_read_position(self):
+        self.app.load_book(self.test_book_path)
+        self.app.jump_to_percent(50)
+        self.assertEqual((self.app.current_sentence_index, self.app.current_word_index), (1, 0))
+        self.assertEqual(self.app.text_display.get(*self.app.text_display.tag_ranges("highlight")),
+                         "This is a test book.")
+        self.assertEqual(self.app.load_position_for_book(self.test_book_path), (1, 0))
+
+    def test_find_in_book_moves_to_the_next_match(self):
+        self.app.load_book(self.test_book_path)
+        self.app.search_index.index_book(self.test_book_path, file_fingerprint(self.test_book_path),
+                                         self.app.document.sentences)
+        self.app.search_entry.insert(0, "test book")
+        self.app.find_in_book()
+        self.assertEqual(self.app.current_sentence_index, 1)
+
+    def test_large_text_book_is_windowed(self):
+        with open(self.test_book_path, "w", encoding="utf-8") as f:
+            for i in range(50000):
+                f.write(f"Sentence number {i} is here.\n")
+        self.load_and_wait(self.test_book_path)
+        self.assertTrue(self.app.windowed)
+        displayed = self.app.text_display.get("1.0", "end-1c")
+        self.assertLess(len(displayed), len(self.app.book_text))
+
+        sentence = self.app.sentences[45000]
+        self.app.highlight_sentence(sentence)
+        self.assertEqual(self.app.text_display.get(*self.app.text_display.tag_ranges("highlight")), sentence)
+
+    def test_large_text_book_is_segmented_between_events(self):
+        with open(self.test_book_path, "w", encoding="utf-8") as f:
+            for i in range(100000):
+                f.write(f"Sentence number {i} is here. ")
+        self.app.load_book(self.test_book_path)
+        # load_book returns after the first slice; the rest is split from the event loop.
+        self.assertFalse(self.app.loaded.is_set())
+        self.assertLess(len(self.app.sentences), 100000)
+        while not self.app.loaded.is_set():
+            self.root.update()
+        self.assertEqual(len(self.app.sentences), 100000)
+        self.assertEqual(self.app.sentences[99999], "Sentence number 99999 is here.")
+
+    def test_highlight_latency_stays_flat(self):
+        with open(self.test_book_path, "w", encoding="utf-8") as f:
+            for i in range(100000):
+                f.write(f"Sentence number {i} is here.{chr(10) if i % 10 == 9 else ' '}")
+        self.load_and_wait(self.test_book_path)
+        self.assertEqual(len(self.app.sentences), 100000)
+
+        def average_latency(first):
+            start = time.perf_counter()
+            for sentence in self.app.sentences[first:first + 200]:
+                self.app.highlight_sentence(sentence)
+            return (time.perf_counter() - start) / 200
+
+        early = average_latency(0)
+        late = average_latency(99000)
+        self.assertLess(late, early * 5 + 0.001)
+
 if __name__ == "__main__":
     unittest.main()
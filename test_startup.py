@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("pyttsx3", "speech_recognition", "pyaudio", "PyPDF2")
+# Budgets are several times what a laptop measures, so only real regressions trip them.
+IMPORT_BUDGET_MS = 400
+FIRST_PAINT_BUDGET_MS = 1500
+
+FIRST_PAINT = """
+import sys, time
+start = time.perf_counter()
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError:
+    sys.exit(2)
+import index
+app = index.SmartBookReaderApp(root)
+root.update()
+print(time.perf_counter() - start)
+app.on_close()
+"""
+
+
+class TestStartup(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_python(self, *args):
+        return subprocess.run([sys.executable] + list(args), cwd=self.directory.name, capture_output=True,
+                              text=True, env=dict(os.environ, PYTHONPATH=REPO))
+
+    def test_heavy_modules_are_not_imported_at_startup(self):
+        result = self.run_python("-c", "import sys, index; print(' '.join(sorted(sys.modules)))")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual([name for name in HEAVY_MODULES if name in result.stdout.split()], [])
+
+    def test_import_time(self):
+        result = self.run_python("-X", "importtime", "-c", "import index")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        line = [line for line in result.stderr.splitlines() if line.rstrip().endswith("| index")][0]
+        cumulative_ms = int(line.split("|")[1]) / 1000
+        self.assertLess(cumulative_ms, IMPORT_BUDGET_MS)
+
+    def test_time_to_first_paint(self):
+        result = self.run_python("-c", FIRST_PAINT)
+        if result.returncode == 2:
+            self.skipTest("no display")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertLess(float(result.stdout.split()[0]) * 1000, FIRST_PAINT_BUDGET_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from document import Document
+from text_cache import TextCache
+
+
+class TestTextCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.book_path = os.path.join(self.directory, "book.pdf")
+        with open(self.book_path, "wb") as f:
+            f.write(b"%PDF-1.4 fake")
+        self.cache = TextCache(os.path.join(self.directory, "cache"), max_bytes=10 ** 6)
+        self.document = Document()
+        for page in ["Café one. Two.", "Page two."]:
+            self.document.add_page(page)
+        self.document.finish_pages()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        self.cache.put(self.book_path, self.document)
+        document = TextCache(self.cache.directory, max_bytes=10 ** 6).get(self.book_path)
+        self.assertEqual(document.text, self.document.text)
+        self.assertEqual(list(document.pages), ["Café one. Two.", "Page two."])
+        self.assertEqual(list(document.sentences), ["Café one.", "Two.", "Page two."])
+        self.assertEqual(document.word_offsets(2), [0, 5])
+
+    def test_modified_file_misses(self):
+        self.cache.put(self.book_path, self.document)
+        with open(self.book_path, "ab") as f:
+            f.write(b" changed")
+        self.assertIsNone(self.cache.get(self.book_path))
+
+    def test_invalidate_and_eviction(self):
+        self.cache.put(self.book_path, self.document)
+        self.cache.invalidate(self.book_path)
+        self.assertIsNone(self.cache.get(self.book_path))
+
+        other_path = os.path.join(self.directory, "other.txt")
+        with open(other_path, "w") as f:
+            f.write("other")
+        self.cache.put(self.book_path, self.document)
+        self.cache.max_bytes = self.cache.total_bytes
+        self.cache.put(other_path, self.document)
+        self.assertIsNone(self.cache.get(self.book_path))
+        self.assertIsNotNone(self.cache.get(other_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import timeit
+import unittest
+
+import tracing
+from document import Document
+from position_store import PositionStore
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.tracer = tracing.enable(os.path.join(self.directory, "trace.json"), report_at_exit=False)
+
+    def tearDown(self):
+        tracing.disable()
+        shutil.rmtree(self.directory)
+
+    def test_stages_are_recorded_as_chrome_trace_events(self):
+        document = Document("One. Two.")
+        document.segment(document.text)
+        store = PositionStore(os.path.join(self.directory, "positions.db"))
+        store.save("book.txt", 1, 0)
+        store.close()
+        self.tracer.write()
+        with open(self.tracer.path) as f:
+            events = json.load(f)["traceEvents"]
+        names = {event["name"] for event in events if event["ph"] == "X"}
+        self.assertTrue({"document.segment", "positions.save", "positions.flush"} <= names)
+        segment = [event for event in events if event["name"] == "document.segment"][0]
+        self.assertEqual(segment["args"], {"chars": 9})
+        self.assertGreaterEqual(segment["dur"], 0)
+
+    def test_summary_percentiles(self):
+        for ms in range(1, 101):
+            tracing.record("stage", time.perf_counter(), ms / 1000)
+        out = io.StringIO()
+        self.tracer.print_summary(out)
+        name, count, p50, p90, p99, longest, total = self.tracer.summary()[0]
+        self.assertEqual((name, count), ("stage", 100))
+        self.assertAlmostEqual(p50, 51)
+        self.assertAlmostEqual(p90, 91)
+        self.assertAlmostEqual(p99, 100)
+        self.assertAlmostEqual(total, 5050)
+        self.assertIn("stage", out.getvalue())
+
+    def test_event_loop_lag(self):
+        timers = []
+        tracing.watch_event_loop(lambda ms, callback: timers.append(callback), "loop_lag", interval_ms=10)
+        time.sleep(0.03)
+        timers.pop(0)()
+        self.assertEqual(len(timers), 1)  # re-armed
+        lag = self.tracer.durations["loop_lag"][0]
+        self.assertGreater(lag, 0.015)
+
+    def test_flag_and_environment_variable(self):
+        tracing.disable()
+        self.assertEqual(tracing.enable_from_args(["a.epub", "--profile=out.json"]), ["a.epub"])
+        self.assertEqual(tracing.disable().path, "out.json")
+        os.environ[tracing.ENV_VAR] = "env.json"
+        try:
+            self.assertEqual(tracing.enable_from_args([]), [])
+            self.assertEqual(tracing.disable().path, "env.json")
+        finally:
+            del os.environ[tracing.ENV_VAR]
+        self.assertEqual(tracing.enable_from_args(["book.txt"]), ["book.txt"])
+        self.assertFalse(tracing.enabled())
+
+    def test_disabled_overhead(self):
+        tracing.disable()
+
+        def traced():
+            with tracing.span("stage", n=1):
+                pass
+        calls = 100000
+        per_call = min(timeit.repeat(traced, number=calls, repeat=3)) / calls
+        self.assertLess(per_call, 2e-6)
+        self.assertIsNone(tracing.disable())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import threading
+import time
+import unittest
+
+from tts_actor import SpeechActor
+from tts_pipeline import SpeechPipeline, word_offsets
+
+
+class TimedEngine:
+    """Speaks one word every word_seconds from iterate(), like a real engine's external loop."""
+
+    def __init__(self, word_seconds=0.02):
+        self.word_seconds = word_seconds
+        self.callbacks = {}
+        self.properties = {'rate': 150, 'volume': 1.0}
+        self.said = []
+        self.utterance = None
+        self.stopped_at = None
+
+    def connect(self, topic, cb):
+        self.callbacks.setdefault(topic, []).append(cb)
+        return (topic, cb)
+
+    def disconnect(self, token):
+        self.callbacks[token[0]].remove(token[1])
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def getProperty(self, name):
+        return self.properties[name]
+
+    def say(self, text, name=None):
+        self.said.append((text, self.properties['rate']))
+        self.utterance = [name, word_offsets(text), 0.0]
+
+    def startLoop(self, useDriverLoop=True):
+        pass
+
+    def endLoop(self):
+        pass
+
+    def stop(self):
+        self.stopped_at = time.perf_counter()
+        if self.utterance:
+            name = self.utterance[0]
+            self.utterance = None
+            self._notify('finished-utterance', name=name, completed=False)
+
+    def iterate(self):
+        if not self.utterance or time.perf_counter() - self.utterance[2] < self.word_seconds:
+            return
+        name, offsets, _ = self.utterance
+        if offsets:
+            self.utterance[2] = time.perf_counter()
+            self._notify('started-word', name=name, location=offsets.pop(0), length=1)
+        else:
+            self.utterance = None
+            self._notify('finished-utterance', name=name, completed=True)
+
+    def _notify(self, topic, **kwargs):
+        for cb in self.callbacks.get(topic, []):
+            cb(**kwargs)
+
+
+class TestSpeechActor(unittest.TestCase):
+    sentences = ["One two three four five six seven eight.", "Nine ten eleven.", "Twelve thirteen."]
+
+    def setUp(self):
+        self.engine = TimedEngine()
+        self.words = []
+        self.stopped = threading.Event()
+        self.result = None
+        self.actor = SpeechActor(lambda: self.engine, self.create_pipeline, self.on_stopped).start()
+
+    def tearDown(self):
+        self.actor.shutdown(timeout=2)
+
+    def create_pipeline(self, engine):
+        return SpeechPipeline(engine, self.sentences, on_word=lambda s, w: self.words.append((s, w)))
+
+    def on_stopped(self, finished, sentence_idx, word_idx, error):
+        self.result = (finished, sentence_idx, word_idx, error)
+        self.stopped.set()
+
+    def wait_for_words(self, count):
+        deadline = time.monotonic() + 5
+        while len(self.words) < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def test_pause_latency(self):
+        latencies = []
+        for _ in range(5):
+            self.stopped.clear()
+            self.actor.say()
+            self.wait_for_words(len(self.words) + 2)
+            start = time.perf_counter()
+            self.actor.pause()
+            self.assertLess(time.perf_counter() - start, 0.005)  # never blocks the caller
+            self.assertTrue(self.stopped.wait(2))
+            latencies.append(self.engine.stopped_at - self.actor.pause_requested)
+        self.assertLess(max(latencies), 0.05)
+        self.assertFalse(self.result[0])
+        # Resuming starts at the word that was interrupted.
+        sentence_idx, word_idx = self.result[1:3]
+        self.assertEqual(self.words[-1], (sentence_idx, word_idx))
+
+    def test_rate_change_applies_from_current_word(self):
+        self.actor.say(0, 0)
+        self.wait_for_words(3)
+        self.actor.set_rate(250)
+        self.assertTrue(self.actor.sync())
+        text, rate = self.engine.said[-1]
+        self.assertEqual(rate, 250)
+        self.assertTrue(self.sentences[0].endswith(text))
+        self.assertNotEqual(text, self.sentences[0])
+        self.actor.pause()
+        self.assertTrue(self.stopped.wait(2))
+
+    def test_seek_and_finish(self):
+        self.actor.say(0, 0)
+        self.wait_for_words(1)
+        self.actor.seek(2)
+        self.assertTrue(self.stopped.wait(5))
+        self.assertEqual(self.result, (True, 0, 0, None))
+        self.assertEqual(self.engine.said[-1][0], self.sentences[2])
+
+    def test_properties_set_while_idle(self):
+        self.actor.set_rate(180)
+        self.actor.set_volume(0.5)
+        self.assertTrue(self.actor.sync())
+        self.assertEqual(self.engine.getProperty('rate'), 180)
+        self.assertEqual(self.engine.getProperty('volume'), 0.5)
+
+    def test_call_runs_on_the_actor_thread_in_order(self):
+        calls = []
+        self.actor.set_rate(180)
+        self.actor.call(lambda tag: calls.append((tag, threading.current_thread(), self.engine.getProperty('rate'))),
+                        "after rate")
+        self.assertTrue(self.actor.sync())
+        self.assertEqual(calls, [("after rate", self.actor.thread, 180)])
+
+    def test_engine_is_created_on_first_command(self):
+        created = []
+        actor = SpeechActor(lambda: created.append(1) or self.engine, self.create_pipeline, self.on_stopped)
+        self.assertTrue(actor.sync())
+        self.assertEqual(created, [])
+        actor.say(2, 0)
+        self.assertTrue(self.stopped.wait(5))
+        self.assertEqual(created, [1])
+        self.assertEqual(self.result, (True, 0, 0, None))
+        actor.shutdown(timeout=2)
+
+    def test_engine_failure_is_reported_on_read(self):
+        def no_engine():
+            raise OSError("no audio device")
+        actor = SpeechActor(no_engine, self.create_pipeline, self.on_stopped)
+        actor.set_rate(200)
+        actor.say(1, 0)
+        self.assertTrue(self.stopped.wait(5))
+        self.assertEqual(self.result[:3], (False, 1, 0))
+        self.assertIsInstance(self.result[3], OSError)
+        actor.shutdown(timeout=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,280 @@
+import os
+import shutil
+import re
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+import wave
+
+from tts_backends import (BackendError, DriverLoopEngine, EspeakEngine, FakeEngine, create_engine, create_render_engine,
+                          pyttsx3_engine)
+from tts_pipeline import SpeechPipeline
+
+try:
+    import pyttsx3
+except ImportError:
+    pyttsx3 = None
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_RATE = 8000
+
+
+class WordSynth:
+    """Synthesizer for espeak_worker.serve: 60 / rate seconds of audio per word, all samples equal to its number."""
+
+    sample_rate = SAMPLE_RATE
+
+    def synthesize(self, text, rate, volume, voice, on_audio, on_word):
+        samples = SAMPLE_RATE * 60 // rate
+        location = 0
+        for number, word in enumerate(text.split()):
+            location = text.index(word, location)
+            on_word(location, len(word), number * samples)
+            on_audio(number.to_bytes(2, "little") * samples)
+            location += len(word)
+
+
+class SlowSynth(WordSynth):
+    def synthesize(self, *args):
+        time.sleep(0.5)
+        super().synthesize(*args)
+
+
+class BrokenSynth:
+    def __init__(self):
+        raise OSError("libespeak-ng not found")
+
+
+class StubDriver:
+    """pyttsx3 driver shaped like its eSpeak driver: say() only stores the text,
+    which is spoken inside startLoop(), and word events are named after the word."""
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.text = None
+        self.properties = {'rate': 200, 'volume': 1.0, 'voice': 'stub'}
+
+    def destroy(self):
+        pass
+
+    def getProperty(self, name):
+        return self.properties[name]
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def say(self, text):
+        self.text = text
+
+    def stop(self):
+        pass
+
+    def startLoop(self):
+        self.proxy.setBusy(False)
+        self.speak(name_words=True)
+
+    def endLoop(self):
+        pass
+
+    def iterate(self):
+        pass
+
+    def speak(self, name_words):
+        if not self.text:
+            return
+        text, self.text = self.text, None
+        self.proxy.notify('started-utterance')
+        for match in re.finditer(r'\S+', text):
+            name = {'name': match.group()} if name_words else {}
+            self.proxy.notify('started-word', location=match.start() + 1, length=len(match.group()), **name)
+        self.proxy.notify('finished-utterance', completed=True)
+
+
+class StubLoopDriver(StubDriver):
+    """pyttsx3 driver shaped like its SAPI5 and NSSS drivers, whose iterate() is a generator."""
+
+    def say(self, text):
+        self.proxy.setBusy(True)
+        self.text = text
+
+    def iterate(self):
+        self.proxy.setBusy(False)
+        while True:
+            if self.text:
+                self.speak(name_words=False)
+                self.proxy.setBusy(False)
+            yield
+
+
+def worker_command(synth):
+    return [sys.executable, "-c",
+            f"import sys; sys.path.insert(0, {REPO!r}); import espeak_worker, test_tts_backends; "
+            f"espeak_worker.serve(test_tts_backends.{synth})"]
+
+
+class Recorder:
+    def __init__(self, sample_rate):
+        self.pcm = bytearray()
+        self.closed = False
+
+    def write(self, pcm):
+        self.pcm += pcm
+
+    def close(self):
+        self.closed = True
+
+
+def frames(path):
+    with wave.open(path, "rb") as wav:
+        return wav.getnframes()
+
+
+class TestFakeEngine(unittest.TestCase):
+    def test_words_fire_at_their_time(self):
+        now = [100.0]
+        engine = FakeEngine(clock=lambda: now[0])
+        engine.setProperty('rate', 120)  # half a second per word
+        events = []
+        engine.connect('started-word', lambda name, location, length: events.append((now[0], location)))
+        engine.connect('finished-utterance', lambda name, completed: events.append((now[0], completed)))
+        engine.say("one two three", "s")
+        engine.startLoop(False)
+        for t in (100.0, 100.4, 100.5, 101.0, 101.5):
+            now[0] = t
+            engine.iterate()
+        self.assertEqual(events, [(100.0, 0), (100.5, 4), (101.0, 8), (101.5, True)])
+
+    def test_save_to_file_writes_the_utterance_length(self):
+        directory = tempfile.mkdtemp()
+        try:
+            engine = FakeEngine()
+            engine.setProperty('rate', 240)
+            path = os.path.join(directory, "s.wav")
+            engine.save_to_file("four words in here", path)
+            engine.runAndWait()
+            self.assertEqual(frames(path), 16000)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_pipeline_reads_a_book(self):
+        sentences = ["One two three.", "Four five.", "Six."]
+        words = []
+        pipeline = SpeechPipeline(FakeEngine(time_scale=0.01), sentences, on_word=lambda s, w: words.append((s, w)))
+        self.assertTrue(pipeline.run(0, 0, threading.Event()))
+        self.assertEqual(words, [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (2, 0)])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(BackendError):
+            create_engine("festival")
+
+    def test_render_engine_is_a_separate_instance(self):
+        self.assertIsNot(create_render_engine("fake"), create_engine("fake"))
+        with self.assertRaises(BackendError):
+            create_render_engine("festival")
+
+
+@unittest.skipIf(pyttsx3 is None, "pyttsx3 is not installed")
+class TestPyttsx3Engine(unittest.TestCase):
+    sentences = ["One two three.", "Four five.", "Six."]
+
+    def setUp(self):
+        for name, driver in (("stub", StubDriver), ("stub_loop", StubLoopDriver)):
+            module = types.ModuleType(f"pyttsx3.drivers.{name}")
+            module.buildDriver = driver
+            sys.modules[module.__name__] = module
+
+    def tearDown(self):
+        for name in ("stub", "stub_loop"):
+            del sys.modules[f"pyttsx3.drivers.{name}"]
+
+    def read(self, engine):
+        words = []
+        pipeline = SpeechPipeline(engine, self.sentences, on_word=lambda s, w: words.append((s, w)))
+        self.assertTrue(pipeline.run(0, 0, threading.Event()))
+        return words
+
+    def test_driver_without_external_loop_reads_a_book(self):
+        engine = pyttsx3_engine("stub")
+        self.assertIsInstance(engine, DriverLoopEngine)
+        self.assertEqual(self.read(engine), [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (2, 0)])
+
+    def test_driver_with_external_loop_is_used_directly(self):
+        engine = pyttsx3_engine("stub_loop")
+        self.assertIsInstance(engine, pyttsx3.Engine)
+        self.assertEqual(self.read(engine), [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (2, 0)])
+
+
+class TestEspeakEngine(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.engine = EspeakEngine(workers=2, command=worker_command("WordSynth"), output_factory=Recorder)
+        self.engine.setProperty('rate', 6000)  # 80 samples a word
+
+    def tearDown(self):
+        self.engine.close()
+        shutil.rmtree(self.directory)
+
+    def test_files_are_rendered_by_warm_workers(self):
+        pids = [worker.process.pid for worker in self.engine.workers]
+        for round in range(2):
+            paths = [os.path.join(self.directory, f"{round}-{i}.wav") for i in range(4)]
+            for i, path in enumerate(paths):
+                self.engine.save_to_file(" ".join(["word"] * (i + 1)), path)
+            self.engine.runAndWait()
+            self.assertEqual([frames(path) for path in paths], [80, 160, 240, 320])
+        self.assertEqual([worker.process.pid for worker in self.engine.workers], pids)
+
+    def test_live_words_follow_playback(self):
+        events = []
+        self.engine.connect('started-word', lambda name, location, length: events.append((location, length)))
+        self.engine.connect('finished-utterance', lambda name, completed: events.append(completed))
+        self.engine.say("Hello big world", "s")
+        self.engine.runAndWait()
+        self.assertEqual(events, [(0, 5), (6, 3), (10, 5), True])
+        self.assertEqual(len(self.engine.output.pcm), 3 * 80 * 2)
+
+    def test_stop_drops_the_rest_of_the_utterance(self):
+        finished = []
+        self.engine.connect('finished-utterance', lambda name, completed: finished.append((name, completed)))
+        self.engine.say(" ".join(["long"] * 200), "a")
+        self.engine.startLoop(False)
+        self.engine.iterate()
+        self.engine.stop()
+        self.engine.say("short one", "b")
+        self.engine.runAndWait()
+        self.assertEqual(finished, [("a", False), ("b", True)])
+
+    def test_iterate_does_not_wait_for_audio(self):
+        engine = EspeakEngine(workers=1, command=worker_command("SlowSynth"), output_factory=Recorder)
+        try:
+            engine.setProperty('rate', 6000)
+            engine.say("Hello world", "s")
+            engine.startLoop(False)
+            started = time.monotonic()
+            for _ in range(3):
+                engine.iterate()
+            self.assertLess(time.monotonic() - started, 0.1)
+            self.assertIsNone(engine.output)
+            engine.runAndWait()
+            self.assertEqual(len(engine.output.pcm), 2 * 80 * 2)
+        finally:
+            engine.close()
+
+    def test_close_releases_the_output(self):
+        self.engine.say("Hello", "s")
+        self.engine.runAndWait()
+        output = self.engine.output
+        self.engine.close()
+        self.assertTrue(output.closed)
+        self.assertIsNone(self.engine.output)
+
+    def test_worker_start_up_failure(self):
+        with self.assertRaises(BackendError):
+            EspeakEngine(workers=1, command=worker_command("BrokenSynth"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import threading
+import unittest
+
+from tts_pipeline import SpeechPipeline, word_offsets
+
+
+class FakeEngine:
+    def __init__(self, stop_after_words=None):
+        self.callbacks = {}
+        self.pending = []
+        self.spoken = []
+        self.loops_started = 0
+        self.stop_after_words = stop_after_words
+        self.stop_flag = threading.Event()
+
+    def connect(self, topic, cb):
+        self.callbacks.setdefault(topic, []).append(cb)
+        return (topic, cb)
+
+    def disconnect(self, token):
+        self.callbacks[token[0]].remove(token[1])
+
+    def say(self, text, name=None):
+        self.pending.append((text, name))
+
+    def startLoop(self, useDriverLoop=True):
+        self.loops_started += 1
+
+    def endLoop(self):
+        pass
+
+    def iterate(self):
+        while self.pending:
+            text, name = self.pending.pop(0)
+            for offset in word_offsets(text):
+                if self.stop_after_words is not None and len(self.spoken) == self.stop_after_words:
+                    self.stop_flag.set()
+                    self._notify('finished-utterance', name=name, completed=False)
+                    return
+                self.spoken.append(text[offset:].split()[0])
+                self._notify('started-word', name=name, location=offset, length=1)
+            self._notify('finished-utterance', name=name, completed=True)
+
+    def _notify(self, topic, **kwargs):
+        for cb in self.callbacks.get(topic, []):
+            cb(**kwargs)
+
+
+class TestSpeechPipeline(unittest.TestCase):
+    sentences = ["Hello world.", "This is a test book.", "Let's read!"]
+
+    def test_reads_whole_book_in_one_loop(self):
+        engine = FakeEngine()
+        words = []
+        pipeline = SpeechPipeline(engine, self.sentences, on_word=lambda s, w: words.append((s, w)))
+        self.assertTrue(pipeline.run(0, 0, threading.Event()))
+        self.assertEqual(engine.loops_started, 1)
+        self.assertEqual(" ".join(engine.spoken), " ".join(self.sentences))
+        self.assertEqual(words[:3], [(0, 0), (0, 1), (1, 0)])
+        self.assertEqual((pipeline.sentence_index, pipeline.word_index), (3, 0))
+
+    def test_resumes_on_saved_word(self):
+        engine = FakeEngine()
+        pipeline = SpeechPipeline(engine, self.sentences)
+        pipeline.run(1, 3, threading.Event())
+        self.assertEqual(engine.spoken, ["test", "book.", "Let's", "read!"])
+
+    def test_stop_keeps_current_word(self):
+        engine = FakeEngine(stop_after_words=4)
+        pipeline = SpeechPipeline(engine, self.sentences)
+        self.assertFalse(pipeline.run(0, 0, engine.stop_flag))
+        self.assertEqual((pipeline.sentence_index, pipeline.word_index), (1, 1))
+
+    def test_word_index_past_sentence_end_moves_on(self):
+        engine = FakeEngine()
+        pipeline = SpeechPipeline(engine, self.sentences)
+        pipeline.run(0, 2, threading.Event())
+        self.assertEqual(engine.spoken[0], "This")
+
+    def test_waits_for_sentences_still_loading(self):
+        engine = FakeEngine()
+        sentences = ["Hello world."]
+        loaded = threading.Event()
+
+        def finish_loading():
+            sentences.append("Late page.")
+            loaded.set()
+
+        threading.Timer(0.05, finish_loading).start()
+        pipeline = SpeechPipeline(engine, sentences, loaded=loaded)
+        self.assertTrue(pipeline.run(0, 0, threading.Event()))
+        self.assertEqual(engine.spoken, ["Hello", "world.", "Late", "page."])
+
+
+if __name__ == "__main__":
+    unittest.main()
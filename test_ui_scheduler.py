@@ -0,0 +1,79 @@
+import threading
+import unittest
+
+from ui_scheduler import UiScheduler
+
+
+class FakeRoot:
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+        return len(self.callbacks)
+
+    def after_cancel(self, after_id):
+        self.callbacks[after_id - 1] = None
+
+    def run_frame(self):
+        callback, self.callbacks = self.callbacks[-1], []
+        callback()
+
+
+class TestUiScheduler(unittest.TestCase):
+    def setUp(self):
+        self.root = FakeRoot()
+        self.calls = []
+        self.scheduler = UiScheduler(self.root, {
+            "sentence": lambda value: self.calls.append(("sentence", value)),
+            "word": lambda value: self.calls.append(("word", value)),
+            "progress": lambda value: self.calls.append(("progress", value)),
+        })
+        self.scheduler.start()
+
+    def test_latest_value_wins_once_per_frame(self):
+        for word in range(100):
+            self.scheduler.post("word", (0, word))
+        self.scheduler.post("progress", 1)
+        self.scheduler.post("sentence", 0)
+        self.root.run_frame()
+        # Handlers run in their declared order, each with only the newest value.
+        self.assertEqual(self.calls, [("sentence", 0), ("word", (0, 99)), ("progress", 1)])
+        self.assertEqual((self.scheduler.posted, self.scheduler.coalesced, self.scheduler.applied), (102, 99, 3))
+        self.root.run_frame()
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(self.scheduler.frames, 1)
+
+    def test_posts_from_many_threads(self):
+        threads = [threading.Thread(target=lambda: [self.scheduler.post("progress", i) for i in range(1000)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.root.run_frame()
+        self.assertEqual(self.calls, [("progress", 999)])
+        self.assertEqual(self.scheduler.coalesced, 3999)
+
+    def test_a_failing_handler_does_not_stop_the_timer(self):
+        self.scheduler.handlers["sentence"] = lambda value: 1 / 0
+        self.scheduler.post("sentence", 3)
+        with self.assertRaises(ZeroDivisionError):
+            self.root.run_frame()
+        self.scheduler.post("progress", 5)
+        self.root.run_frame()
+        self.assertEqual(self.calls, [("progress", 5)])
+
+    def test_clear_drops_pending_updates(self):
+        self.scheduler.post("sentence", 3)
+        self.scheduler.clear()
+        self.root.run_frame()
+        self.assertEqual(self.calls, [])
+
+    def test_stop_cancels_the_frame_timer(self):
+        self.scheduler.stop()
+        self.assertEqual(self.root.callbacks, [None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+import wave
+
+from voice_control import VoiceController, keyword_entries, match_command
+
+try:
+    import speech_recognition
+except ImportError:
+    speech_recognition = None
+
+
+class FakeRecognizer:
+    pause_threshold = 0.8
+    non_speaking_duration = 0.5
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestVoiceControl(unittest.TestCase):
+    def test_grammar(self):
+        self.assertEqual(match_command("Restart"), "restart")
+        self.assertEqual(match_command("please pause"), "stop")
+        self.assertEqual(match_command("increase speed"), "increase_speed")
+        self.assertIsNone(match_command("hello"))
+        self.assertEqual(len(keyword_entries()), 7)
+
+    def test_dispatch_is_deferred_and_latency_recorded(self):
+        clock = FakeClock()
+        scheduled = []
+        controller = VoiceController(FakeRecognizer(), lambda *args: scheduled.append(args),
+                                     lambda audio: audio, clock=clock)
+        self.assertEqual(controller.handle("stop", clock()), "stop")
+        self.assertIsNone(controller.handle("what", clock()))
+        self.assertEqual(scheduled, [("stop", 100.0)])
+        clock.now += 0.05
+        controller.action_done(scheduled[0][1])
+        summary = controller.latency_summary()
+        self.assertEqual(summary["count"], 1)
+        self.assertAlmostEqual(summary["median_ms"], 50.0)
+
+    @unittest.skipUnless(speech_recognition, "speech_recognition is not installed")
+    def test_wav_fixture_goes_through_recognizer(self):
+        path = os.path.join(tempfile.mkdtemp(), "pause.wav")
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(b"\0\0" * 8000)
+        recognizer = speech_recognition.Recognizer()
+        heard = []
+        controller = VoiceController(recognizer, lambda *args: heard.append(args),
+                                     lambda audio: "pause" if audio.frame_data else "")
+        self.assertEqual(controller.handle_file(path), "stop")
+        self.assertEqual(heard[0][0], "stop")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+import tracing
+from document import Document
+from position_store import file_fingerprint
+
+MAGIC = b"SBTC"
+VERSION = 3
+HEADER = struct.Struct("<4sIQQQ")
+SUFFIX = ".bookcache"
+
+
+class TextCache:
+    """On-disk cache of extracted book text and sentence boundaries.
+
+    Each entry is one file: a fixed header, the Document offset arrays (pages,
+    sentence starts/ends), then the whole text as one UTF-8 blob. Entries are
+    keyed by content fingerprint, size and mtime, and evicted least recently
+    used first once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".tmp"):
+                os.remove(path)
+            elif name.endswith(SUFFIX):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self.entries[name] = size
+            self.total_bytes += size
+
+    def filename(self, file_path):
+        stat = os.stat(file_path)
+        key = f"{file_fingerprint(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:24] + SUFFIX
+
+    def get(self, file_path):
+        name = self.filename(file_path)
+        with self.lock:
+            if name not in self.entries:
+                return None
+            self.entries.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            with tracing.span("text_cache.read"):
+                document = self._read(path)
+            os.utime(path)
+            return document
+        except (OSError, ValueError):
+            self._remove(name)
+            return None
+
+    def _read(self, path):
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, page_count, sentence_count, text_bytes = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("not a book cache file")
+            document = Document()
+            position = HEADER.size
+            for name, count in (("page_offsets", page_count), ("sentence_starts", sentence_count),
+                                ("sentence_ends", sentence_count)):
+                values = getattr(document, name)
+                values.frombytes(mm[position:position + count * values.itemsize])
+                position += count * values.itemsize
+            if position + text_bytes != len(mm):
+                raise ValueError("truncated book cache file")
+            document.text = str(mm[position:position + text_bytes], "utf-8")
+        return document
+
+    def put(self, file_path, document):
+        name = self.filename(file_path)
+        path = os.path.join(self.directory, name)
+        data = document.text.encode("utf-8")
+        temp_path = path + ".tmp"
+        with tracing.span("text_cache.write", bytes=len(data)), open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(document.page_offsets), len(document.sentence_starts),
+                                len(data)))
+            for values in (document.page_offsets, document.sentence_starts, document.sentence_ends):
+                values.tofile(f)
+            f.write(data)
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        with self.lock:
+            self.total_bytes += size - self.entries.pop(name, 0)
+            self.entries[name] = size
+            evicted = []
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_name, old_size = self.entries.popitem(last=False)
+                self.total_bytes -= old_size
+                evicted.append(old_name)
+        for old_name in evicted:
+            self._remove_file(old_name)
+
+    def invalidate(self, file_path):
+        self._remove(self.filename(file_path))
+
+    def clear(self):
+        with self.lock:
+            names = list(self.entries)
+        for name in names:
+            self._remove(name)
+
+    def _remove(self, name):
+        with self.lock:
+            self.total_bytes -= self.entries.pop(name, 0)
+        self._remove_file(name)
+
+    def _remove_file(self, name):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,197 @@
+"""Opt-in stage timings, exported as Chrome trace-event JSON.
+
+Turn it on with --profile[=trace.json] on the command line of index.py or
+epub.py, or by setting SMART_READER_PROFILE to the output path. While it is
+off, span() hands out one shared do-nothing context manager and record()
+returns at once, so the instrumented code pays a global lookup per call.
+
+At exit the trace is written (open it in chrome://tracing or Perfetto) and a
+table of per-stage percentiles is printed.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+ENV_VAR = "SMART_READER_PROFILE"
+FLAG = "--profile"
+DEFAULT_PATH = "trace.json"
+LOOP_INTERVAL_MS = 50
+PERCENTILES = (0.5, 0.9, 0.99)
+
+_tracer = None
+
+
+class Tracer:
+    def __init__(self, path=None):
+        self.path = path
+        self.origin = time.perf_counter()
+        self.events = []
+        self.durations = {}
+        self.threads = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, start, seconds, pid=None, **args):
+        """A complete event; start is a time.perf_counter() reading."""
+        tid = threading.get_ident()
+        event = {"name": name, "ph": "X", "ts": (start - self.origin) * 1e6, "dur": seconds * 1e6,
+                 "pid": pid or os.getpid(), "tid": tid if pid is None else 0}
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+            self.durations.setdefault(name, []).append(seconds)
+            if tid not in self.threads:
+                self.threads[tid] = threading.current_thread().name
+
+    def trace(self):
+        metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                    for tid, name in self.threads.items()]
+        return {"traceEvents": metadata + self.events, "displayTimeUnit": "ms"}
+
+    def summary(self):
+        """(stage, count, p50, p90, p99, max, total) in milliseconds, slowest total first."""
+        rows = []
+        for name, durations in self.durations.items():
+            durations = sorted(durations)
+            count = len(durations)
+            rows.append((name, count) + tuple(durations[min(int(q * count), count - 1)] * 1000 for q in PERCENTILES)
+                        + (durations[-1] * 1000, sum(durations) * 1000))
+        return sorted(rows, key=lambda row: -row[-1])
+
+    def write(self):
+        with open(self.path, "w") as f:
+            json.dump(self.trace(), f)
+
+    def print_summary(self, file=None):
+        file = file or sys.stderr
+        print(f"{'stage':<28}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'total ms':>11}",
+              file=file)
+        for name, count, p50, p90, p99, longest, total in self.summary():
+            print(f"{name:<28}{count:>8}{p50:>10.2f}{p90:>10.2f}{p99:>10.2f}{longest:>10.2f}{total:>11.1f}", file=file)
+
+
+class Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        tracer = _tracer
+        if tracer is not None:
+            tracer.record(self.name, self.start, time.perf_counter() - self.start, **self.args)
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+def span(name, **args):
+    """with span("stage"): ... times the block when tracing is on."""
+    if _tracer is None:
+        return NULL_SPAN
+    return Span(name, args)
+
+
+def traced(name):
+    """Decorator form of span() for a whole function."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return function(*args, **kwargs)
+            with Span(name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record(name, start, seconds, pid=None, **args):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.record(name, start, seconds, pid, **args)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def enable(path=DEFAULT_PATH, report_at_exit=True):
+    global _tracer
+    _tracer = Tracer(path)
+    if report_at_exit:
+        atexit.register(finish)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def finish():
+    tracer = disable()
+    if tracer is None:
+        return
+    try:
+        tracer.write()
+        print(f"Trace written to {tracer.path}", file=sys.stderr)
+    except OSError as e:
+        print(f"Could not write trace: {e}", file=sys.stderr)
+    tracer.print_summary()
+
+
+def enable_from_args(argv):
+    """Enable tracing for --profile[=PATH] in argv or SMART_READER_PROFILE; returns argv without the flag."""
+    path = os.environ.get(ENV_VAR)
+    rest = []
+    for arg in argv:
+        if arg == FLAG:
+            path = path or DEFAULT_PATH
+        elif arg.startswith(FLAG + "="):
+            path = arg[len(FLAG) + 1:]
+        else:
+            rest.append(arg)
+    if path and _tracer is None:
+        enable(path)
+    return rest
+
+
+def watch_event_loop(schedule, name, interval_ms=LOOP_INTERVAL_MS):
+    """Record how late an event loop runs a timer, every interval_ms, while tracing is on.
+
+    schedule(ms, callback) arms a one-shot timer, e.g. Tk's root.after or
+    Qt's QTimer.singleShot. Lag is the time the timer fired past its due time.
+    """
+    if _tracer is None:
+        return
+
+    def arm():
+        due = time.perf_counter() + interval_ms / 1000
+        schedule(interval_ms, lambda: tick(due))
+
+    def tick(due):
+        record(name, due, max(time.perf_counter() - due, 0.0))
+        if _tracer is not None:
+            arm()
+
+    arm()
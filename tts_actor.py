@@ -0,0 +1,204 @@
+import queue
+import threading
+import time
+
+SAY = "say"
+PAUSE = "pause"
+RESUME = "resume"
+SEEK = "seek"
+SET_RATE = "set-rate"
+SET_VOLUME = "set-volume"
+SHUTDOWN = "shutdown"
+
+
+class SpeechActor:
+    """Owns the TTS engine on a single thread that only takes commands from a queue.
+
+    Every public method just enqueues a command and returns, so the GUI never
+    waits on the engine. The thread, and with it the engine, is started by
+    start() or by the first command, whichever comes first. While a book is being read the pipeline calls back
+    into _control() between engine iterations (or playback chunks), which is
+    where pause, seek, rate and volume commands take effect. on_stopped is
+    called on the actor thread with (finished, sentence_index, word_index,
+    error) each time reading ends.
+    """
+
+    def __init__(self, engine_factory, pipeline_factory, on_stopped=None, rate=None, volume=None):
+        self.engine_factory = engine_factory
+        self.pipeline_factory = pipeline_factory
+        self.on_stopped = on_stopped
+        self.commands = queue.Queue()
+        self.engine = None
+        self.rate = rate
+        self.volume = volume
+        self.sentence_index = 0
+        self.word_index = 0
+        self.reading = False
+        # Times at which the last pause command was sent and carried out.
+        self.pause_requested = None
+        self.paused_at = None
+        self._pipeline = None
+        self._stop_flag = None
+        self._seek_to = None
+        self._restart = False
+        self._shutdown = False
+        # Set if the engine could not be created; every later read reports it.
+        self.engine_error = None
+        self.started = False
+        self._start_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        with self._start_lock:
+            if not self.started:
+                self.started = True
+                self.thread.start()
+        return self
+
+    def _send(self, command, args=()):
+        self.commands.put((command, args))
+        self.start()
+
+    def say(self, sentence_index=None, word_index=0):
+        """Start reading, from the given position or from where reading last stopped."""
+        self._send(SAY, (sentence_index, word_index))
+
+    def pause(self):
+        self.pause_requested = time.perf_counter()
+        self._send(PAUSE)
+
+    def resume(self):
+        self._send(RESUME)
+
+    def seek(self, sentence_index, word_index=0):
+        """Move the read position; reading carries on from there if it was running."""
+        self._send(SEEK, (sentence_index, word_index))
+
+    def set_rate(self, rate):
+        self._send(SET_RATE, (rate,))
+
+    def set_volume(self, volume):
+        self._send(SET_VOLUME, (volume,))
+
+    def call(self, function, *args):
+        """Run function(*args) on the actor thread, in order with the other commands.
+
+        While reading it runs between words or audio chunks, never while the
+        pipeline is between fetching a sentence's audio and starting to play it.
+        """
+        self._send(function, args)
+
+    def shutdown(self, timeout=None):
+        if not self.started:
+            return
+        self.commands.put((SHUTDOWN, ()))
+        if timeout is not None and self.thread.is_alive():
+            self.thread.join(timeout)
+
+    def sync(self, timeout=5.0):
+        """Block until every command sent so far has been handled; for tests and shutdown."""
+        if not self.started:
+            return True
+        done = threading.Event()
+        self.commands.put((done.set, ()))
+        return done.wait(timeout)
+
+    def _run(self):
+        try:
+            self.engine = self.engine_factory()
+            self._apply_properties()
+        except Exception as e:
+            self.engine_error = e
+        while not self._shutdown:
+            command, args = self.commands.get()
+            if command in (SAY, RESUME, SEEK):
+                if command != RESUME and args[0] is not None:
+                    self.sentence_index, self.word_index = args
+                if command != SEEK:
+                    self._read()
+            else:
+                self._handle(command, args)
+
+    def _read(self):
+        if self.engine_error:
+            if self.on_stopped:
+                self.on_stopped(False, self.sentence_index, self.word_index, self.engine_error)
+            return
+        self._restart = True
+        while self._restart and not self._shutdown:
+            self._restart = False
+            self._stop_flag = threading.Event()
+            self.reading = True
+            finished, error = False, None
+            try:
+                self._pipeline = self.pipeline_factory(self.engine)
+                finished = self._pipeline.run(self.sentence_index, self.word_index, self._stop_flag,
+                                              control=self._control)
+                self.sentence_index = self._pipeline.sentence_index
+                self.word_index = self._pipeline.word_index
+                if self._seek_to:
+                    self.sentence_index, self.word_index = self._seek_to
+                    self._seek_to = None
+                    finished = False
+            except Exception as e:
+                error = e
+            finally:
+                self._pipeline = None
+                self.reading = False
+            if finished:
+                self.sentence_index = self.word_index = 0
+            if not self._restart and self.on_stopped:
+                self.on_stopped(finished, self.sentence_index, self.word_index, error)
+
+    def _control(self):
+        """Called by the running pipeline on the actor thread between words or audio chunks."""
+        while True:
+            try:
+                command, args = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            if command in (SAY, SEEK):
+                if args[0] is not None:
+                    self._stop()
+                    self._seek_to = args
+                    self._restart = True
+            elif command == RESUME:
+                # A pause and a resume arrived together: carry on from where it stopped.
+                if self._stop_flag.is_set():
+                    self._restart = True
+            else:
+                self._handle(command, args)
+
+    def _handle(self, command, args):
+        if command == PAUSE:
+            if self._pipeline:
+                self._stop()
+                self.paused_at = time.perf_counter()
+        elif command == SET_RATE:
+            self.rate = args[0]
+            self._apply_properties()
+        elif command == SET_VOLUME:
+            self.volume = args[0]
+            self._apply_properties()
+        elif command == SHUTDOWN:
+            self._shutdown = True
+            if self._pipeline:
+                self._stop()
+        else:
+            command(*args)
+
+    def _stop(self):
+        self._stop_flag.set()
+        self._pipeline.interrupt()
+
+    def _apply_properties(self):
+        if self.engine is None:
+            return
+        if self._pipeline:
+            # The pipeline re-speaks from the current word so the change is heard at once.
+            self._pipeline.set_properties(self.rate, self.volume)
+            return
+        if self.rate is not None:
+            self.engine.setProperty('rate', self.rate)
+        if self.volume is not None:
+            self.engine.setProperty('volume', self.volume)
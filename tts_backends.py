@@ -0,0 +1,509 @@
+"""Interchangeable TTS engines.
+
+Everything that speaks (SpeechPipeline, PreSynthesizer, SpeechActor and the
+audiobook export) drives its engine through this subset of pyttsx3's
+Engine API, which every backend here implements:
+
+    connect(topic, cb) / disconnect(token)  started-utterance, started-word(location, length), finished-utterance
+    say(text, name) / save_to_file(text, path, name)
+    startLoop(False) / iterate() / endLoop() / runAndWait() / stop()
+    getProperty(name) / setProperty(name, value)  for rate (words per minute), volume (0-1) and voice
+
+BACKENDS maps a configuration name to a factory for one engine;
+RENDER_BACKENDS to a factory for a second, independent engine of the same
+kind that renders files on its own thread.
+"""
+import inspect
+import json
+import os
+import queue
+import re
+import struct
+import subprocess
+import sys
+import threading
+import time
+import wave
+from collections import deque
+
+WORD_PATTERN = re.compile(r'\S+')
+FAKE_SAMPLE_RATE = 16000
+ESPEAK_WORKERS = 2
+ESPEAK_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "espeak_worker.py")
+PLAYBACK_CHUNK_FRAMES = 512
+# Audio written ahead of the playback position, so the gaps between iterate() calls do not starve the device.
+PLAYBACK_LEAD_SECONDS = 0.15
+HEADER = struct.Struct("<cI")
+# Where pyttsx3's driver can run a second engine, to pre-render beside the one speaking
+PYTTSX3_RENDER_PLATFORMS = ("win32", "darwin")
+
+
+class BackendError(Exception):
+    pass
+
+
+class EngineEvents:
+    """pyttsx3-style callback registry shared by the backends."""
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def connect(self, topic, cb):
+        self.callbacks.setdefault(topic, []).append(cb)
+        return (topic, cb)
+
+    def disconnect(self, token):
+        self.callbacks[token[0]].remove(token[1])
+
+    def _notify(self, topic, **kwargs):
+        for cb in list(self.callbacks.get(topic, [])):
+            cb(**kwargs)
+
+
+class DriverLoopEngine(EngineEvents):
+    """A pyttsx3 engine whose driver has no external loop, behind startLoop(False)/iterate().
+
+    pyttsx3's eSpeak driver only synthesizes inside its own startLoop(), and
+    its iterate() is not a generator, so the engine's iterate() fails. Here
+    iterate() speaks the next queued utterance through runAndWait() instead.
+    Files are rendered one runAndWait() each, since the driver keeps only
+    the last save_to_file. The driver names word events after the word, so
+    word and finish events are passed on under the utterance's own name.
+    """
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+        self.pending = deque()
+        self.files = deque()
+        # Name of the utterance being spoken, and whether one is
+        self.current = None
+        self.speaking = False
+        engine.connect('started-word', self._on_started_word)
+        engine.connect('finished-utterance', self._on_finished_utterance)
+
+    def getProperty(self, name):
+        return self.engine.getProperty(name)
+
+    def setProperty(self, name, value):
+        self.engine.setProperty(name, value)
+
+    def say(self, text, name=None):
+        self.pending.append((text, name))
+
+    def save_to_file(self, text, path, name=None):
+        self.files.append((text, path, name))
+
+    def stop(self):
+        self.pending.clear()
+        self.engine.stop()
+
+    def startLoop(self, useDriverLoop=True):
+        if useDriverLoop:
+            self.runAndWait()
+
+    def endLoop(self):
+        pass
+
+    def iterate(self):
+        while self.files:
+            text, path, name = self.files.popleft()
+            self.engine.save_to_file(text, path, name)
+            self.engine.runAndWait()
+        if not self.pending:
+            return
+        text, self.current = self.pending.popleft()
+        self.speaking = True
+        self._notify('started-utterance', name=self.current)
+        self.engine.say(text, self.current)
+        self.engine.runAndWait()
+        self._on_finished_utterance(self.current, completed=True)
+
+    def runAndWait(self):
+        self.iterate()
+        while self.pending:
+            self.iterate()
+
+    def _on_started_word(self, name, location, length):
+        if self.speaking:
+            self._notify('started-word', name=self.current, location=location, length=length)
+
+    def _on_finished_utterance(self, name, completed):
+        if self.speaking:
+            self.speaking = False
+            self._notify('finished-utterance', name=self.current, completed=completed)
+
+
+def pyttsx3_engine(driver_name=None):
+    import pyttsx3
+    engine = pyttsx3.init(driver_name)
+    # Drivers that support an external loop yield from iterate().
+    if not inspect.isgeneratorfunction(engine.proxy._driver.iterate):
+        return DriverLoopEngine(engine)
+    return engine
+
+
+def pyttsx3_render_engine():
+    # pyttsx3.init() hands back the engine already speaking, and the eSpeak
+    # driver shares the process's one libespeak synthesizer with it.
+    if sys.platform not in PYTTSX3_RENDER_PLATFORMS:
+        raise BackendError("pyttsx3 cannot run a second engine on this platform; use the espeak backend to pre-render")
+    import pyttsx3
+    return pyttsx3.Engine()
+
+
+def write_wav(path, pcm, sample_rate):
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+
+
+class FakeEngine(EngineEvents):
+    """Deterministic engine with no audio: every word takes 60 / rate seconds.
+
+    Live utterances fire started-word for each word when its time comes,
+    measured on clock and scaled by time_scale, as iterate() or runAndWait()
+    is called. save_to_file writes a silent WAV of the same length. Nothing
+    depends on an audio device or driver, so reading logic can be tested
+    and benchmarked anywhere.
+    """
+
+    def __init__(self, time_scale=1.0, clock=time.monotonic, sample_rate=FAKE_SAMPLE_RATE):
+        super().__init__()
+        self.time_scale = time_scale
+        self.clock = clock
+        self.sample_rate = sample_rate
+        self.properties = {'rate': 200, 'volume': 1.0, 'voice': 'fake'}
+        self.pending = deque()
+        self.files = []
+        # (name, [(due time, location, length)], end time) of the utterance being spoken
+        self.current = None
+        self.looping = False
+
+    def getProperty(self, name):
+        return self.properties[name]
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def word_seconds(self):
+        return 60.0 / self.properties['rate'] * self.time_scale
+
+    def say(self, text, name=None):
+        self.pending.append((text, name))
+
+    def save_to_file(self, text, path, name=None):
+        self.files.append((text, path))
+
+    def stop(self):
+        self.pending.clear()
+        if self.current:
+            name = self.current[0]
+            self.current = None
+            self._notify('finished-utterance', name=name, completed=False)
+
+    def startLoop(self, useDriverLoop=True):
+        self.looping = True
+        while useDriverLoop and self.looping:
+            self._wait()
+            self.iterate()
+
+    def endLoop(self):
+        self.looping = False
+
+    def iterate(self):
+        while self.files:
+            text, path = self.files.pop(0)
+            seconds = len(WORD_PATTERN.findall(text)) * 60.0 / self.properties['rate']
+            write_wav(path, b"\0\0" * int(seconds * self.sample_rate), self.sample_rate)
+        now = self.clock()
+        if self.current is None and self.pending:
+            text, name = self.pending.popleft()
+            step = self.word_seconds()
+            words = [(now + i * step, match.start(), len(match.group()))
+                     for i, match in enumerate(WORD_PATTERN.finditer(text))]
+            self.current = (name, deque(words), now + len(words) * step)
+            self._notify('started-utterance', name=name)
+        if self.current is None:
+            return
+        name, words, end = self.current
+        while words and words[0][0] <= now:
+            _, location, length = words.popleft()
+            self._notify('started-word', name=name, location=location, length=length)
+            if self.current is None:
+                return
+        if not words and now >= end:
+            self.current = None
+            self._notify('finished-utterance', name=name, completed=True)
+
+    def runAndWait(self):
+        self.iterate()
+        while self.current or self.pending:
+            self._wait()
+            self.iterate()
+
+    def _wait(self):
+        if self.current:
+            _, words, end = self.current
+            due = words[0][0] if words else end
+            time.sleep(max(due - self.clock(), 0))
+
+
+def read_frame(stream):
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None, b""
+    kind, length = HEADER.unpack(header)
+    payload = stream.read(length) if length else b""
+    return kind, payload
+
+
+class EspeakWorker:
+    """One warm espeak_worker.py process; replies are routed back per request in order."""
+
+    def __init__(self, command):
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        kind, payload = read_frame(self.process.stdout)
+        if kind != b"R":
+            self.process.kill()
+            message = payload.decode("utf-8", "replace") if kind == b"X" else "worker exited at start-up"
+            raise BackendError(f"eSpeak worker unavailable: {message}")
+        self.sample_rate = struct.unpack("<I", payload)[0]
+        # Reply queues of the requests sent and not yet answered, oldest first.
+        # Only the reader thread removes from it, so it does not take the lock
+        # that serializes writers; a full pipe cannot deadlock the two.
+        self.requests = deque()
+        self.write_lock = threading.Lock()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    @property
+    def load(self):
+        return len(self.requests)
+
+    def submit(self, text, rate, volume, voice):
+        """Queue a request; its frames arrive on the returned queue, ending with E (or X)."""
+        replies = queue.Queue()
+        line = json.dumps({"text": text, "rate": rate, "volume": volume, "voice": voice}) + "\n"
+        with self.write_lock:
+            self.requests.append(replies)
+            try:
+                self.process.stdin.write(line.encode("utf-8"))
+                self.process.stdin.flush()
+            except OSError as e:
+                self.requests.remove(replies)
+                raise BackendError(f"eSpeak worker died: {e}")
+        return replies
+
+    def _read(self):
+        while True:
+            kind, payload = read_frame(self.process.stdout)
+            if kind is None:
+                while self.requests:
+                    self.requests.popleft().put((b"X", b"eSpeak worker exited"))
+                return
+            replies = self.requests[0]
+            if kind == b"E":
+                self.requests.popleft()
+            replies.put((kind, payload))
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self.process.wait()
+
+
+class PyAudioOutput:
+    def __init__(self, sample_rate):
+        try:
+            import pyaudio
+            self.audio = pyaudio.PyAudio()
+            self.stream = self.audio.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, output=True)
+        except (ImportError, OSError) as e:
+            raise BackendError(f"audio playback unavailable: {e}")
+
+    def write(self, pcm):
+        self.stream.write(pcm)
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+        self.audio.terminate()
+
+
+class EspeakEngine(EngineEvents):
+    """eSpeak NG through a pool of warm worker processes that stream PCM over pipes.
+
+    Each worker loads the voice once and stays up, so no call pays for a
+    process spawn. save_to_file requests are spread over the pool and
+    rendered in parallel by runAndWait(). Live speech comes from one worker
+    and is played a chunk per iterate(); started-word fires as playback
+    reaches each word's first sample, so highlighting follows the audio.
+    output_factory(sample_rate) returns an object with write(pcm) and
+    close(); the default plays through PyAudio.
+    """
+
+    def __init__(self, workers=ESPEAK_WORKERS, command=None, output_factory=PyAudioOutput):
+        super().__init__()
+        command = command or [sys.executable, ESPEAK_WORKER]
+        self.output = None
+        self.workers = []
+        try:
+            for _ in range(workers):
+                self.workers.append(EspeakWorker(command))
+        except (BackendError, OSError) as e:
+            self.close()
+            raise BackendError(str(e))
+        self.sample_rate = self.workers[0].sample_rate
+        self.output_factory = output_factory
+        self.properties = {'rate': 175, 'volume': 1.0, 'voice': 'en'}
+        self.pending = deque()
+        self.files = []
+        # The live utterance: name, reply queue, PCM not yet written, word
+        # events, samples written, when writing started and whether synthesis is done
+        self.current = None
+
+    def getProperty(self, name):
+        return self.properties[name]
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def _submit(self, text):
+        worker = min(self.workers, key=lambda worker: worker.load)
+        return worker.submit(text, self.properties['rate'], self.properties['volume'], self.properties['voice'])
+
+    def say(self, text, name=None):
+        self.pending.append((text, name))
+
+    def save_to_file(self, text, path, name=None):
+        self.files.append((text, path))
+
+    def stop(self):
+        # The worker finishes the request on its own; its remaining frames are dropped.
+        self.pending.clear()
+        if self.current:
+            name = self.current["name"]
+            self.current = None
+            self._notify('finished-utterance', name=name, completed=False)
+
+    def startLoop(self, useDriverLoop=True):
+        if useDriverLoop:
+            self.runAndWait()
+
+    def endLoop(self):
+        pass
+
+    def iterate(self):
+        if self.files:
+            self._render_files()
+        if self.current is None and self.pending:
+            text, name = self.pending.popleft()
+            self.current = {"name": name, "replies": self._submit(text), "pcm": bytearray(),
+                            "words": deque(), "written": 0, "started": None, "done": False}
+            self._notify('started-utterance', name=name)
+        if self.current is None:
+            return
+        current = self.current
+        self._receive(current)
+        now = time.monotonic()
+        if current["pcm"] and current["started"] is None:
+            current["started"] = now
+        if current["started"] is not None:
+            target = (now - current["started"] + PLAYBACK_LEAD_SECONDS) * self.sample_rate
+            while current["pcm"] and current["written"] < target:
+                chunk = bytes(current["pcm"][:PLAYBACK_CHUNK_FRAMES * 2])
+                del current["pcm"][:len(chunk)]
+                if self.output is None:
+                    self.output = self.output_factory(self.sample_rate)
+                self.output.write(chunk)
+                current["written"] += len(chunk) // 2
+        # Words fire at the sample being heard now, not the one last written.
+        position = min((now - current["started"]) * self.sample_rate, current["written"]) \
+            if current["started"] is not None else 0
+        finished = current["done"] and not current["pcm"] and position >= current["written"]
+        while current["words"] and (finished or current["words"][0][0] <= position):
+            _, location, length = current["words"].popleft()
+            self._notify('started-word', name=current["name"], location=location, length=length)
+            if self.current is not current:
+                return
+        if finished:
+            self.current = None
+            self._notify('finished-utterance', name=current["name"], completed=True)
+
+    def _receive(self, current):
+        # Never waits: iterate() runs on the caller's thread between its other
+        # work, and runAndWait() does the waiting.
+        while True:
+            try:
+                kind, payload = current["replies"].get_nowait()
+            except queue.Empty:
+                return
+            if kind == b"A":
+                current["pcm"] += payload
+            elif kind == b"W":
+                word = json.loads(payload)
+                current["words"].append((word["sample"], word["location"], word["length"]))
+            elif kind == b"E":
+                current["done"] = True
+                return
+            else:
+                raise BackendError(payload.decode("utf-8", "replace"))
+
+    def _render_files(self):
+        files, self.files = self.files, []
+        submitted = [(path, self._submit(text)) for text, path in files]
+        for path, replies in submitted:
+            pcm = bytearray()
+            while True:
+                kind, payload = replies.get()
+                if kind == b"A":
+                    pcm += payload
+                elif kind == b"E":
+                    break
+                elif kind == b"X":
+                    raise BackendError(payload.decode("utf-8", "replace"))
+            write_wav(path, bytes(pcm), self.sample_rate)
+
+    def runAndWait(self):
+        self.iterate()
+        while self.current or self.pending:
+            time.sleep(PLAYBACK_CHUNK_FRAMES / self.sample_rate / 2)
+            self.iterate()
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+        self.workers = []
+        if self.output is not None:
+            self.output.close()
+            self.output = None
+
+
+BACKENDS = {
+    "pyttsx3": pyttsx3_engine,
+    "espeak": EspeakEngine,
+    "fake": FakeEngine,
+}
+
+
+RENDER_BACKENDS = {
+    "pyttsx3": pyttsx3_render_engine,
+    "espeak": EspeakEngine,
+    "fake": FakeEngine,
+}
+
+
+def create_engine(name, backends=BACKENDS):
+    try:
+        factory = backends[name]
+    except KeyError:
+        raise BackendError(f"unknown TTS backend {name!r}; choose from {', '.join(backends)}")
+    return factory()
+
+
+def create_render_engine(name):
+    return create_engine(name, RENDER_BACKENDS)
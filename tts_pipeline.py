@@ -0,0 +1,239 @@
+import queue
+import re
+import threading
+import time
+from bisect import bisect_right
+
+import tracing
+
+WORD_PATTERN = re.compile(r'\S+')
+POLL_INTERVAL = 0.01
+_END_OF_BOOK = object()
+
+
+def word_offsets(text):
+    return [match.start() for match in WORD_PATTERN.finditer(text)]
+
+
+class SpeechPipeline:
+    """Speaks whole sentences through one long-lived engine loop.
+
+    A segmenter thread queues sentences ahead of the speaker, and the engine's
+    started-word callbacks keep sentence_index/word_index pointing at the word
+    currently being spoken, so a stop can resume on that exact word.
+    """
+
+    def __init__(self, engine, sentences, on_sentence=None, on_word=None, lookahead=16, loaded=None):
+        self.engine = engine
+        # sentences may still be growing while a book loads; loaded is set once it is complete.
+        self.sentences = sentences
+        self.loaded = loaded
+        self.on_sentence = on_sentence
+        self.on_word = on_word
+        self.queue = queue.Queue(maxsize=lookahead)
+        self.sentence_index = 0
+        self.word_index = 0
+        self._current = None
+        self._resume_item = None
+        # When the current utterance was handed to the engine; _said_at is
+        # cleared once its first word is heard
+        self._utterance_started = None
+        self._said_at = None
+        self._finished = threading.Event()
+        self.control = None
+
+    def run(self, start_sentence, start_word, stop_flag, control=None):
+        """Speak from the given position until the book ends or stop_flag is set.
+
+        control, if given, is called on this thread between engine iterations
+        so the caller can interrupt or change properties without touching the
+        engine from another thread. Returns True when the last sentence
+        finished, False when stopped.
+        """
+        self.control = control
+        self.sentence_index = start_sentence
+        self.word_index = start_word
+        segmenter = threading.Thread(target=self._segment, args=(start_sentence, start_word, stop_flag),
+                                     daemon=True)
+        segmenter.start()
+        try:
+            return self._speak(stop_flag)
+        finally:
+            self._finished.set()
+
+    def _segment(self, start_sentence, start_word, stop_flag):
+        idx = start_sentence
+        while True:
+            loaded = self.loaded is None or self.loaded.is_set()
+            if idx < len(self.sentences):
+                sentence = self.sentences[idx]
+                offsets = word_offsets(sentence)
+                first_word = start_word if idx == start_sentence else 0
+                if first_word < len(offsets) and not self._put((idx, first_word, offsets, sentence), stop_flag):
+                    return
+                idx += 1
+            elif loaded:
+                break
+            elif stop_flag.wait(POLL_INTERVAL) or self._finished.is_set():
+                return
+        self._put(_END_OF_BOOK, stop_flag)
+
+    def _put(self, item, stop_flag):
+        while not stop_flag.is_set() and not self._finished.is_set():
+            try:
+                self.queue.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _next_item(self):
+        try:
+            return self.queue.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            return None
+
+    def _begin_sentence(self, idx, first_word):
+        self.sentence_index = idx
+        self.word_index = first_word
+        if self.on_sentence:
+            self.on_sentence(idx, first_word)
+
+    def _speak(self, stop_flag):
+        tokens = [self.engine.connect('started-word', self._on_started_word),
+                  self.engine.connect('finished-utterance', self._on_finished_utterance)]
+        self.engine.startLoop(False)
+        try:
+            while not stop_flag.is_set():
+                if self.control:
+                    self.control()
+                    if stop_flag.is_set():
+                        break
+                if self._current is None:
+                    item, self._resume_item = self._resume_item or self._next_item(), None
+                    if item is None:
+                        continue
+                    if item is _END_OF_BOOK:
+                        return True
+                    self._start_utterance(item)
+                self.engine.iterate()
+                if self._current is not None:
+                    stop_flag.wait(POLL_INTERVAL)
+            return False
+        finally:
+            self.engine.endLoop()
+            for token in tokens:
+                self.engine.disconnect(token)
+
+    def interrupt(self):
+        self.engine.stop()
+
+    def set_properties(self, rate, volume):
+        """Apply rate/volume from the word being spoken by re-saying the rest of the sentence."""
+        if rate is not None:
+            self.engine.setProperty('rate', rate)
+        if volume is not None:
+            self.engine.setProperty('volume', volume)
+        if self._current is not None:
+            _, idx, _, _, offsets, sentence = self._current
+            self._current = None
+            self.engine.stop()
+            self._resume_item = (idx, self.word_index, offsets, sentence)
+
+    def _start_utterance(self, item):
+        idx, first_word, offsets, sentence = item
+        # Resuming mid-sentence speaks only the remaining words; offsets are
+        # rebased so engine locations map straight back to word indices.
+        base = offsets[first_word]
+        self._current = (str(idx), idx, first_word, [offset - base for offset in offsets[first_word:]],
+                         offsets, sentence)
+        self._begin_sentence(idx, first_word)
+        self._said_at = self._utterance_started = time.perf_counter()
+        self.engine.say(sentence[base:], str(idx))
+
+    def _on_started_word(self, name, location, length):
+        if self._current is None or self._current[0] != name:
+            return
+        _, idx, first_word, offsets, _, _ = self._current
+        if self._said_at is not None:
+            tracing.record("tts.first_word_latency", self._said_at, time.perf_counter() - self._said_at, sentence=idx)
+            self._said_at = None
+        self.word_index = first_word + max(bisect_right(offsets, location) - 1, 0)
+        if self.on_word:
+            self.on_word(idx, self.word_index)
+
+    def _on_finished_utterance(self, name, completed):
+        if self._current is None or self._current[0] != name:
+            return
+        tracing.record("tts.speak_sentence", self._utterance_started, time.perf_counter() - self._utterance_started,
+                       sentence=self._current[1], completed=completed)
+        if completed:
+            self.sentence_index = self._current[1] + 1
+            self.word_index = 0
+        self._current = None
+
+
+class CachedSpeechPipeline(SpeechPipeline):
+    """Plays sentences pre-rendered by a PreSynthesizer instead of speaking live.
+
+    Word positions are estimated from the playback position, assuming speech
+    time is proportional to character count within a sentence.
+    """
+
+    def __init__(self, synthesizer, player, sentences, on_sentence=None, on_word=None, lookahead=16, loaded=None):
+        super().__init__(synthesizer.engine, sentences, on_sentence, on_word, lookahead, loaded)
+        self.synthesizer = synthesizer
+        self.player = player
+
+    def _speak(self, stop_flag):
+        self.synthesizer.start(self.sentence_index)
+        try:
+            while not stop_flag.is_set():
+                if self.control:
+                    self.control()
+                item = self._next_item()
+                if item is None:
+                    continue
+                if item is _END_OF_BOOK:
+                    return True
+                idx, first_word, offsets, sentence = item
+                waited_from = time.perf_counter()
+                path = self.synthesizer.wait_for(idx, stop_flag, POLL_INTERVAL)
+                while path is None and not stop_flag.is_set():
+                    if self.control:
+                        self.control()
+                    path = self.synthesizer.wait_for(idx, stop_flag, POLL_INTERVAL)
+                if path is None:
+                    break
+                tracing.record("tts.wait_for_audio", waited_from, time.perf_counter() - waited_from, sentence=idx)
+                self._begin_sentence(idx, first_word)
+
+                def on_position(fraction, idx=idx, offsets=offsets, sentence=sentence):
+                    if self.control:
+                        self.control()
+                    self._on_position(idx, offsets, fraction * len(sentence))
+
+                if self.player.play(path, offsets[first_word] / len(sentence), stop_flag, on_position):
+                    self.sentence_index = idx + 1
+                    self.word_index = 0
+            return False
+        finally:
+            self.synthesizer.stop()
+
+    def interrupt(self):
+        # Playback checks stop_flag between chunks; the engine may be busy rendering.
+        pass
+
+    def set_properties(self, rate, volume):
+        """Volume applies from the next audio chunk; a new rate from the next rendered sentence."""
+        if rate is not None:
+            self.synthesizer.set_rate(rate)
+        if volume is not None:
+            self.player.volume = volume
+
+    def _on_position(self, idx, offsets, location):
+        word_index = max(bisect_right(offsets, location) - 1, 0)
+        if word_index != self.word_index:
+            self.word_index = word_index
+            if self.on_word:
+                self.on_word(idx, word_index)
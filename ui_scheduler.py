@@ -0,0 +1,67 @@
+import threading
+
+import tracing
+
+FRAME_MS = 33
+
+
+class UiScheduler:
+    """Applies the latest state posted from background threads at most once per frame.
+
+    Worker threads call post(key, value) instead of root.after; the Tk thread
+    picks up whatever is pending every frame_ms and calls handlers[key](value)
+    in the order the handlers were given. A value that is replaced before
+    its frame is dropped and counted in `coalesced`.
+    """
+
+    def __init__(self, root, handlers, frame_ms=FRAME_MS):
+        self.root = root
+        self.handlers = handlers
+        self.frame_ms = frame_ms
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.posted = 0
+        self.coalesced = 0
+        self.applied = 0
+        self.frames = 0
+        self.after_id = None
+
+    def start(self):
+        """Begin the frame timer; call from the Tk thread."""
+        self.after_id = self.root.after(self.frame_ms, self.tick)
+
+    def stop(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def post(self, key, value):
+        with self.lock:
+            self.posted += 1
+            if key in self.pending:
+                self.coalesced += 1
+            self.pending[key] = value
+
+    def clear(self):
+        """Drop updates that have not been applied yet."""
+        with self.lock:
+            self.pending = {}
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        self.frames += 1
+        with tracing.span("ui.frame", updates=len(pending)):
+            for key, handler in self.handlers.items():
+                if key in pending:
+                    handler(pending[key])
+                    self.applied += 1
+
+    def tick(self):
+        try:
+            self.flush()
+        finally:
+            # A handler that raises must not stop later frames.
+            self.after_id = self.root.after(self.frame_ms, self.tick)
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+
+# Command grammar, checked in order: "restart" must win over "start".
+COMMANDS = (
+    ("restart", "restart"),
+    ("start", "start"),
+    ("pause", "stop"),
+    ("stop", "stop"),
+    ("resume", "resume"),
+    ("increase speed", "increase_speed"),
+    ("decrease speed", "decrease_speed"),
+)
+# Keyword-spotting sensitivity (0-1) for the offline recognizer; single short
+# words false-trigger more easily than two-word phrases.
+KEYWORD_SENSITIVITY = {1: 0.8, 2: 0.9}
+RECALIBRATE_SECONDS = 60.0
+CALIBRATION_SECONDS = 0.5
+# Silence that ends an utterance; the default 0.8 s is added to every command.
+PAUSE_THRESHOLD = 0.4
+LATENCY_SAMPLES = 200
+
+
+def match_command(transcript):
+    """Map recognized text to a command name, or None."""
+    transcript = transcript.lower()
+    for phrase, command in COMMANDS:
+        if phrase in transcript:
+            return command
+    return None
+
+
+def keyword_entries():
+    return [(phrase, KEYWORD_SENSITIVITY[len(phrase.split())]) for phrase, _ in COMMANDS]
+
+
+def offline_recognizer(recognizer):
+    """Keyword spotting limited to the command grammar; runs without a network."""
+    entries = keyword_entries()
+    return lambda audio: recognizer.recognize_sphinx(audio, keyword_entries=entries)
+
+
+def online_recognizer(recognizer):
+    return lambda audio: recognizer.recognize_google(audio)
+
+
+RECOGNIZERS = {"offline": offline_recognizer, "google": online_recognizer}
+
+
+class VoiceController:
+    """Listens for commands on a background thread and hands them to dispatch().
+
+    The microphone is calibrated once, and again only after a listen times
+    out in silence once RECALIBRATE_SECONDS have passed. dispatch(command,
+    utterance_end) must only schedule the action (e.g. via root.after); the
+    action then calls action_done(utterance_end) to record end-of-utterance
+    to action latency. utterance_end is when listen() returned, i.e. after
+    PAUSE_THRESHOLD of trailing silence.
+    """
+
+    def __init__(self, recognizer, dispatch, recognize, clock=time.monotonic):
+        self.recognizer = recognizer
+        self.dispatch = dispatch
+        self.recognize = recognize
+        self.clock = clock
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.lock = threading.Lock()
+        self.calibrated_at = None
+        self.recognizer.pause_threshold = PAUSE_THRESHOLD
+        self.recognizer.non_speaking_duration = min(self.recognizer.non_speaking_duration, PAUSE_THRESHOLD)
+
+    def calibrate(self, source):
+        self.recognizer.adjust_for_ambient_noise(source, duration=CALIBRATION_SECONDS)
+        self.calibrated_at = self.clock()
+
+    def run(self, microphone, stop_flag):
+        import speech_recognition as sr
+        with microphone as source:
+            self.calibrate(source)
+            print("Listening for commands...")
+            while not stop_flag.is_set():
+                try:
+                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
+                except sr.WaitTimeoutError:
+                    if self.clock() - self.calibrated_at >= RECALIBRATE_SECONDS:
+                        self.calibrate(source)
+                    continue
+                try:
+                    self.handle(audio, self.clock())
+                except sr.UnknownValueError:
+                    continue
+                except sr.RequestError as e:
+                    print(f"Speech recognition error: {e}")
+                except Exception as e:
+                    print(f"Unexpected error: {e}")
+
+    def handle(self, audio, utterance_end):
+        """Recognize one utterance and dispatch its command. Returns the command or None."""
+        transcript = self.recognize(audio)
+        print(f"Recognized command: {transcript}")
+        command = match_command(transcript)
+        if command:
+            self.dispatch(command, utterance_end)
+        return command
+
+    def handle_file(self, path):
+        """Feed a recorded WAV file through the same path as live audio."""
+        import speech_recognition as sr
+        with sr.AudioFile(path) as source:
+            audio = self.recognizer.record(source)
+        return self.handle(audio, self.clock())
+
+    def action_done(self, utterance_end):
+        with self.lock:
+            self.latencies.append(self.clock() - utterance_end)
+
+    def latency_summary(self):
+        """Median, 95th percentile and max latency in milliseconds."""
+        with self.lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return {
+            "count": len(samples),
+            "median_ms": samples[len(samples) // 2] * 1000,
+            "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+            "max_ms": samples[-1] * 1000,
+        }